@@ -0,0 +1,60 @@
+#-------------------------------------------------------------------------------
+# Name:        bench_memory
+# Purpose:     memory footprint of fuzzy subsets
+#
+# Author:      sejros
+#
+# Copyright:   (c) sejros 2014
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+#!/usr/bin/env python
+
+import sys
+
+from fuzzycalc.subset import Subset, Trapezoidal, Triangle, Gaussian
+
+
+def deep_size(obj, seen=None):
+    '''
+    Size of an object together with everything it exclusively references:
+    instance dict, slots and the contents of containers. Objects shared
+    between instances (classes and functions) are skipped.
+    '''
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type) or callable(obj):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set)):
+        for item in obj:
+            size += deep_size(item, seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            # slot descriptors are read directly: subclasses may shadow a
+            # slot with a computed property
+            try:
+                value = cls.__dict__[name].__get__(obj, cls)
+            except AttributeError:
+                continue
+            size += deep_size(value, seen)
+    return size
+
+
+def main():
+    samples = [
+        ('Subset', lambda: Subset()),
+        ('Trapezoidal', lambda: Trapezoidal((0.0, 1.0, 2.0, 3.0))),
+        ('Triangle', lambda: Triangle(0.0, 1.0, 2.0)),
+        ('Gaussian', lambda: Gaussian(0.0, 1.0)),
+    ]
+    for name, build in samples:
+        print '%-12s %6d bytes' % (name, deep_size(build()))
+
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,14 @@
 контроллеры - метод анализа иерархий
 '''
 
+import fuzzycalc.distance
 import fuzzycalc.domain
+import fuzzycalc.lazy
 import fuzzycalc.numbers
+import fuzzycalc.relation
 import fuzzycalc.set
+import fuzzycalc.storage
 import fuzzycalc.subset
+import fuzzycalc.table
 import fuzzycalc.tnorm
 import fuzzycalc.algebra
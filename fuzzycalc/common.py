@@ -3,5 +3,248 @@
 Общие ресурсы библиотеки fuzzycalc
 '''
 
+from functools import wraps
+import threading
+
+import numpy as np
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
 ACCURACY = 1000
 PRECISION = 0.00000001
+
+
+
+class Precision(object):
+    '''
+    Политика точности вычислений: число отрезков сетки дискретизации
+    носителей (acc), тип элементов массивов сеток (dtype) и допуск
+    сравнения и интегрирования (tol). Значения по умолчанию - ACCURACY,
+    float64 и PRECISION.
+
+    Объект является контекстным менеджером: внутри блока with действуют
+    заданные в нем параметры, незаданные (None) наследуются от внешней
+    политики. Политика хранится в контекстной переменной (contextvars), а
+    при ее отсутствии - в локальной памяти потока, поэтому разные потоки и
+    сопрограммы могут одновременно работать с разной точностью.
+    Носители, точность которых не задана явно, сетки, функционалы
+    нечетких подмножеств и их сравнение используют текущую политику (см.
+    current_precision).
+
+    Тип dtype задает тип элементов сеток носителей (domain.grid),
+    значений дискретных подмножеств и отношений (Discrete, Relation),
+    границ альфа-срезов нечетких чисел (AlphaCutNumber, extend) и матриц
+    distance_matrix. Значения функций принадлежности непрерывных
+    подмножеств (values_at, точки излома PiecewiseLinear) всегда
+    вычисляются и хранятся в float64.
+    Синтаксис:
+        >>> A=Gaussian(0.0, 1.0)
+        >>> with Precision(acc=10, dtype='float32'):
+        ...     print len(A.domain.grid()), A.domain.grid().dtype
+        11 float32
+        >>> len(A.domain.grid())
+        1001
+
+    Attributes:
+        acc
+        dtype
+        tol
+    '''
+
+    __slots__ = ('acc', 'dtype', 'tol', '_token')
+
+    def __init__(self, acc=None, dtype=None, tol=None):
+        self.acc = acc
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.tol = tol
+        self._token = None
+
+    def __enter__(self):
+        outer = current_precision()
+        policy = Precision(outer.acc if self.acc is None else self.acc,
+                           outer.dtype if self.dtype is None else self.dtype,
+                           outer.tol if self.tol is None else self.tol)
+        # метка восстановления хранится в новой (действующей) политике, а
+        # не в менеджере: один менеджер может одновременно использоваться в
+        # нескольких потоках и сопрограммах
+        policy._token = _set_precision(policy)
+        return policy
+
+    def __exit__(self, *exc_info):
+        _reset_precision(current_precision()._token)
+        return False
+
+    def key(self):
+        return (self.acc, self.dtype, self.tol)
+
+    def __reduce__(self):
+        return (Precision, self.key())
+
+
+_default_precision = Precision(ACCURACY, np.float64, PRECISION)
+
+if ContextVar is not None:
+    _precision = ContextVar('fuzzycalc_precision',
+                            default=_default_precision)
+
+    def current_precision():
+        '''
+        Возвращает действующую политику точности (см. Precision).
+        '''
+        return _precision.get()
+
+    def _set_precision(policy):
+        return _precision.set(policy)
+
+    def _reset_precision(token):
+        _precision.reset(token)
+else:
+    _precision = threading.local()
+
+    def current_precision():
+        '''
+        Возвращает действующую политику точности (см. Precision).
+        '''
+        return getattr(_precision, 'policy', _default_precision)
+
+    def _set_precision(policy):
+        token = current_precision()
+        _precision.policy = policy
+        return token
+
+    def _reset_precision(token):
+        _precision.policy = token
+
+
+# Число отрезков начального разбиения и наибольшее число делений пополам
+# при адаптивном интегрировании (см. quad).
+QUAD_START = 16
+QUAD_DEPTH = 30
+
+
+def get_slots(obj, skip=()):
+    '''
+    Возвращает словарь значений заданных слотов объекта obj (кроме
+    перечисленных в skip) для сериализации (pickle). Слоты читаются
+    непосредственно через их дескрипторы, так как подклассы могут
+    перекрывать слот вычисляемым свойством.
+    '''
+    state = {}
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name in skip or name in state:
+                continue
+            try:
+                state[name] = cls.__dict__[name].__get__(obj, cls)
+            except AttributeError:
+                pass
+    return state
+
+
+def set_slots(obj, state):
+    '''
+    Восстанавливает значения слотов объекта obj из словаря state (см.
+    get_slots).
+    '''
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name in state:
+                cls.__dict__[name].__set__(obj, state[name])
+
+
+def memoized(method):
+    '''
+    Декоратор, сохраняющий результаты метода нечеткого подмножества в
+    словаре _cache экземпляра. Ключом служат имя метода, его аргументы,
+    параметры носителя, текущая политика точности и версия подмножества
+    (см. subset.Subset._stamp), поэтому изменение точности, границ носителя
+    или операндов выражения не приводит к использованию устаревших
+    значений. Методы, изменяющие подмножество (например, __setitem__),
+    должны вызывать его метод _changed().
+    '''
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())),
+               self.domain.begin, self.domain.end, self.domain.acc,
+               current_precision().key(), self._stamp())
+        try:
+            cache = self._cache
+        except AttributeError:
+            cache = self._cache = {}
+        try:
+            return cache[key]
+        except KeyError:
+            res = cache[key] = method(self, *args, **kwargs)
+            return res
+    return wrapper
+
+
+def quad(f, a, b, tol=None):
+    '''
+    Адаптивное интегрирование функции f по отрезку [a, b] методом Симпсона.
+    Отрезок делится пополам только там, где оценка погрешности на нем
+    превышает долю tol, пропорциональную его длине, поэтому на гладких
+    участках функция вычисляется в немногих точках, а точки сгущаются
+    у изломов. Все отрезки одного уровня деления обрабатываются одним
+    векторным вызовом f.
+
+    Функция f принимает массив точек и возвращает массив значений той же
+    длины или матрицу, строки которой - значения нескольких интегрируемых
+    функций. По умолчанию tol берется из текущей политики точности.
+    Возвращает тройку: значение интеграла (массив - для нескольких
+    функций), оценку достигнутой абсолютной погрешности и число вычислений
+    функции. Интеграл по отрезку нулевой длины равен 0.
+    Синтаксис:
+        >>> res, err, evals = quad(np.sin, 0.0, np.pi, tol=1e-10)
+        >>> print round(res, 10), err < 1e-10
+        2.0 True
+    '''
+    if tol is None:
+        tol = current_precision().tol
+    if a == b:
+        # f вычисляется в одной точке только для определения формы ответа
+        return np.zeros(np.shape(f(np.array([a])))[:-1]), 0.0, 1
+    edges = np.linspace(a, b, QUAD_START + 1)
+    lo, hi = edges[:-1], edges[1:]
+    f_edges = f(edges)
+    f_lo, f_hi = f_edges[..., :-1], f_edges[..., 1:]
+    f_mid = f((lo+hi)/2)
+    whole = (hi-lo)*(f_lo + 4*f_mid + f_hi)/6
+    evaluations = len(edges) + len(lo)
+
+    total = np.zeros(np.shape(f_mid)[:-1])
+    error = 0.0
+    for depth in range(QUAD_DEPTH):
+        mid = (lo+hi)/2
+        f_left = f((lo+mid)/2)
+        f_right = f((mid+hi)/2)
+        evaluations += 2*len(lo)
+        left = (mid-lo)*(f_lo + 4*f_left + f_mid)/6
+        right = (hi-mid)*(f_mid + 4*f_right + f_hi)/6
+        diff = left + right - whole
+        err = np.abs(diff)/15
+        if err.ndim > 1:
+            err = err.max(axis=0)
+        done = err <= tol*(hi-lo)/(b-a)
+        if depth == QUAD_DEPTH - 1:
+            done[:] = True
+        # экстраполяция Ричардсона для принятых отрезков
+        total = total + (left + right + diff/15)[..., done].sum(axis=-1)
+        error += err[done].sum()
+
+        keep = ~done
+        if not keep.any():
+            break
+        lo, hi = (np.concatenate((lo[keep], mid[keep])),
+                  np.concatenate((mid[keep], hi[keep])))
+        f_lo, f_hi, f_mid = (
+            np.concatenate((f_lo[..., keep], f_mid[..., keep]), axis=-1),
+            np.concatenate((f_mid[..., keep], f_hi[..., keep]), axis=-1),
+            np.concatenate((f_left[..., keep], f_right[..., keep]), axis=-1))
+        whole = np.concatenate((left[..., keep], right[..., keep]), axis=-1)
+    return total, error, evaluations
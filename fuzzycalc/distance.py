@@ -0,0 +1,109 @@
+﻿# -*- coding: UTF-8 -*-
+
+'''
+Модуль реализует вычисление попарных расстояний между нечеткими
+подмножествами.
+
+Методы Subset.euclid_distance() и Subset.hamming_distance() сравнивают два
+подмножества. Для дедупликации и кластеризации большого числа экспертных
+оценок функция distance_matrix() строит матрицу расстояний сразу между
+всеми подмножествами: каждое подмножество дискретизируется один раз на общей
+сетке, а расстояния вычисляются блоками операций над массивами, так что
+объем промежуточных массивов ограничен.
+Синтаксис:
+    >>> A=Triangle(0.0, 1.0, 2.0)
+    >>> B=Triangle(0.0, 1.0, 2.0)
+    >>> C=Interval(0.0, 2.0)
+    >>> distance_matrix([A, B, C], metric='hamming')
+    array([[ 0. ,  0. ,  0.5],
+           [ 0. ,  0. ,  0.5],
+           [ 0.5,  0.5,  0. ]])
+'''
+
+from .common import current_precision
+from .domain import union
+
+import numpy as np
+
+# Наибольшее число элементов промежуточного массива при блочном вычислении.
+BLOCK_SIZE = 2**22
+
+
+def _grid(subsets):
+    '''
+    Возвращает общую сетку дискретизации для набора подмножеств: отрезок,
+    покрывающий носители всех подмножеств (см. domain.union).
+    '''
+    return union(*[sub.domain for sub in subsets]).grid()
+
+
+def _sample(subsets, grid):
+    '''
+    Возвращает матрицу значений функций принадлежности подмножеств subsets
+    в точках grid: строка i содержит значения i-го подмножества.
+    '''
+    res = np.empty((len(subsets), len(grid)),
+                   dtype=current_precision().dtype)
+    for i, sub in enumerate(subsets):
+        res[i] = sub.values_at(grid)
+    return res
+
+
+def distance_matrix(subsets, others=None, metric='euclid', block=BLOCK_SIZE):
+    '''
+    Возвращает матрицу расстояний между подмножествами subsets и others
+    размера N x M (при others=None - между всеми парами subsets, N x N).
+    Все подмножества дискретизируются на одной сетке, покрывающей их
+    носители, поэтому элементы матрицы приближают результаты
+    Subset.euclid_distance() и Subset.hamming_distance() с точностью,
+    определяемой шагом сетки.
+
+    Параметры:
+        metric
+            'euclid' - евклидово расстояние, 'hamming' - расстояние Хэмминга
+        block
+            наибольшее число элементов промежуточного массива; строки матрицы
+            (и при необходимости точки сетки) обрабатываются блоками такого
+            размера
+    '''
+    if others is None:
+        others = subsets
+    grid = _grid(list(subsets) + list(others))
+    acc = len(grid) - 1
+    a = _sample(subsets, grid)
+    b = a if others is subsets else _sample(others, grid)
+
+    res = np.empty((len(a), len(b)))
+    if metric == 'euclid':
+        # |a - b|^2 = |a|^2 + |b|^2 - 2ab: промежуточный массив занимает
+        # не больше памяти, чем сама матрица расстояний
+        sq_a = (a*a).sum(axis=1)
+        sq_b = (b*b).sum(axis=1)
+        step = max(block // max(len(b), 1), 1)
+        for i in range(0, len(a), step):
+            summ = sq_a[i:i+step, None] + sq_b[None, :] - \
+                   2*np.dot(a[i:i+step], b.T)
+            res[i:i+step] = np.sqrt(np.maximum(summ, 0.0)/acc)
+    elif metric == 'hamming':
+        # промежуточный массив step x M x width: при большом числе
+        # подмножеств M сетка разбивается на части, суммы по которым
+        # накапливаются в матрице расстояний
+        width = min(max(block // max(len(b), 1), 1), len(grid))
+        step = max(block // max(len(b)*width, 1), 1)
+        res[:] = 0.0
+        for i in range(0, len(a), step):
+            for j in range(0, len(grid), width):
+                diff = np.abs(a[i:i+step, None, j:j+width] -
+                              b[None, :, j:j+width])
+                res[i:i+step] += diff.sum(axis=2)
+        res /= acc
+    else:
+        raise ValueError('unknown metric: %s' % metric)
+    if others is subsets:
+        np.fill_diagonal(res, 0.0)
+    return res
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=False)
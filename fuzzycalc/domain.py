@@ -4,7 +4,32 @@
 реализующий функциональность нечетких правил логического вывода.
 '''
 
-from .common import ACCURACY
+from .common import current_precision
+
+from itertools import product
+
+import numpy as np
+
+# Кэш сеток дискретизации носителей, общий для всех носителей с одинаковыми
+# параметрами. При переполнении из него вытесняется произвольная сетка.
+GRID_CACHE_SIZE = 256
+_grids = {}
+
+
+def _cached_grid(key, build):
+    '''
+    Возвращает сетку из кэша по ключу key, при отсутствии строит ее вызовом
+    build(). Возвращаемый массив доступен только для чтения.
+    '''
+    try:
+        return _grids[key]
+    except KeyError:
+        grid = build()
+        grid.flags.writeable = False
+        if len(_grids) >= GRID_CACHE_SIZE:
+            _grids.popitem()
+        _grids[key] = grid
+        return grid
 
 
 class Domain(object):
@@ -16,6 +41,8 @@ class Domain(object):
         нечеткого множества можно задавать действительный интервал,
         целочисленный интервал, в принципе, любую итерируемую структуру.
     '''
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -45,6 +72,15 @@ class RationalRange(Domain):
     точностью и скоростью подсчета, поэтому там, где это возможно,
     численный расчет нечетких функционалов заменен аналитическими выражениями.
 
+    Точки дискретизации носителя (ровно acc + 1 точка, включая обе границы)
+    возвращает метод grid() в виде неизменяемого массива NumPy. Сетки
+    кэшируются: носители с одинаковыми параметрами разделяют один массив.
+    Функция len() возвращает количество точек сетки.
+
+    Если точность не задана (acc=None), она и тип элементов сетки берутся
+    из текущей политики точности (см. common.Precision) при каждом
+    обращении.
+
         Синтаксис:
 
             >>> B=RationalRange(begin=0.0, end=3.0, acc=3)
@@ -86,34 +122,66 @@ class RationalRange(Domain):
 
     '''
 
-    def __init__(self, begin=0.0, end=1.0, acc=ACCURACY):
+    __slots__ = ('begin', 'end', '_acc')
+
+    def __init__(self, begin=0.0, end=1.0, acc=None):
         super(RationalRange, self).__init__()
         self.begin = float(begin)
         self.end = float(end)
-        self.acc = acc
+        self._acc = acc
+
+    @property
+    def acc(self):
+        if self._acc is None:
+            return current_precision().acc
+        return self._acc
+
+    @acc.setter
+    def acc(self, value):
+        self._acc = value
+
+    def grid(self):
+        '''
+        Возвращает неизменяемый массив точек дискретизации носителя.
+        Синтаксис:
+            >>> RationalRange(begin=0.0, end=3.0, acc=3).grid()
+            array([ 0.,  1.,  2.,  3.])
+        '''
+        acc = self.acc
+        dtype = current_precision().dtype
+        return _cached_grid((RationalRange, self.begin, self.end, acc, dtype),
+                            lambda: np.linspace(self.begin, self.end,
+                                                acc + 1).astype(dtype))
 
     def __iter__(self):
-        if self.begin == self.end:
-            for i in range(self.acc):
-                yield self.begin
-        else:
-            delta = (self.end - self.begin) / (self.acc)
-            i = self.begin
-            while i <= self.end:
-                yield i
-                i += delta
+        return iter(self.grid().tolist())
 
     def card(self):
         return len(self)
 
     def __len__(self):
-        return self.end - self.begin
+        return len(self.grid())
 
     def __contains__(self, item):
         if item >= self.begin and item <= self.end:
             return True
         return False
 
+    def __reduce__(self):
+        return (RationalRange, (self.begin, self.end, self._acc))
+
+
+def union(*domains):
+    '''
+    Возвращает отрезок действительной оси, покрывающий носители domains.
+    Его точность - наибольшая из явно заданных точностей носителей; если
+    ни одна не задана, точность определяется текущей политикой.
+    '''
+    accs = [domain._acc for domain in domains if domain._acc is not None]
+    return RationalRange(min(domain.begin for domain in domains),
+                         max(domain.end for domain in domains),
+                         acc=max(accs) if accs else None)
+
 
 class IntegerRange(RationalRange):
     '''
@@ -146,6 +214,8 @@ class IntegerRange(RationalRange):
 
     '''
 
+    __slots__ = ()
+
     def __init__(self, begin=1, end=100):
         begin = int(begin)
         end = int(end)
@@ -154,10 +224,177 @@ class IntegerRange(RationalRange):
         self.begin = begin
         self.end = end
 
+    def grid(self):
+        dtype = current_precision().dtype
+        return _cached_grid((IntegerRange, self.begin, self.end, dtype),
+                            lambda: np.arange(self.begin, self.end + 1,
+                                              dtype=dtype))
+
     def __contains__(self, item):
-        if int(item) == item and self.begin <= item <= self.end:
+        return self.begin <= item <= self.end and item % 1 == 0
+
+    def __reduce__(self):
+        return (IntegerRange, (self.begin, self.end))
+
+
+class FiniteDomain(Domain):
+    '''
+    Конечный носитель, элементами которого являются произвольные хешируемые
+    метки (категории). Каждой метке сопоставлен ее порядковый номер, так что
+    нечеткие подмножества такого носителя (см. subset.Discrete) хранятся в
+    виде массивов, индексированных номерами меток.
+
+        Синтаксис:
+
+            >>> D=FiniteDomain(['red', 'green', 'blue'])
+            >>> D.index('green')
+            1
+            >>> 'blue' in D
+            True
+            >>> len(D)
+            3
+
+        Attributes:
+            labels
+
+    '''
+
+    __slots__ = ('labels', '_index')
+
+    def __init__(self, labels):
+        super(FiniteDomain, self).__init__()
+        self.labels = tuple(labels)
+        self._index = dict((label, i) for i, label in enumerate(self.labels))
+        if len(self._index) != len(self.labels):
+            raise ValueError('duplicate labels')
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def card(self):
+        return len(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, item):
+        try:
+            return item in self._index
+        except TypeError:
+            return False
+
+    def index(self, label):
+        '''
+        Возвращает номер метки label. Для отсутствующей метки возбуждает
+        KeyError.
+        '''
+        return self._index[label]
+
+    def indices(self, labels):
+        '''
+        Возвращает массив номеров меток labels; отсутствующим меткам
+        соответствует -1.
+        '''
+        get = self._index.get
+        return np.array([get(label, -1) for label in labels], dtype=np.intp)
+
+    def __eq__(self, other):
+        if self is other:
             return True
-        return False
+        if not isinstance(other, FiniteDomain):
+            return NotImplemented
+        return self.labels == other.labels
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.labels)
+
+    def __reduce__(self):
+        return (FiniteDomain, (self.labels,))
+
+
+class ProductDomain(Domain):
+    '''
+    Декартово произведение двух и более носителей. Служит носителем
+    нечетких отношений (см. relation.Relation). Элементами носителя являются
+    кортежи элементов сомножителей; непрерывные сомножители представлены
+    точками своих сеток.
+
+        Синтаксис:
+
+            >>> D=ProductDomain(FiniteDomain(['a', 'b']),
+            ...                 RationalRange(0.0, 1.0, acc=2))
+            >>> D.shape
+            (2, 3)
+            >>> list(D)[:2]
+            [('a', 0.0), ('a', 0.5)]
+
+        Attributes:
+            domains
+
+    '''
+
+    __slots__ = ('domains',)
+
+    def __init__(self, *domains):
+        super(ProductDomain, self).__init__()
+        if len(domains) < 2:
+            raise ValueError('at least two domains expected')
+        self.domains = tuple(domains)
+
+    def __reduce__(self):
+        return (ProductDomain, self.domains)
+
+    @property
+    def shape(self):
+        return tuple(len(domain) for domain in self.domains)
+
+    def axis(self, i):
+        '''
+        Возвращает элементы i-го сомножителя: кортеж меток конечного
+        носителя или список точек сетки непрерывного.
+        '''
+        domain = self.domains[i]
+        if isinstance(domain, FiniteDomain):
+            return domain.labels
+        return domain.grid().tolist()
+
+    def index(self, item):
+        '''
+        Возвращает кортеж номеров элементов сомножителей для кортежа item.
+        Элемент непрерывного сомножителя сопоставляется ближайшей точке
+        сетки.
+        '''
+        if item not in self:
+            raise KeyError(item)
+        res = []
+        for domain, x in zip(self.domains, item):
+            if isinstance(domain, FiniteDomain):
+                res.append(domain.index(x))
+            else:
+                res.append(int(np.abs(domain.grid() - x).argmin()))
+        return tuple(res)
+
+    def __iter__(self):
+        return product(*[self.axis(i) for i in range(len(self.domains))])
+
+    def card(self):
+        return len(self)
+
+    def __len__(self):
+        res = 1
+        for n in self.shape:
+            res *= n
+        return res
+
+    def __contains__(self, item):
+        try:
+            return len(item) == len(self.domains) and \
+                   all(x in domain for domain, x in zip(self.domains, item))
+        except TypeError:
+            return False
 
 if __name__ == "__main__":
     import doctest
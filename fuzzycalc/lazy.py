@@ -0,0 +1,199 @@
+# -*- coding: UTF-8 -*-
+
+'''
+Модуль реализует отложенные (ленивые) вычисления в алгебре нечетких
+подмножеств.
+
+Обычные операции над подмножествами (A + B, A & B, ~A, A ** 2 и т.д.)
+немедленно строят новое подмножество на сетке носителя. В цепочке операций
+это приводит к созданию и интерполяции нескольких промежуточных результатов.
+Подмножество, обернутое функцией lazy(), вместо этого строит граф выражения
+(DAG), который вычисляется только при запросе значения функции
+принадлежности или нечеткого функционала. Вычисление выполняется за один
+векторный проход по точкам сетки, а совпадающие подвыражения вычисляются
+однократно.
+Синтаксис:
+    >>> A=Triangle(0.0, 1.0, 2.0)
+    >>> B=Triangle(0.5, 1.5, 2.5)
+    >>> C=Trapezoidal((1.0, 1.5, 2.0, 3.0))
+    >>> E=(lazy(A) & B) | ~lazy(C)
+    >>> round(E.centr(), 3)
+    1.884
+'''
+
+from .common import current_precision
+from .subset import Subset, PiecewiseLinear
+from .domain import RationalRange, union
+
+import numpy as np
+
+
+def lazy(sub):
+    '''
+    Возвращает подмножество sub в виде листа графа отложенных вычислений.
+    Операции над результатом строят граф выражения вместо немедленного
+    вычисления.
+    '''
+    if isinstance(sub, Expression):
+        return sub
+    return Expression('leaf', (sub,), sub.domain)
+
+
+# Бинарные операции алгебры нечетких подмножеств. Результат каждой из них
+# ограничивается отрезком [0, 1], как и в SubsetAlgebra.
+_OPERATIONS = {
+    'add': np.add,
+    'sub': np.subtract,
+    'mul': np.multiply,
+    'and': np.minimum,
+    'or': np.maximum,
+}
+
+
+class Expression(Subset):
+    '''
+    Узел графа отложенных вычислений над нечеткими подмножествами. Является
+    нечетким подмножеством, поэтому поддерживает весь интерфейс Subset.
+    Значение выражения в наборе точек вычисляется методом values_at()
+    за один проход по графу; нечеткие функционалы вычисляются по
+    результату, построенному на сетке носителя при первом обращении к ним
+    (см. evaluate()).
+
+    Attributes:
+        op
+            вид операции: 'leaf', 'add', 'sub', 'mul', 'and', 'or',
+            'neg' или 'pow'
+        args
+            операнды узла
+        param
+            показатель степени для операции 'pow'
+        domain
+        key
+            структурный ключ выражения, по которому совпадающие
+            подвыражения вычисляются однократно
+    '''
+
+    __slots__ = ('op', 'args', 'param', 'key', '_result')
+
+    def __init__(self, op, args, domain, param=None):
+        # Словари values и points базового класса не создаются: значения
+        # узла определяются операндами.
+        self.op = op
+        self.args = tuple(args)
+        self.param = param
+        self.domain = domain
+        self.points = {}
+        self._result = None
+
+        if op == 'leaf':
+            self.key = ('leaf', id(args[0]))
+        else:
+            self.key = (op, param) + tuple(arg.key for arg in self.args)
+
+    @property
+    def values(self):
+        return self.evaluate().values
+
+    def value(self, key):
+        res = self.values_at(key)
+        if res.ndim == 0:
+            return float(res)
+        return res
+
+    def values_at(self, xs):
+        return self._evaluate(np.asarray(xs, dtype=float), {})
+
+    def _evaluate(self, x, memo):
+        '''
+        Вычисляет значение выражения в точках x. Результаты вычисления
+        подвыражений сохраняются в memo по их структурным ключам.
+        '''
+        try:
+            return memo[self.key]
+        except KeyError:
+            pass
+        if self.op == 'leaf':
+            res = self.args[0].values_at(x)
+        else:
+            args = [arg._evaluate(x, memo) for arg in self.args]
+            if self.op == 'neg':
+                res = 1 - args[0]
+            elif self.op == 'pow':
+                res = np.minimum(args[0]**self.param, 1)
+            else:
+                res = np.clip(_OPERATIONS[self.op](*args), 0, 1)
+            res = np.where((x >= self.domain.begin) & (x <= self.domain.end),
+                           res, 0.0)
+        memo[self.key] = res
+        return res
+
+    def evaluate(self):
+        '''
+        Вычисляет выражение на сетке носителя и возвращает результат в виде
+        кусочно-линейного нечеткого подмножества. Результат сохраняется в
+        узле вместе с параметрами сетки, политикой точности и версиями
+        листьев, при которых он вычислен, и пересчитывается при их
+        изменении.
+        '''
+        if self.op == 'leaf':
+            return self.args[0]
+        key = (self.domain.begin, self.domain.end, self.domain.acc,
+               current_precision().key(), self._stamp())
+        if self._result is None or self._result[0] != key:
+            grid = self.domain.grid()
+            self._result = (key, PiecewiseLinear(grid, self.values_at(grid),
+                                                 domain=self.domain))
+        return self._result[1]
+
+    def _stamp(self):
+        # версия выражения - версии его листьев
+        if self.op == 'leaf':
+            return (id(self.args[0]), self.args[0]._stamp())
+        return tuple(arg._stamp() for arg in self.args)
+
+    def _breakpoints(self):
+        return self.evaluate()._breakpoints()
+
+    def __setitem__(self, key, value):
+        raise TypeError('lazy expressions are immutable')
+
+    def __reduce__(self):
+        # ключ листа содержит id операнда, поэтому узел восстанавливается
+        # конструктором, а не по значениям слотов
+        return (Expression, (self.op, self.args, self.domain, self.param))
+
+    def _binary(self, other, op):
+        if isinstance(other, float) or isinstance(other, int):
+            raise NotImplementedError
+        other = lazy(other)
+        return Expression(op, (self, other), union(self.domain, other.domain))
+
+    def __add__(self, other):
+        return self._binary(other, 'add')
+
+    def __sub__(self, other):
+        return self._binary(other, 'sub')
+
+    def __mul__(self, other):
+        return self._binary(other, 'mul')
+
+    def __and__(self, other):
+        return self._binary(other, 'and')
+
+    def __or__(self, other):
+        return self._binary(other, 'or')
+
+    def __pow__(self, other):
+        if not(isinstance(other, float) or isinstance(other, int)):
+            raise NotImplementedError
+        return Expression('pow', (self,),
+                          RationalRange(self.domain.begin, self.domain.end),
+                          param=other)
+
+    def __neg__(self):
+        return Expression('neg', (self,), self.domain)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=False)
@@ -6,35 +6,709 @@
     - описание
 '''
 
-from .subset import Subset
-from math import tanh, log, pi, cos, exp, cosh
-
-LINE = lambda c: lambda a, b: lambda x: abs((x-b)/(a-b))**c
-LINES = lambda c: lambda a, b: lambda x: abs((x-b)/(a-b)) ** \
-                        log(0.5, ((c-b)/(a-b)))
-QUAD = lambda c: lambda a, b: lambda x: abs(1-((x-a)/abs(b-a))**2)**c
-QUADS = lambda c: lambda a, b: lambda x: abs(1-((x-a)/abs(b-a))**2) ** \
-                        log(0.5, (1-((c-a)/abs(b-a))**2))
-LAPL = lambda c: lambda a, b: lambda x: exp(-abs(x-a)*c/abs(b-a))
-LAPLS = lambda c: lambda a, b: lambda x: exp(abs(x-a)*log(0.5)/abs(c-a))
-TANG = lambda c: lambda a, b: lambda x: (1+tanh(-((x-a)/(abs(b-a)/c))**2))
-GAUS = lambda c: lambda a, b: lambda x: (exp(-((x-a)**2)/c**2))
-CAUC = lambda c: lambda a, b: lambda x: (1/(1+((x-a)*c/abs(b-a))**2))
-LOGI = lambda c: lambda a, b: lambda x: (2/(1+exp(((x-a)*c/abs(b-a))**2)))
-SECG = lambda c: lambda a, b: lambda x: (1/cosh((x-a)/(b-a)))
-TANGS = lambda c: lambda a, b: lambda x: (1+tanh(-((x-a)/abs(b-a))**2)) ** \
-                        log(0.5, (1+tanh(-((c-a)/abs(b-a))**2)))
-GAUSS = lambda c: lambda a, b: lambda x: exp(((x-a)**2)*log(0.5) / ((c-a)**2))
-CAUCS = lambda c: lambda a, b: lambda x: (1/ (1+ ((x-a) / (c-a))**2))
-LOGIS = lambda c: lambda a, b: lambda x: (2/(1+exp(((x-a)/abs(b-a))**2))) ** \
-                        log(0.5, ((2/(1+exp(((c-a)/abs(b-a))**2)))))
-SECGS = lambda c: lambda a, b: lambda x: (1/cosh((x-a)/abs(b-a))) ** \
-                        log(0.5, (1/cosh((c-a)/abs(b-a))))
-COSS = lambda c: lambda a, b: lambda x: ((1+cos(pi*(x-a)/abs(b-a)))/2) ** \
-                        log(0.5, ((1+cos(pi*(c-a)/abs(b-a)))/2))
-POINT = lambda a, b: lambda x: 1
-
-class TrapExt(Subset):
+from .subset import Subset, SubsetAlgebra
+from .domain import RationalRange
+from .common import current_precision, get_slots, set_slots
+from itertools import product
+from math import log, pi, sqrt, exp, tanh, atan, erf, gamma
+import numpy as np
+
+class Shape(object):
+    '''
+    Форма ската нечеткого числа. Экземпляр хранит параметр формы c и
+    вызывается с двумя точками: a - граница интервала толерантности (уровень
+    1) и b - граница носителя. Результат - скат (Slope), функция
+    принадлежности которого вычисляется сразу для массива точек.
+
+    Функция принадлежности ската имеет вид f(k*u)**p, где u = |x-a|/|b-a| -
+    относительное расстояние от точки a, f - профиль формы, а постоянные k
+    (масштаб) и p (показатель) вычисляются один раз при построении ската.
+    Если профиль обратим, скат имеет точное обратное отображение (границы
+    альфа-срезов), а если интеграл профиля выражается аналитически - точную
+    площадь под скатом.
+    '''
+
+    __slots__ = ('c',)
+
+    def __init__(self, c=1.0):
+        self.c = float(c)
+
+    def __call__(self, a, b):
+        return Slope(self, a, b)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.c == other.c
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.c))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.c)
+
+    def __reduce__(self):
+        return (type(self), (self.c,))
+
+    def constants(self, a, b):
+        '''
+        Возвращает постоянные (k, p) ската с границами a и b.
+        '''
+        return 1.0, 1.0
+
+    def profile(self, t):
+        raise NotImplementedError
+
+    def inverse(self, v):
+        '''
+        Возвращает t, при котором профиль равен v, или None, если профиль
+        не обратим аналитически.
+        '''
+        return None
+
+    def area(self, k, p):
+        '''
+        Возвращает интеграл f(k*u)**p по u от 0 до 1 или None, если он не
+        выражается аналитически.
+        '''
+        return None
+
+
+class _HalfShape(Shape):
+    '''
+    Форма, параметр c которой - точка ската с уровнем принадлежности 0.5.
+    Показатель p подбирается так, чтобы профиль в этой точке равнялся 0.5.
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return 1.0, log(0.5, self.profile(abs(self.c-a)/abs(b-a)))
+
+
+class Slope(object):
+    '''
+    Скат формы shape между точкой a (уровень 1) и точкой b (граница
+    носителя). Вызывается как функция принадлежности.
+    '''
+
+    __slots__ = ('shape', 'a', 'b', 'k', 'p')
+
+    def __init__(self, shape, a, b):
+        self.shape = shape
+        self.a = float(a)
+        self.b = float(b)
+        self.k, self.p = shape.constants(self.a, self.b)
+
+    def __reduce__(self):
+        return (Slope, (self.shape, self.a, self.b))
+
+    def __call__(self, x):
+        # у вырожденного ската (POINT) ширина нулевая
+        width = abs(self.b-self.a) or 1.0
+        u = np.abs(np.asarray(x, dtype=float) - self.a) / width
+        res = self.shape.profile(self.k*u)
+        if self.p != 1.0:
+            res = res**self.p
+        return res
+
+    def inverse(self, levels):
+        '''
+        Возвращает ближайшие к a точки ската, в которых функция
+        принадлежности достигает уровней levels, или None, если профиль
+        формы не обратим аналитически.
+        '''
+        levels = np.asarray(levels, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = self.shape.inverse(levels**(1.0/self.p))
+            if t is None:
+                return None
+            u = t/self.k
+        u = np.where(np.isnan(u), 1.0, np.minimum(np.maximum(u, 0.0), 1.0))
+        return self.a + (self.b-self.a)*u
+
+    def integral(self):
+        '''
+        Возвращает площадь под скатом или None, если она не выражается
+        аналитически.
+        '''
+        area = self.shape.area(self.k, self.p)
+        if area is None:
+            return None
+        return area*abs(self.b-self.a)
+
+
+class Line(Shape):
+    '''
+    Степенной скат (1-u)**c; при c=1 - линейный.
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return 1.0, self.c
+
+    def profile(self, t):
+        return np.abs(1-t)
+
+    def inverse(self, v):
+        return 1-v
+
+    def area(self, k, p):
+        return 1/(p+1)
+
+
+class LineS(_HalfShape, Line):
+    __slots__ = ()
+
+
+class Quad(Shape):
+    '''
+    Квадратический (параболический, полукруговой) скат (1-u**2)**c.
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return 1.0, self.c
+
+    def profile(self, t):
+        return np.abs(1-t**2)
+
+    def inverse(self, v):
+        return np.sqrt(1-v)
+
+    def area(self, k, p):
+        return sqrt(pi)*gamma(p+1)/gamma(p+1.5)/2
+
+
+class QuadS(_HalfShape, Quad):
+    __slots__ = ()
+
+
+class Laplace(Shape):
+    '''
+    Скат в виде лапласианы exp(-c*u).
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return self.c, 1.0
+
+    def profile(self, t):
+        return np.exp(-t)
+
+    def inverse(self, v):
+        return -np.log(v)
+
+    def area(self, k, p):
+        if p != 1.0:
+            return None
+        return (1-exp(-k))/k
+
+
+class LaplaceS(Laplace):
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return abs(b-a)*log(2)/abs(self.c-a), 1.0
+
+
+class Tang(Shape):
+    '''
+    Тангенсоида 1+tanh(-(c*u)**2).
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return self.c, 1.0
+
+    def profile(self, t):
+        return 1+np.tanh(-t**2)
+
+    def inverse(self, v):
+        return np.sqrt(np.arctanh(1-v))
+
+
+class TangS(_HalfShape, Tang):
+    __slots__ = ()
+
+
+class Gauss(Shape):
+    '''
+    Гауссиана exp(-(x-a)**2/c**2).
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return abs(b-a)/self.c, 1.0
+
+    def profile(self, t):
+        return np.exp(-t**2)
+
+    def inverse(self, v):
+        return np.sqrt(-np.log(v))
+
+    def area(self, k, p):
+        if p != 1.0:
+            return None
+        return sqrt(pi)*erf(k)/(2*k)
+
+
+class GaussS(Gauss):
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return abs(b-a)*sqrt(log(2))/abs(self.c-a), 1.0
+
+
+class Cauchy(Shape):
+    '''
+    Скат в виде распределения Коши 1/(1+(c*u)**2).
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return self.c, 1.0
+
+    def profile(self, t):
+        return 1/(1+t**2)
+
+    def inverse(self, v):
+        return np.sqrt(1/v-1)
+
+    def area(self, k, p):
+        if p != 1.0:
+            return None
+        return atan(k)/k
+
+
+class CauchyS(Cauchy):
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return abs(b-a)/abs(self.c-a), 1.0
+
+
+class Logistic(Shape):
+    '''
+    Логистическая кривая 2/(1+exp((c*u)**2)).
+    '''
+
+    __slots__ = ()
+
+    def constants(self, a, b):
+        return self.c, 1.0
+
+    def profile(self, t):
+        return 2/(1+np.exp(t**2))
+
+    def inverse(self, v):
+        return np.sqrt(np.log(2/v-1))
+
+
+class LogisticS(_HalfShape, Logistic):
+    __slots__ = ()
+
+
+class Secant(Shape):
+    '''
+    Скат в виде гиперболического секанса 1/cosh(u).
+    '''
+
+    __slots__ = ()
+
+    def profile(self, t):
+        return 1/np.cosh(t)
+
+    def inverse(self, v):
+        return np.arccosh(1/v)
+
+    def area(self, k, p):
+        if p != 1.0:
+            return None
+        return 2*atan(tanh(k/2))/k
+
+
+class SecantS(_HalfShape, Secant):
+    __slots__ = ()
+
+
+class CosineS(_HalfShape):
+    '''
+    Косинусоидальный скат ((1+cos(pi*u))/2)**p.
+    '''
+
+    __slots__ = ()
+
+    def profile(self, t):
+        return (1+np.cos(pi*t))/2
+
+    def inverse(self, v):
+        return np.arccos(2*v-1)/pi
+
+    def area(self, k, p):
+        return gamma(p+0.5)/gamma(p+1)/sqrt(pi)
+
+
+class Degenerate(Shape):
+    '''
+    Вырожденный скат: граница интервала толерантности совпадает с границей
+    носителя.
+    '''
+
+    __slots__ = ()
+
+    def profile(self, t):
+        return np.ones(np.shape(t))
+
+    def inverse(self, v):
+        return np.zeros(np.shape(v))
+
+    def area(self, k, p):
+        return 0.0
+
+
+# Имена форм скатов, принятые в библиотеке: LINE(c)(a, b) - скат формы
+# Line с параметром c между точками a и b.
+LINE, LINES = Line, LineS
+QUAD, QUADS = Quad, QuadS
+LAPL, LAPLS = Laplace, LaplaceS
+TANG, TANGS = Tang, TangS
+GAUS, GAUSS = Gauss, GaussS
+CAUC, CAUCS = Cauchy, CauchyS
+LOGI, LOGIS = Logistic, LogisticS
+SECG, SECGS = Secant, SecantS
+COSS = CosineS
+POINT = Degenerate()
+
+# Число альфа-уровней, на которых вычисляется результат принципа обобщения,
+# и число точек внутри каждого альфа-среза при поиске экстремумов
+# немонотонной функции.
+ALPHA_LEVELS = 65
+SAMPLES = 17
+# Наибольшее число значений функции, вычисляемых за один вызов при поиске
+# экстремумов немонотонной функции на сетке.
+BLOCK_SIZE = 2**20
+
+def _inverse(skat, a, b, levels, steps=60):
+    '''
+    Для монотонной функции ската skat, возрастающей от точки a к точке b,
+    возвращает ближайшие к a точки отрезка, в которых skat достигает
+    уровней levels. Вычисляется делением отрезка пополам сразу для всего
+    массива уровней.
+    '''
+    near = np.full(levels.shape, float(a))
+    far = np.full(levels.shape, float(b))
+    for _ in range(steps):
+        mid = (near+far)/2
+        reached = skat(mid) >= levels
+        far = np.where(reached, mid, far)
+        near = np.where(reached, near, mid)
+    return far
+
+
+def _slope_inverse(skat, a, b, levels):
+    '''
+    Возвращает границы альфа-срезов уровней levels на скате skat,
+    возрастающем от точки a к точке b: точно, если скат задан формой
+    библиотеки (см. Slope.inverse), иначе - делением отрезка пополам.
+    '''
+    res = None
+    if isinstance(skat, Slope):
+        res = skat.inverse(levels)
+    if res is None:
+        res = _inverse(skat, a, b, levels)
+    return res
+
+
+def _levels(levels):
+    '''
+    Возвращает возрастающий массив альфа-уровней от 0 до 1: равномерную
+    сетку из levels уровней, если levels - число. Уровни 0 (носитель) и 1
+    (ядро) включаются всегда.
+    '''
+    if np.ndim(levels) == 0:
+        levels = np.linspace(0.0, 1.0, max(int(levels), 2))
+    levels = np.clip(np.asarray(levels, dtype=float), 0.0, 1.0)
+    return np.union1d(levels, [0.0, 1.0])
+
+
+def _nested(lo, hi):
+    '''
+    Делает альфа-срезы вложенными: срез более высокого уровня не выходит за
+    границы срезов более низких уровней.
+    '''
+    lo = np.minimum.accumulate(lo[::-1])[::-1]
+    hi = np.maximum.accumulate(hi[::-1])[::-1]
+    return lo, hi
+
+
+class NumbersAlgebra(SubsetAlgebra):
+    '''
+    Арифметика нечетких чисел. Операции выполняются над границами
+    альфа-срезов операндов (интервальная арифметика сразу для всех уровней),
+    а результат - AlphaCutNumber. Поэтому стоимость вычисления функции
+    принадлежности результата не зависит от длины цепочки операций.
+    Пересечение и объединение (min/max) наследуются от SubsetAlgebra.
+    '''
+
+    def _operands(self, one, other):
+        '''
+        Приводит операнды к AlphaCutNumber на общем наборе уровней.
+        '''
+        if isinstance(one, AlphaCutNumber):
+            levels = one.levels
+        elif isinstance(other, AlphaCutNumber):
+            levels = other.levels
+        else:
+            levels = _levels(ALPHA_LEVELS)
+        if isinstance(one, AlphaCutNumber) and \
+           isinstance(other, AlphaCutNumber) and \
+           not np.array_equal(one.levels, other.levels):
+            levels = np.union1d(one.levels, other.levels)
+        return (AlphaCutNumber.from_subset(one, levels),
+                AlphaCutNumber.from_subset(other, levels))
+
+    def __add__(self, one, other):
+        one, other = self._operands(one, other)
+        return AlphaCutNumber(one.levels, one.lo + other.lo,
+                              one.hi + other.hi)
+
+    def __sub__(self, one, other):
+        one, other = self._operands(one, other)
+        return AlphaCutNumber(one.levels, one.lo - other.hi,
+                              one.hi - other.lo)
+
+    def __mul__(self, one, other):
+        one, other = self._operands(one, other)
+        corners = np.array([one.lo*other.lo, one.lo*other.hi,
+                            one.hi*other.lo, one.hi*other.hi])
+        return AlphaCutNumber(one.levels, corners.min(axis=0),
+                              corners.max(axis=0))
+
+    def __div__(self, one, other):
+        one, other = self._operands(one, other)
+        if np.any((other.lo <= 0) & (other.hi >= 0)):
+            raise ZeroDivisionError('divisor support contains zero')
+        inverse = AlphaCutNumber(other.levels, 1.0/other.hi, 1.0/other.lo)
+        return self.__mul__(one, inverse)
+
+    def __pow__(self, one, other):
+        if not(isinstance(other, float) or isinstance(other, int)):
+            raise NotImplementedError
+        return extend(lambda x: x**other, one)
+
+
+class FuzzyNumber(Subset):
+    '''
+    Базовый класс нечетких чисел. Арифметические операции над нечеткими
+    числами (в том числе с четкими числами в качестве левого операнда)
+    выполняются по принципу обобщения (см. NumbersAlgebra).
+    '''
+
+    __slots__ = ()
+
+    _algebra = NumbersAlgebra()
+
+    def __truediv__(self, other):
+        return self.__div__(other)
+
+    def __radd__(self, other):
+        return self._algebra.__add__(other, self)
+
+    def __rsub__(self, other):
+        return self._algebra.__sub__(other, self)
+
+    def __rmul__(self, other):
+        return self._algebra.__mul__(other, self)
+
+    def __rdiv__(self, other):
+        return self._algebra.__div__(other, self)
+
+    def __rtruediv__(self, other):
+        return self._algebra.__div__(other, self)
+
+
+class AlphaCutNumber(FuzzyNumber):
+    '''
+    Нечеткое число, заданное границами альфа-срезов на фиксированном наборе
+    уровней. Между уровнями границы срезов интерполируются линейно, так что
+    функция принадлежности кусочно-линейна и вычисляется двоичным поиском
+    по массивам границ. Такой вид имеют результаты арифметических операций
+    над нечеткими числами и принципа обобщения (см. extend).
+    Синтаксис:
+        >>> A=TrFN(1.0, 2.0, 3.0, 4.0)
+        >>> B=TrFN(0.0, 1.0, 1.0, 2.0)
+        >>> C=A+B
+        >>> C.level(0.5).domain.begin, C.level(0.5).domain.end
+        (2.0, 5.0)
+        >>> (2*A)[3.0]
+        0.5
+
+    Параметры:
+        levels
+            возрастающий массив альфа-уровней от 0 до 1
+        lo, hi
+            левые и правые границы срезов соответствующих уровней
+
+    Attributes:
+        levels
+        lo
+        hi
+        domain
+            носитель числа (срез уровня 0)
+    '''
+
+    __slots__ = ('levels', 'lo', 'hi')
+
+    def __init__(self, levels, lo, hi):
+        dtype = current_precision().dtype
+        self.levels = np.asarray(levels, dtype=float)
+        self.lo, self.hi = _nested(np.asarray(lo, dtype=dtype),
+                                   np.asarray(hi, dtype=dtype))
+        self.domain = RationalRange(self.lo[0], self.hi[0])
+        self.points = {}
+
+    @classmethod
+    def from_subset(cls, subset, levels=ALPHA_LEVELS):
+        '''
+        Представляет нечеткое подмножество (или четкое число) границами его
+        альфа-срезов на уровнях levels.
+        '''
+        levels = _levels(levels)
+        if isinstance(subset, AlphaCutNumber) and \
+           np.array_equal(subset.levels, levels):
+            return subset
+        if isinstance(subset, Subset):
+            lo, hi = subset.alpha_cuts(levels)
+        else:
+            lo = hi = np.full(levels.shape, float(subset))
+        return cls(levels, lo, hi)
+
+    @property
+    def values(self):
+        xs, ys = self._breakpoints()
+        return dict(zip(xs.tolist(), ys.tolist()))
+
+    def value(self, key):
+        res = self.values_at(key)
+        if res.ndim == 0:
+            return float(res)
+        return res
+
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        left = np.interp(x, self.lo, self.levels, left=0.0, right=1.0)
+        right = np.interp(x, self.hi[::-1], self.levels[::-1],
+                          left=1.0, right=0.0)
+        res = np.minimum(left, right)
+        return np.where((x >= self.lo[0]) & (x <= self.hi[0]), res, 0.0)
+
+    def _breakpoints(self):
+        return (np.concatenate((self.lo, self.hi[::-1])),
+                np.concatenate((self.levels, self.levels[::-1])))
+
+    def alpha_cuts(self, levels):
+        levels = np.asarray(levels, dtype=float)
+        lvl = np.maximum(levels, 0.0)
+        lo = np.interp(lvl, self.levels, self.lo)
+        hi = np.interp(lvl, self.levels, self.hi)
+        empty = levels > 1
+        return np.where(empty, np.nan, lo), np.where(empty, np.nan, hi)
+
+    def __setitem__(self, key, value):
+        raise TypeError('alpha-cut numbers are immutable')
+
+
+def extend(f, *numbers, **kwargs):
+    '''
+    Применяет четкую функцию f(x1, ..., xn) к нечетким числам numbers по
+    принципу обобщения Заде. Альфа-срезы аргументов вычисляются сразу для
+    всех уровней, и для каждого уровня находится интервал значений f на
+    декартовом произведении срезов аргументов. Функция f должна принимать
+    массивы NumPy и вычисляться поэлементно. Вместо нечеткого числа можно
+    передать четкое число.
+    Синтаксис:
+        >>> A=TrFN(1.0, 2.0, 2.0, 3.0)
+        >>> B=TrFN(0.0, 1.0, 2.0, 3.0)
+        >>> C=extend(lambda x, y: x*x + y, A, B, monotone=True)
+        >>> C.level(1.0).domain.begin, C.level(1.0).domain.end
+        (5.0, 6.0)
+
+    Параметры:
+        levels
+            число альфа-уровней или массив уровней (по умолчанию
+            ALPHA_LEVELS)
+        monotone
+            f монотонна по каждому аргументу на срезах. Тогда экстремумы
+            достигаются в вершинах (метод вершин), и f вычисляется в 2^n
+            точках на уровень. Иначе f вычисляется на сетке из samples точек
+            по каждому аргументу среза (вершины входят в сетку). Такой
+            результат приближенный: экстремумы ищутся только в точках
+            сетки, и экстремумы внутри ее ячеек могут быть пропущены, так
+            что срезы результата могут оказаться уже точных.
+        samples
+            число точек сетки на срез каждого аргумента (по умолчанию
+            SAMPLES)
+        block
+            наибольшее число значений f, вычисляемых за один вызов (по
+            умолчанию BLOCK_SIZE). Сетка из samples^n точек перебирается
+            частями такого размера, поэтому объем памяти не растет с числом
+            аргументов n.
+
+    Результат - нечеткое число AlphaCutNumber, заданное границами
+    альфа-срезов; объем вычислений определяется числом уровней и не зависит
+    от точности сетки носителя.
+    '''
+    levels = _levels(kwargs.pop('levels', ALPHA_LEVELS))
+    monotone = kwargs.pop('monotone', False)
+    samples = kwargs.pop('samples', SAMPLES)
+    block = kwargs.pop('block', BLOCK_SIZE)
+    if kwargs:
+        raise TypeError('unexpected keyword arguments: %s' %
+                        ', '.join(sorted(kwargs)))
+
+    cuts = []
+    for number in numbers:
+        if isinstance(number, Subset):
+            cuts.append(number.alpha_cuts(levels))
+        else:
+            point = np.full(levels.shape, float(number))
+            cuts.append((point, point))
+
+    dtype = current_precision().dtype
+    if monotone:
+        values = np.array([f(*corner) for corner in product(*cuts)],
+                          dtype=dtype)
+        lo, hi = values.min(axis=0), values.max(axis=0)
+    else:
+        # точки сетки samples^n нумеруются подряд и перебираются частями:
+        # каждый аргумент - массив формы (уровни, часть), а минимум и
+        # максимум накапливаются по частям
+        steps = np.linspace(0.0, 1.0, samples)
+        size = samples**len(cuts)
+        step = max(block // len(levels), 1)
+        lo = np.full(len(levels), np.inf, dtype=dtype)
+        hi = np.full(len(levels), -np.inf, dtype=dtype)
+        for start in range(0, size, step):
+            index = np.unravel_index(np.arange(start, min(start+step, size)),
+                                     [samples]*len(cuts))
+            args = [a[:, None] + (b-a)[:, None]*steps[i]
+                    for (a, b), i in zip(cuts, index)]
+            values = np.asarray(f(*args), dtype=dtype)
+            values = np.broadcast_to(values, (len(levels), len(index[0])))
+            lo = np.minimum(lo, values.min(axis=1))
+            hi = np.maximum(hi, values.max(axis=1))
+    return AlphaCutNumber(levels, lo, hi)
+
+
+class TrapExt(FuzzyNumber):
     '''
     Нечеткие числа в обобщенно-трапециевидной форме.
     Синтаксис:
@@ -47,28 +721,33 @@ class TrapExt(Subset):
 
     Первые 4 параметра аналогичны параметрам конструктора трапециевидных
     нечетких чисел (см. Trapezoidal). Два последних определяют форму функций
-    скатов - левого и правого. Для этого используется ряд лямбда-выражений,
-    включенных в настоящую библиотеку. При их использовании следует
-    указать параметр функции - число, характеризующее степень плавности ската.
-    Функцию каждого ската выбирает пользователь из следующих альтернатив:
+    скатов - левого и правого (см. Shape). При их использовании следует
+    указать параметр формы - число, характеризующее степень плавности ската.
+    Форму каждого ската выбирает пользователь из следующих альтернатив:
         LINE
             линейный (степенной) скат
-        quad
+        QUAD
             квадратический (параболический, полукруговой) скат
-        lapl
+        LAPL
             скат в виде лаплассианы
-        tang
+        TANG
             тангенсоида
-        gaus
+        GAUS
             гауссиана
-        cauc
+        CAUC
             скат в виде распределения Коши
-        logi
+        LOGI
             логистическая кривая
-        secg
+        SECG
             скат в виде гиперболического секанса
+    Для форм с суффиксом S (LINES, QUADS, ..., COSS) параметр - точка
+    ската, в которой принадлежность равна 0.5. Вместо формы можно передать
+    функцию f(a, b), возвращающую функцию ската; тогда альфа-срезы находятся
+    численно.
     '''
 
+    __slots__ = ('left', 'right', 'l_skat', 'r_skat')
+
     def __init__(self, points=(0.0, 1.0, 2.0, 3.0),
                        left=LINE(1),
                        right=LINE(1)):
@@ -81,17 +760,23 @@ class TrapExt(Subset):
         self.points["begin_tol"] = begin_tol
         self.points["end_tol"] = end_tol
         self.points["end"] = end
+        if begin == begin_tol:
+            left = POINT
+        if end == end_tol:
+            right = POINT
         self.left = left
         self.right = right
         self.l_skat = left(self.points["begin_tol"], self.points["begin"])
         self.r_skat = right(self.points["end_tol"], self.points["end"])
 
-        if begin == begin_tol:
-            self.left = POINT
-            self.l_skat = POINT(self.points["begin_tol"], self.points["begin"])
-        if end == end_tol:
-            self.right = POINT
-            self.r_skat = POINT(self.points["end_tol"], self.points["end"])
+    def __getstate__(self):
+        # скаты восстанавливаются по формам left и right
+        return get_slots(self, skip=('_cache', 'l_skat', 'r_skat'))
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+        self.l_skat = self.left(self.points["begin_tol"], self.points["begin"])
+        self.r_skat = self.right(self.points["end_tol"], self.points["end"])
 
     def value(self, key):
         if key <= self.points["begin"]:
@@ -107,183 +792,75 @@ class TrapExt(Subset):
         else:
             return -1
 
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        res = np.zeros(x.shape)
+        left = (x > self.points["begin"]) & (x < self.points["begin_tol"])
+        res[left] = self.l_skat(x[left])
+        res[(x > self.points["begin"]) & (x >= self.points["begin_tol"]) & \
+            (x <= self.points["end_tol"])] = 1.0
+        right = (x > self.points["end_tol"]) & (x <= self.points["end"])
+        res[right] = self.r_skat(x[right])
+        return res
+
+    def _breakpoints(self):
+        return None
+
+    def alpha_cuts(self, levels):
+        '''
+        Возвращает альфа-срезы уровней levels (см. Subset.alpha_cuts).
+        Для скатов библиотечных форм границы срезов вычисляются точно
+        (Slope.inverse). Произвольные функции скатов монотонны, поэтому для
+        них границы находятся одновременным для всех уровней векторным
+        делением отрезка пополам.
+        '''
+        levels = np.asarray(levels, dtype=float)
+        lvl = np.minimum(np.maximum(levels, 0.0), 1.0)
+        begin = self.points["begin"]
+        begin_tol = self.points["begin_tol"]
+        end_tol = self.points["end_tol"]
+        end = self.points["end"]
+
+        lo = np.full(lvl.shape, begin_tol)
+        if begin < begin_tol:
+            lo = _slope_inverse(self.l_skat, begin, begin_tol, lvl)
+        hi = np.full(lvl.shape, end_tol)
+        if end_tol < end:
+            hi = _slope_inverse(self.r_skat, end, end_tol, lvl)
+        lo = np.where(levels > 0, lo, begin)
+        hi = np.where(levels > 0, hi, end)
+        empty = levels > 1
+        return np.where(empty, np.nan, lo), np.where(empty, np.nan, hi)
+
+    def card(self, tol=None):
+        '''
+        Возвращает мощность нечеткого числа. Если площади под обоими
+        скатами выражаются аналитически (см. Slope.integral), мощность
+        вычисляется точно, иначе - как для Subset.
+        '''
+        left = getattr(self.l_skat, 'integral', lambda: None)()
+        right = getattr(self.r_skat, 'integral', lambda: None)()
+        if left is None or right is None:
+            return super(TrapExt, self).card(tol)
+        return left + self.points["end_tol"]-self.points["begin_tol"] + right
+
     def fuzziness(self):
         '''
         Возвращает меру нечеткости нечеткого числа
         '''
         tol = self.points["end_tol"] - self.points["begin_tol"]
         supp = self.points["end"] - self.points["begin"]
-        lvl = Subset.level(self, 0.5)
+        lvl = self.level(0.5)
         mid = lvl.domain.end - lvl.domain.begin
         return tol*(1-abs(2.0*mid-supp-tol)/(0-tol))
 
-    def _fuzzy_algebra(self, other, operation):
-        if isinstance(self, Point) or isinstance(other, Point):
-            raise NotImplementedError
-        if isinstance(other, float) or isinstance(other, int):
-            other = TrapExt((other, other, other, other))
-
-    def __add__(self, other):
-        if isinstance(other, float) or isinstance(other, int):
-            other = TrapExt((other, other, other, other))
-
-        res_begin = min(self.points["begin"] + other.points["begin"],
-                        self.points["begin"] + other.points["end"],
-                        self.points["end"] + other.points["begin"],
-                        self.points["end"] + other.points["end"])
-        res_begin_tol = min(self.points["begin_tol"]+other.points["begin_tol"],
-                            self.points["begin_tol"] + other.points["end_tol"],
-                            self.points["end_tol"] + other.points["begin_tol"],
-                            self.points["end_tol"] + other.points["end_tol"])
-        res_end_tol = max(self.points["begin_tol"]+other.points["begin_tol"],
-                            self.points["begin_tol"]+other.points["end_tol"],
-                            self.points["end_tol"]+other.points["begin_tol"],
-                            self.points["end_tol"]+other.points["end_tol"])
-        res_end = max(self.points["begin"]+other.points["begin"],
-                        self.points["begin"]+other.points["end"],
-                        self.points["end"]+other.points["begin"],
-                        self.points["end"]+other.points["end"])
-
-        res_left = lambda x, y: lambda z: \
-                self.left(self.points["begin_tol"], self.points["begin"])\
-                (self.points["begin"]+(self.points["begin_tol"]-\
-                self.points["begin"])*\
-                (z-res_begin)/(res_begin_tol-res_begin)) * \
-                other.left(other.points["begin_tol"], other.points["begin"])\
-                (other.points["begin"]+(other.points["begin_tol"]-\
-                other.points["begin"])*\
-                (z-res_begin)/(res_begin_tol-res_begin))
-        res_right = lambda x, y: lambda z: \
-                self.right(self.points["end_tol"], self.points["end"])\
-                (self.points["end_tol"]+(self.points["end"]-\
-                self.points["end_tol"])*\
-                (z-res.end_tol)/(res_end-res_end_tol)) * \
-                other.right(other.points["end_tol"], other.points["end"])\
-                (other.points["end_tol"]+(other.points["end"]-\
-                other.points["end_tol"])*\
-                (z-res_end_tol)/(res_end-res_end_tol))
-
-        res = TrapExt(begin=res_begin, begin_tol=res_begin_tol,
-                        end_tol=res_end_tol, end=res_end,
-                        left=res_left, right=res_right)
-        return res
-
-    def __sub__(self, other):
-        if isinstance(other, float) or isinstance(other, int):
-            other = TrapExt(begin=other, end=other,
-                                begin_tol=other, end_tol=other)
-
-        res_begin = min(self.points["begin"]-other.points["begin"],
-                        self.points["begin"]-other.points["end"],
-                        self.points["end"]-other.points["begin"],
-                        self.points["end"]-other.points["end"])
-        res_begin_tol = min(self.points["begin_tol"]-other.points["begin_tol"],
-                            self.points["begin_tol"]-other.points["end_tol"],
-                            self.points["end_tol"]-other.points["begin_tol"],
-                            self.points["end_tol"]-other.points["end_tol"])
-        res_end_tol = max(self.points["begin_tol"]-other.points["begin_tol"],
-                            self.points["begin_tol"]-other.points["end_tol"],
-                            self.points["end_tol"]-other.points["begin_tol"],
-                            self.points["end_tol"]-other.points["end_tol"])
-        res_end = max(self.points["begin"]-other.points["begin"],
-                        self.points["begin"]-other.points["end"],
-                        self.points["end"]-other.points["begin"],
-                        self.points["end"]-other.points["end"])
-
-        res_left = lambda x, y: lambda z: self.left(self.points["begin_tol"],
-                self.points["begin"])\
-                (self.points["begin"]+(self.points["begin_tol"]-\
-                self.points["begin"])*\
-                (z-res_begin)/(res_begin_tol-res_begin)) * \
-                other.left(other.points["begin_tol"], other.points["begin"])\
-                (other.points["begin"]+(other.points["begin_tol"]-\
-                other.points["begin"])*\
-                (z-res_begin)/(res_begin_tol-res_begin))
-        res_right = lambda x, y: lambda z: self.right(self.points["end_tol"],
-                self.points["end"])\
-                (self.points["end_tol"]+(self.points["end"]-\
-                self.points["end_tol"])*\
-                (z-res_end_tol)/(res_end-res_end_tol)) * \
-                other.right(other.points["end_tol"], other.points["end"])\
-                (other.points["end_tol"]+(other.points["end"]-\
-                other.points["end_tol"])*\
-                (z-res_end_tol)/(res_end-res_end_tol))
-
-        res = TrapExt(begin=res_begin, begin_tol=res_begin_tol,
-                        end_tol=res_end_tol, end=res_end,
-                        left=res_left, right=res_right)
-        return res
-
-    def __mul__(self, other):
-        if isinstance(other, float) or isinstance(other, int):
-            other = TrapExt(begin=other, end=other,
-                                begin_tol=other, end_tol=other)
-
-        res_begin = min(self.points["begin"]*other.points["begin"],
-                        self.points["begin"]*other.points["end"],
-                        self.points["end"]*other.points["begin"],
-                        self.points["end"]*other.points["end"])
-        res_begin_tol = min(self.points["begin_tol"]*other.points["begin_tol"],
-                            self.points["begin_tol"]*other.points["end_tol"],
-                            self.points["end_tol"]*other.points["begin_tol"],
-                            self.points["end_tol"]*other.points["end_tol"])
-        res_end_tol = max(self.points["begin_tol"]*other.points["begin_tol"],
-                            self.points["begin_tol"]*other.points["end_tol"],
-                            self.points["end_tol"]*other.points["begin_tol"],
-                            self.points["end_tol"]*other.points["end_tol"])
-        res_end = max(self.points["begin"]*other.points["begin"],
-                        self.points["begin"]*other.points["end"],
-                        self.points["end"]*other.points["begin"],
-                        self.points["end"]*other.points["end"])
-
-        res_left = lambda x, y: lambda z: \
-                        self.left(x, y)(z)*other.left(x, y)(z)
-        res_right = lambda x, y: lambda z: \
-                        self.right(x, y)(z)*other.right(x, y)(z)
-
-        res = TrapExt(begin=res_begin, begin_tol=res_begin_tol,
-                        end_tol=res_end_tol, end=res_end,
-                        left=res_left, right=res_right)
-        return res
-
-    def __div__(self, other):
-        if isinstance(other, float) or isinstance(other, int):
-            other = TrapExt(begin=other, end=other,
-                                begin_tol=other, end_tol=other)
-
-        res_begin = min(self.points["begin"]/other.points["begin"],
-                        self.points["begin"]/other.points["end"],
-                        self.points["end"]/other.points["begin"],
-                        self.points["end"]/other.points["end"])
-        res_begin_tol = min(self.points["begin_tol"]/other.points["begin_tol"],
-                            self.points["begin_tol"]/other.points["end_tol"],
-                            self.points["end_tol"]/other.points["begin_tol"],
-                            self.points["end_tol"]/other.points["end_tol"])
-        res_end_tol = max(self.points["begin_tol"]/other.points["begin_tol"],
-                            self.points["begin_tol"]/other.points["end_tol"],
-                            self.points["end_tol"]/other.points["begin_tol"],
-                            self.points["end_tol"]/other.points["end_tol"])
-        res_end = max(self.points["begin"]/other.points["begin"],
-                        self.points["begin"]/other.points["end"],
-                        self.points["end"]/other.points["begin"],
-                        self.points["end"]/other.points["end"])
-
-        res_left = lambda x, y: lambda z: \
-                        self.left(x, y)(z)*other.left(x, y)(z)
-        res_right = lambda x, y: lambda z: \
-                        self.right(x, y)(z)*other.right(x, y)(z)
-
-        res = TrapExt((res_begin, res_begin_tol, res_end_tol, res_end),
-                        left=res_left, right=res_right)
-        return res
-
-    # TODO radd, rsub, rmul, rdiv
-
 class TrFN(TrapExt):
     '''
     Трапециевидное нечеткое число
     '''
 
+    __slots__ = ()
+
     def __init__(self, a, b, c, d):
         TrapExt.__init__(self, (a, b, c, d), LINE(1), LINE(1))
 ##        super(TrFN, self).__init__(a, b, c, d, LINE(1), LINE(1))
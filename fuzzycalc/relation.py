@@ -0,0 +1,263 @@
+# -*- coding: UTF-8 -*-
+
+'''
+Модуль реализует нечеткие отношения - нечеткие подмножества декартова
+произведения носителей (см. domain.ProductDomain).
+
+Отношение R(x, y) хранится в виде матрицы значений функции принадлежности:
+плотной или, для отношений с небольшим числом ненулевых элементов,
+разреженной (номера строк и столбцов ненулевых элементов и их значения).
+Композиция отношений sup-T вычисляется блоками, так что промежуточные
+массивы занимают ограниченный объем памяти независимо от размеров
+отношений.
+Синтаксис:
+    >>> X=FiniteDomain(['x1', 'x2'])
+    >>> Y=FiniteDomain(['y1', 'y2', 'y3'])
+    >>> Z=FiniteDomain(['z1', 'z2'])
+    >>> R=Relation(ProductDomain(X, Y), [[0.2, 0.8, 0.0], [1.0, 0.3, 0.5]])
+    >>> S=Relation(ProductDomain(Y, Z), [[0.6, 0.1], [0.4, 0.9], [0.7, 0.2]])
+    >>> R.compose(S).dense()
+    array([[ 0.4,  0.8],
+           [ 0.6,  0.3]])
+    >>> R.compose(S, SumProd()).dense()
+    array([[ 0.32,  0.72],
+           [ 0.6 ,  0.27]])
+'''
+
+from .common import current_precision, get_slots, set_slots
+from .domain import ProductDomain, FiniteDomain, RationalRange
+from .subset import Discrete, PiecewiseLinear
+from .tnorm import MinMax, SumProd
+
+import numpy as np
+
+# Наибольшее число элементов промежуточного массива при вычислении
+# композиции отношений.
+BLOCK_SIZE = 2**22
+
+
+class Relation(object):
+    '''
+    Нечеткое отношение на произведении носителей.
+
+    Параметры:
+        domain
+            носитель отношения (ProductDomain)
+        matrix
+            массив значений функции принадлежности формы domain.shape
+        sparse
+            хранить только ненулевые элементы (для бинарных отношений)
+
+    Attributes:
+        domain
+        matrix
+            плотный массив значений (None для разреженного отношения)
+        rows, cols, mu
+            номера строк, столбцов и значения ненулевых элементов
+            разреженного отношения, упорядоченные по строкам
+    '''
+
+    __slots__ = ('domain', 'matrix', 'rows', 'cols', 'mu')
+
+    def __init__(self, domain, matrix=None, sparse=False):
+        self.domain = domain
+        dtype = current_precision().dtype
+        if matrix is None:
+            matrix = np.zeros(domain.shape, dtype=dtype)
+        matrix = np.array(matrix, dtype=dtype)
+        if matrix.shape != domain.shape:
+            raise ValueError('matrix of shape %s expected' % (domain.shape,))
+        if sparse:
+            if matrix.ndim != 2:
+                raise ValueError('sparse relations must be binary')
+            self.rows, self.cols = np.nonzero(matrix)
+            self.mu = matrix[self.rows, self.cols]
+            self.matrix = None
+        else:
+            self.matrix = matrix
+            self.rows = self.cols = self.mu = None
+
+    @classmethod
+    def from_function(cls, domain, f, sparse=False):
+        '''
+        Строит отношение по векторной функции принадлежности f, которая
+        принимает массивы элементов сомножителей (по одному на сомножитель,
+        согласованные по правилам broadcasting) и возвращает массив значений.
+        Синтаксис:
+            >>> D=ProductDomain(RationalRange(0.0, 1.0, acc=2),
+            ...                 RationalRange(0.0, 1.0, acc=2))
+            >>> R=Relation.from_function(D, lambda x, y: 1-abs(x-y))
+            >>> R[0.5, 1.0]
+            0.5
+        '''
+        axes = np.ix_(*[np.asarray(domain.axis(i))
+                        for i in range(len(domain.domains))])
+        matrix = np.broadcast_to(f(*axes), domain.shape)
+        return cls(domain, np.clip(matrix, 0, 1), sparse=sparse)
+
+    @classmethod
+    def from_pairs(cls, domain, pairs, sparse=False):
+        '''
+        Строит отношение по словарю {(x, y, ...): уровень принадлежности}.
+        '''
+        res = cls(domain, sparse=sparse)
+        for key, value in pairs.items():
+            res[key] = value
+        return res
+
+    @property
+    def sparse(self):
+        return self.matrix is None
+
+    def dense(self):
+        '''
+        Возвращает плотную матрицу значений функции принадлежности.
+        '''
+        if not self.sparse:
+            return self.matrix
+        return self.block(0, self.domain.shape[0], 0, self.domain.shape[1])
+
+    def block(self, row_begin, row_end, col_begin, col_end):
+        '''
+        Возвращает плотный блок [row_begin:row_end, col_begin:col_end]
+        матрицы бинарного отношения.
+        '''
+        if not self.sparse:
+            return self.matrix[row_begin:row_end, col_begin:col_end]
+        lo, hi = np.searchsorted(self.rows, (row_begin, row_end))
+        rows = self.rows[lo:hi]
+        cols = self.cols[lo:hi]
+        inner = (cols >= col_begin) & (cols < col_end)
+        res = np.zeros((row_end-row_begin, col_end-col_begin),
+                       dtype=self.mu.dtype)
+        res[rows[inner]-row_begin, cols[inner]-col_begin] = \
+            self.mu[lo:hi][inner]
+        return res
+
+    def value(self, key):
+        if key not in self.domain:
+            return 0.0
+        index = self.domain.index(key)
+        if not self.sparse:
+            return float(self.matrix[index])
+        i, j = index
+        lo, hi = np.searchsorted(self.rows, (i, i+1))
+        hit = np.flatnonzero(self.cols[lo:hi] == j)
+        if len(hit):
+            return float(self.mu[lo+hit[0]])
+        return 0.0
+
+    def __getitem__(self, key):
+        return self.value(key)
+
+    def __setitem__(self, key, value):
+        index = self.domain.index(key)
+        if not self.sparse:
+            self.matrix[index] = value
+            return
+        i, j = index
+        lo, hi = np.searchsorted(self.rows, (i, i+1))
+        hit = np.flatnonzero(self.cols[lo:hi] == j)
+        if len(hit):
+            self.mu[lo+hit[0]] = value
+        else:
+            self.rows = np.insert(self.rows, hi, i)
+            self.cols = np.insert(self.cols, hi, j)
+            self.mu = np.insert(self.mu, hi, value)
+
+    def __getstate__(self):
+        return get_slots(self)
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+
+    def transpose(self):
+        '''
+        Возвращает обратное отношение R'(y, x) = R(x, y).
+        '''
+        x, y = self.domain.domains
+        res = Relation(ProductDomain(y, x), self.dense().T,
+                       sparse=self.sparse)
+        return res
+
+    def compose(self, other, tnorm=MinMax(), block=BLOCK_SIZE):
+        '''
+        Возвращает композицию sup-T отношений R(x, y) и S(y, z):
+            (R o S)(x, z) = sup_y T(R(x, y), S(y, z)),
+        где T - треугольная норма tnorm (по умолчанию - минимум, то есть
+        композиция max-min). Вычисляется блоками так, чтобы промежуточный
+        массив содержал не более block элементов. Результат - плотное
+        отношение на произведении носителей x и z.
+        '''
+        x, y = self.domain.domains
+        other_y, z = other.domain.domains
+        if not _same_domain(y, other_y):
+            raise ValueError('relations are not composable')
+        res = Relation(ProductDomain(x, z))
+        _compose(self, other, res.matrix, tnorm, block)
+        return res
+
+    def image(self, subset, tnorm=MinMax()):
+        '''
+        Возвращает образ нечеткого подмножества subset носителя x при
+        отношении R(x, y) (композиционное правило вывода):
+            B(y) = sup_x T(A(x), R(x, y)).
+        Для конечного носителя y результат - Discrete, для непрерывного -
+        PiecewiseLinear на сетке носителя.
+        '''
+        x, y = self.domain.domains
+        a = subset.values_at(self.domain.axis(0))
+        res = np.zeros(self.domain.shape[1], dtype=self.matrix.dtype
+                       if not self.sparse else self.mu.dtype)
+        n = self.domain.shape[0]
+        step = max(BLOCK_SIZE // max(len(res), 1), 1)
+        for i in range(0, n, step):
+            part = tnorm.norm_array(a[i:i+step, None],
+                                    self.block(i, min(i+step, n), 0, len(res)))
+            np.maximum(res, part.max(axis=0), out=res)
+        if isinstance(y, FiniteDomain):
+            return Discrete(y, res)
+        return PiecewiseLinear(y.grid(), res, domain=y)
+
+
+def _same_domain(one, other):
+    '''
+    Проверяет, что носители совпадают поэлементно.
+    '''
+    if one is other:
+        return True
+    if isinstance(one, FiniteDomain) or isinstance(other, FiniteDomain):
+        return one == other
+    return len(one) == len(other) and one.begin == other.begin and \
+           one.end == other.end
+
+
+def _compose(one, other, res, tnorm, block):
+    '''
+    Вычисляет композицию sup-T бинарных отношений one и other в массив res.
+    Матрицы обходятся блоками строк, общего индекса и столбцов; размеры
+    блоков выбираются так, чтобы трехмерный массив значений T-нормы
+    содержал не более block элементов.
+    '''
+    n, k = one.domain.shape
+    m = other.domain.shape[1]
+    side = max(int(round(block ** (1.0/3))), 1)
+    rows = min(n, side)
+    cols = min(m, side)
+    inner = min(k, max(block // (rows*cols), 1))
+    for i in range(0, n, rows):
+        i_end = min(i+rows, n)
+        for j in range(0, m, cols):
+            j_end = min(j+cols, m)
+            out = res[i:i_end, j:j_end]
+            for l in range(0, k, inner):
+                l_end = min(l+inner, k)
+                a = one.block(i, i_end, l, l_end)
+                b = other.block(l, l_end, j, j_end)
+                t = tnorm.norm_array(a[:, :, None], b[None, :, :])
+                np.maximum(out, t.max(axis=1), out=out)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=False)
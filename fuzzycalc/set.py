@@ -207,6 +207,33 @@ class FuzzySet(object):
                 name = i
         return name
 
+    def compile(self, error=None, interpolate=True):
+        '''
+        Компилирует классификатор на отрезке действительной оси в таблицу
+        значений принадлежности на равномерной сетке, дополненной точками
+        излома термов, и точки смены терма с наибольшей принадлежностью
+        (см. table.CompiledSet). Классификация четкого значения
+        скомпилированным классификатором выполняется за O(1) вычислением
+        номера точки сетки.
+        Синтаксис:
+            >>> C = TriangleClassifier(names=['low', 'middle', 'high'])
+            >>> T = C.compile(error=1e-3)
+            >>> T.classify(0.8)
+            'high'
+            >>> round(T.find(0.25, 'low'), 3)
+            0.5
+
+        Параметры:
+        error
+            допустимая погрешность значений принадлежности; сетка
+            измельчается, пока оценка погрешности ее превышает
+        interpolate
+            интерполировать значения между точками сетки линейно
+        '''
+        # модуль table импортирует данный модуль
+        from .table import CompiledSet
+        return CompiledSet(self, error, interpolate)
+
     def plot(self):
         '''
         Отображает нечеткое множество графически. Все термы представляются на
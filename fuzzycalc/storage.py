@@ -0,0 +1,483 @@
+# -*- coding: UTF-8 -*-
+
+'''
+Модуль реализует двоичный формат хранения нечетких подмножеств, нечетких
+множеств (классификаторов), правил и контроллеров.
+
+Файл состоит из заголовка и области данных. Заголовок - описание структуры
+объекта в формате JSON: параметры подмножеств, имена термов, ссылки на
+массивы. Массивы NumPy (точки излома, значения функций принадлежности,
+таблицы параметров термов) записываются в область данных непрерывно, с
+выравниванием по ALIGN байт. При загрузке область данных отображается в
+память (np.memmap в режиме копирования при записи), и массивы объектов
+являются представлениями отображения без копирования данных.
+
+Термы нечеткого множества, параметры которых - числа (Trapezoidal,
+Triangle, Gaussian и т. п.), хранятся по столбцам: одна таблица параметров
+на класс термов. При загрузке словарь термов (TermTable) создает объект
+терма только при первом обращении к нему, поэтому время открытия модели
+почти не зависит от числа термов.
+Синтаксис:
+    >>> A=TriangleClassifier(names=['low', 'middle', 'high'])
+    >>> save(A, 'classifier.fzc')
+    >>> B=load('classifier.fzc')
+    >>> B['middle'].mode()
+    0.5
+
+Загружаются только классы библиотеки и классы, зарегистрированные
+функцией register(), поэтому, в отличие от pickle, загрузка файла не может
+выполнить произвольный код.
+'''
+
+from .common import get_slots, set_slots
+from .domain import RationalRange
+from .set import FuzzySet
+from .subset import Subset
+
+from array import array
+from bisect import bisect_right
+from collections import MutableMapping
+import importlib
+from itertools import count, izip
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'\x93FUZZYCALC'
+VERSION = 1
+# Выравнивание массивов в области данных, байт.
+ALIGN = 64
+
+_HEAD = struct.Struct('<HQ')
+_registry = {}
+
+
+def register(*classes):
+    '''
+    Разрешает сохранение и загрузку экземпляров классов classes,
+    определенных вне пакета fuzzycalc (например, правил и контроллеров
+    нечеткого вывода).
+    '''
+    for cls in classes:
+        _registry[_path(cls)] = cls
+
+
+def _path(cls):
+    return '%s:%s' % (cls.__module__, cls.__name__)
+
+
+def _resolve(path):
+    '''
+    Возвращает класс по его пути 'модуль:имя'. Допускаются только классы
+    пакета fuzzycalc и зарегистрированные классы.
+    '''
+    try:
+        return _registry[path]
+    except KeyError:
+        pass
+    module, name = path.split(':')
+    if module.split('.')[0] != 'fuzzycalc':
+        raise ValueError('class %s is not registered' % path)
+    cls = getattr(importlib.import_module(module), name)
+    if not isinstance(cls, type):
+        raise ValueError('%s is not a class' % path)
+    return cls
+
+
+def _defines(cls, name):
+    '''
+    Проверяет, что метод name переопределен в классе cls или его предках,
+    кроме object.
+    '''
+    return any(name in vars(klass) for klass in cls.__mro__
+               if klass is not object)
+
+
+def _native(text):
+    '''
+    Возвращает строку ASCII из JSON в виде str (в Python 2 json
+    возвращает unicode).
+    '''
+    try:
+        return text.encode('ascii')
+    except UnicodeError:
+        return text
+
+
+class _Encoder(object):
+    '''
+    Преобразует объект в описание, сериализуемое в JSON, и список массивов
+    области данных. Повторные ссылки на один объект сохраняются один раз.
+    '''
+
+    def __init__(self):
+        self.arrays = []
+        self.memo = {}
+        self.keep = []
+
+    def array(self, value):
+        value = np.asarray(value)
+        if value.dtype.hasobject:
+            raise TypeError('object arrays cannot be stored')
+        self.arrays.append(value)
+        return {'array': len(self.arrays)-1}
+
+    def encode(self, obj):
+        if isinstance(obj, str):
+            return self.text(obj)
+        if obj is None or isinstance(obj, (bool, int, long, float,
+                                           basestring)):
+            return obj
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return self.array(obj)
+        if isinstance(obj, np.dtype):
+            return {'dtype': obj.str}
+        if isinstance(obj, array):
+            res = self.array(np.frombuffer(obj, dtype=obj.typecode))
+            res['pyarray'] = obj.typecode
+            return res
+        if isinstance(obj, list):
+            return [self.encode(item) for item in obj]
+        if isinstance(obj, tuple):
+            return {'tuple': [self.encode(item) for item in obj]}
+        if isinstance(obj, (dict, TermTable)):
+            return {'dict': [[self.encode(key), self.encode(value)]
+                             for key, value in obj.items()]}
+        if isinstance(obj, type):
+            _resolve(_path(obj))
+            return {'type': _path(obj)}
+        return self.object(obj)
+
+    def text(self, obj):
+        '''
+        Кодирует байтовую строку. Строки ASCII записываются в заголовок
+        как есть; остальные JSON вернул бы как unicode, поэтому они
+        записываются в область данных массивом байт.
+        '''
+        try:
+            obj.decode('ascii')
+        except UnicodeError:
+            return {'bytes': self.array(np.array(bytearray(obj),
+                                                 dtype=np.uint8))}
+        return obj
+
+    def object(self, obj):
+        if id(obj) in self.memo:
+            return {'ref': self.memo[id(obj)]}
+        cls = type(obj)
+        path = _path(cls)
+        _resolve(path)
+        if _defines(cls, '__reduce__'):
+            func, args = obj.__reduce__()[:2]
+            if func is not cls and not (isinstance(func, type) and
+                                        issubclass(cls, func)):
+                raise TypeError('%s cannot be stored' % path)
+            res = {'reduce': _path(func), 'args': self.encode(list(args))}
+        else:
+            res = {'class': path}
+            # объект регистрируется до кодирования состояния, чтобы
+            # циклические ссылки на него кодировались как ссылки
+            self.memo[id(obj)] = len(self.memo)
+            self.keep.append(obj)
+            res['id'] = self.memo[id(obj)]
+            if _defines(cls, '__getstate__'):
+                state = obj.__getstate__()
+            else:
+                state = dict(vars(obj))
+            if isinstance(obj, FuzzySet):
+                state['sets'] = self.terms(state['sets'])
+                res['state'] = {'dict': [[key, value if key == 'sets' else
+                                          self.encode(value)]
+                                         for key, value in state.items()]}
+            else:
+                res['state'] = self.encode(state)
+            return res
+        self.memo[id(obj)] = len(self.memo)
+        self.keep.append(obj)
+        res['id'] = self.memo[id(obj)]
+        return res
+
+    def terms(self, sets):
+        '''
+        Кодирует словарь термов нечеткого множества. Термы, состояние
+        которых состоит из чисел и отрезка-носителя, группируются по классам
+        в таблицы параметров; остальные кодируются по отдельности.
+        '''
+        groups = {}
+        other = []
+        for name, term in sets.items():
+            row = _flat(term)
+            if row is None:
+                other.append([self.encode(name), self.encode(term)])
+                continue
+            columns = tuple(sorted(row))
+            key = (_path(type(term)), columns)
+            if key not in groups:
+                # класс терма проверяется при сохранении, а не при загрузке
+                _resolve(key[0])
+            group = groups.setdefault(key, ([], []))
+            group[0].append(name)
+            group[1].append([row[column] for column in columns])
+        return {'terms': [{'class': path, 'columns': list(columns),
+                           'names': self.names(names),
+                           'params': self.array(np.array(rows, dtype=float))}
+                          for (path, columns), (names, rows)
+                          in groups.items()],
+                'other': other}
+
+    def names(self, names):
+        '''
+        Кодирует имена термов группы. Строковые имена записываются в
+        область данных одним массивом байт через нулевой символ, что
+        ускоряет разбор заголовка при большом числе термов.
+        '''
+        if all(type(name) is str and '\0' not in name for name in names):
+            text = '\0'.join(names)
+            return self.array(np.array(bytearray(text), dtype=np.uint8))
+        return [self.encode(name) for name in names]
+
+
+def _flat(term):
+    '''
+    Возвращает состояние терма в виде словаря {столбец: число} или None,
+    если состояние содержит что-либо, кроме чисел и отрезка-носителя.
+    '''
+    if not isinstance(term, Subset) or _defines(type(term), '__reduce__'):
+        return None
+    row = {}
+    for key, value in term.__getstate__().items():
+        if type(value) is RationalRange:
+            row['domain.begin'] = value.begin
+            row['domain.end'] = value.end
+            row['domain.acc'] = np.nan if value._acc is None else value._acc
+        elif isinstance(value, (float, int, np.floating)) and \
+             not isinstance(value, bool):
+            row[key] = float(value)
+        else:
+            return None
+    return row
+
+
+class _Decoder(object):
+    '''
+    Восстанавливает объект по описанию из заголовка и массивам области
+    данных.
+    '''
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.memo = {}
+
+    def decode(self, node):
+        if isinstance(node, list):
+            return [self.decode(item) for item in node]
+        if not isinstance(node, dict):
+            if isinstance(node, unicode):
+                return _native(node)
+            return node
+        if 'bytes' in node:
+            return self.arrays[node['bytes']['array']].tobytes()
+        if 'array' in node:
+            res = self.arrays[node['array']]
+            if 'pyarray' in node:
+                res = array(_native(node['pyarray']), res.tolist())
+            return res
+        if 'tuple' in node:
+            return tuple(self.decode(item) for item in node['tuple'])
+        if 'dict' in node:
+            return dict((self.decode(key), self.decode(value))
+                        for key, value in node['dict'])
+        if 'dtype' in node:
+            return np.dtype(_native(node['dtype']))
+        if 'type' in node:
+            return _resolve(node['type'])
+        if 'ref' in node:
+            return self.memo[node['ref']]
+        if 'reduce' in node:
+            cls = _resolve(node['reduce'])
+            res = self.memo[node['id']] = cls(*self.decode(node['args']))
+            return res
+        if 'terms' in node:
+            return TermTable(
+                [(_resolve(group['class']),
+                  [_native(column) for column in group['columns']],
+                  self.names(group['names']),
+                  self.arrays[group['params']['array']])
+                 for group in node['terms']],
+                [(self.decode(name), self.decode(term))
+                 for name, term in node['other']])
+        if 'class' in node:
+            cls = _resolve(node['class'])
+            res = self.memo[node['id']] = cls.__new__(cls)
+            state = self.decode(node['state'])
+            if hasattr(res, '__setstate__'):
+                res.__setstate__(state)
+            else:
+                res.__dict__.update(state)
+            return res
+        raise ValueError('malformed node: %r' % (node,))
+
+    def names(self, node):
+        if isinstance(node, dict):
+            text = self.arrays[node['array']].tobytes()
+            return text.split('\0')
+        return [self.decode(name) for name in node]
+
+
+class TermTable(MutableMapping):
+    '''
+    Словарь термов нечеткого множества, загруженного из файла (см. load).
+    Термы, параметры которых хранятся в таблицах, создаются при первом
+    обращении к ним и далее хранятся в словаре. Поддерживает интерфейс
+    словаря, включая добавление и удаление термов.
+    '''
+
+    def __init__(self, groups=(), terms=()):
+        # _rows сопоставляет имени терма сквозной номер строки таблиц
+        # параметров, _starts - номера первых строк групп
+        self._groups = []
+        self._starts = []
+        names = []
+        for cls, columns, group, params in groups:
+            self._groups.append((cls, columns, params))
+            self._starts.append(len(names))
+            names.extend(group)
+        self._rows = dict(izip(names, count()))
+        self._terms = dict(terms)
+
+    def _build(self, name):
+        row = self._rows[name]
+        index = bisect_right(self._starts, row) - 1
+        cls, columns, params = self._groups[index]
+        row -= self._starts[index]
+        state = {}
+        domain = {}
+        for column, value in zip(columns, params[row].tolist()):
+            if column.startswith('domain.'):
+                domain[column[7:]] = value
+            else:
+                state[column] = value
+        if domain:
+            acc = domain['acc']
+            state['domain'] = RationalRange(domain['begin'], domain['end'],
+                                            None if acc != acc else int(acc))
+        term = cls.__new__(cls)
+        term.__setstate__(state)
+        return term
+
+    def __getitem__(self, name):
+        try:
+            return self._terms[name]
+        except KeyError:
+            pass
+        term = self._terms[name] = self._build(name)
+        return term
+
+    def __setitem__(self, name, term):
+        self._rows.pop(name, None)
+        self._terms[name] = term
+
+    def __delitem__(self, name):
+        found = self._rows.pop(name, None) is not None
+        found = self._terms.pop(name, None) is not None or found
+        if not found:
+            raise KeyError(name)
+
+    def __iter__(self):
+        for name in self._rows:
+            yield name
+        for name in self._terms:
+            if name not in self._rows:
+                yield name
+
+    def __len__(self):
+        return len(self._rows) + \
+               sum(1 for name in self._terms if name not in self._rows)
+
+    def __contains__(self, name):
+        return name in self._rows or name in self._terms
+
+    def __reduce__(self):
+        return (dict, (list(self.items()),))
+
+
+def save(obj, path):
+    '''
+    Сохраняет объект obj (нечеткое подмножество, нечеткое множество,
+    список правил, контроллер и т. п.) в файл path.
+    '''
+    encoder = _Encoder()
+    root = encoder.encode(obj)
+    offset = 0
+    arrays = []
+    for value in encoder.arrays:
+        value = np.ascontiguousarray(value)
+        offset += -offset % ALIGN
+        arrays.append({'dtype': value.dtype.str, 'shape': list(value.shape),
+                       'offset': offset})
+        offset += value.nbytes
+    header = json.dumps({'version': VERSION, 'root': root,
+                         'arrays': arrays}).encode('utf-8')
+    start = len(MAGIC) + _HEAD.size + len(header)
+    header += b' ' * (-start % ALIGN)
+    # файл записывается под временным именем и затем переименовывается:
+    # массивы объектов, загруженных из прежней версии файла, отображены
+    # в память и не должны изменяться
+    temp = path + '.tmp'
+    with open(temp, 'wb') as stream:
+        stream.write(MAGIC)
+        stream.write(_HEAD.pack(VERSION, len(header)))
+        stream.write(header)
+        position = 0
+        for value, info in zip(encoder.arrays, arrays):
+            stream.write(b'\0' * (info['offset'] - position))
+            data = np.ascontiguousarray(value).tobytes()
+            stream.write(data)
+            position = info['offset'] + len(data)
+    try:
+        os.rename(temp, path)
+    except OSError:
+        os.remove(path)
+        os.rename(temp, path)
+
+
+def load(path, mmap=True):
+    '''
+    Загружает объект, сохраненный функцией save. При mmap=True массивы
+    объекта отображаются из файла без копирования (в режиме копирования при
+    записи: изменения объекта не затрагивают файл), иначе читаются в
+    память. При mmap='r' массивы отображаются только для чтения: страницы
+    файла гарантированно остаются общими для всех процессов, открывших его.
+    '''
+    with open(path, 'rb') as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not a fuzzycalc file' % path)
+        version, size = _HEAD.unpack(stream.read(_HEAD.size))
+        if version > VERSION:
+            raise ValueError('unsupported format version %d' % version)
+        header = json.loads(stream.read(size).decode('utf-8'))
+        start = len(MAGIC) + _HEAD.size + size
+        if mmap:
+            mode = 'r' if mmap == 'r' else 'c'
+            data = np.memmap(stream, dtype=np.uint8, mode=mode) \
+                if header['arrays'] else None
+        else:
+            data = np.frombuffer(stream.read(), dtype=np.uint8)
+            start = 0
+    arrays = []
+    for info in header['arrays']:
+        dtype = np.dtype(_native(info['dtype']))
+        shape = tuple(info['shape'])
+        res = np.ndarray(shape, dtype=dtype, buffer=data,
+                         offset=start + info['offset'])
+        arrays.append(res if mmap else res.copy())
+    return _Decoder(arrays).decode(header['root'])
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=False)
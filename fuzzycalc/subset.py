@@ -5,12 +5,20 @@
 подмножеств.
 '''
 
-from .common import ACCURACY
-from .domain import RationalRange, IntegerRange
+from .common import ACCURACY, PRECISION, current_precision, memoized, quad, \
+    get_slots, set_slots
+from .domain import RationalRange, IntegerRange, FiniteDomain, union
 ##from .algebra import SubsetAlgebra, NumbersAlgebra
 
 import pylab as p
+import numpy as np
 import math
+from array import array
+from bisect import bisect, bisect_left
+from functools import cmp_to_key
+
+# Число точек сетки, сравниваемых за один шаг в Subset.__eq__.
+EQ_BLOCK = 64
 
 
 class Subset(object):
@@ -25,6 +33,20 @@ class Subset(object):
     >>> A.end
     1.0
 
+    Точки излома функции принадлежности хранятся, помимо словаря values, в
+    отсортированном индексе (пара массивов _xs, _ys), который поддерживается
+    методом __setitem__. Благодаря этому интерполяция между точками излома
+    выполняется двоичным поиском за O(log n).
+
+    Нечеткие функционалы (centr, card, sup, mode, support, level)
+    кэшируются и пересчитываются только после изменения подмножества через
+    __setitem__ или изменения параметров носителя.
+
+    Атрибуты экземпляров хранятся в слотах (__slots__), без словаря
+    __dict__; объект алгебры (_algebra) общий для всех подмножеств.
+    Подмножества сериализуются (pickle) по значениям слотов, без кэша
+    функционалов, и могут передаваться в другие процессы.
+
     Attributes:
         values
         points
@@ -32,6 +54,9 @@ class Subset(object):
 
     '''
 
+    __slots__ = ('domain', 'values', 'points', '_xs', '_ys', '_cache',
+                 '_version')
+
     def __init__(self, begin=0.0,
                         end=1.0,
                         domain=None):
@@ -45,7 +70,8 @@ class Subset(object):
         self.points[self.domain.begin] = 0.0
         self.points[self.domain.end] = 0.0
 
-        self._algebra = SubsetAlgebra()
+        self._xs = array('d', sorted(self.values))
+        self._ys = array('d', [self.values[x] for x in self._xs])
 
     def value(self, key):
         '''
@@ -67,13 +93,37 @@ class Subset(object):
         try:
             return self.values[key]
         except KeyError:
-            sort = sorted(self.values.keys())
-            sort1 = sorted(self.values.keys())
-            sort1.pop(0)
-            for (i, j) in zip(sort, sort1):
-                if i < key < j:
-                    return (key-i)*(self[j]-self[i]) / (j-i) + self[i]
-                    break;
+            xs = self._xs
+            j = bisect(xs, key)
+            if j == 0 or j == len(xs):
+                return None
+            i = j - 1
+            return (key-xs[i])*(self._ys[j]-self._ys[i]) / (xs[j]-xs[i]) + \
+                    self._ys[i]
+
+    def values_at(self, xs):
+        '''
+        Возвращает массив уровней принадлежности точек xs нечеткому
+        подмножеству. Векторный аналог метода value(): вычисления выполняются
+        операциями над массивами, без цикла по точкам. Подклассы,
+        переопределяющие value(), переопределяют и этот метод.
+        >>> A=Triangle(1.0, 2.0, 4.0)
+        >>> A.values_at([0.0, 1.5, 3.0])
+        array([ 0. ,  0.5,  0.5])
+        '''
+        x = np.asarray(xs, dtype=float)
+        res = np.interp(x, self._xs, self._ys, left=0.0, right=0.0)
+        return np.where((x >= self.domain.begin) & (x <= self.domain.end),
+                        res, 0.0)
+
+    def _breakpoints(self):
+        '''
+        Возвращает пару массивов (xs, ys) точек излома функции принадлежности
+        в пределах носителя, если она кусочно-линейная, и None в противном
+        случае. По точкам излома нечеткие функционалы (мощность, центроид,
+        мода и т.д.) вычисляются точно, без дискретизации носителя.
+        '''
+        return np.array(self._xs), np.array(self._ys)
 
     def char(self):
         '''
@@ -118,17 +168,46 @@ class Subset(object):
         sup = self.sup()
         if sup == 0.0:
             return self
-        res = Subset(self.domain.begin, self.domain.end)
-        for i in self.domain:
-            res[i] = self.value(i)/sup
-        return res
+        grid = self.domain.grid()
+        return PiecewiseLinear(grid, self.values_at(grid)/sup,
+                               domain=self.domain)
 
+    @memoized
     def sup(self):
-        sup = 0.0
-        for i in self.domain:
-            if self.value(i) > sup:
-                sup = self.value(i)
-        return sup
+        bp = self._breakpoints()
+        if bp is not None:
+            return max(float(bp[1].max()), 0.0)
+        return max(float(self.values_at(self.domain.grid()).max()), 0.0)
+
+    @memoized
+    def support(self):
+        '''
+        Возвращает носитель (замыкание множества точек с ненулевой
+        принадлежностью) нечеткого подмножества в виде четкого интервала.
+        Для пустого подмножества возвращает None.
+        Синтаксис:
+            >>> A=Subset(0.0, 1.0)
+            >>> A[0.5]=1.0
+            >>> A[0.75]=0.0
+            >>> A.support().centr()
+            0.375
+        '''
+        bp = self._breakpoints()
+        if bp is not None:
+            xs, ys = bp
+            nonzero = np.flatnonzero(ys > 0)
+            if not len(nonzero):
+                return None
+            first = max(nonzero[0] - 1, 0)
+            last = min(nonzero[-1] + 1, len(xs) - 1)
+        else:
+            xs = self.domain.grid()
+            nonzero = np.flatnonzero(self.values_at(xs) > 0)
+            if not len(nonzero):
+                return None
+            first = nonzero[0]
+            last = nonzero[-1]
+        return Interval(xs[first], xs[last])
 
     def plot(self, verbose=True):
         '''
@@ -142,12 +221,8 @@ class Subset(object):
             >>> A.plot(verbose=False)
 
         '''
-        xxx = []
-        yyy = []
-        for i in self.domain:
-            xxx.append(i)
-            yyy.append(self.value(i))
-        p.plot(xxx, yyy)
+        xxx = self.domain.grid()
+        p.plot(xxx, self.values_at(xxx))
         if isinstance(self.domain, IntegerRange):
         # TODO построение графиков НПМ на целочисленных интервалах.
             pass
@@ -159,32 +234,93 @@ class Subset(object):
             for i in self.points.iterkeys():
                 p.text(i, self.points[i], str(i))
 
+    def alpha_cuts(self, levels):
+        '''
+        Возвращает альфа-срезы нечеткого подмножества сразу для массива
+        уровней levels в виде пары массивов (lo, hi) левых и правых границ
+        срезов. Срез уровня 0 совпадает с носителем (см. support). Для пустых
+        срезов (уровень выше высоты подмножества) границы равны nan.
+        Для кусочно-линейных подмножеств границы находятся двоичным поиском
+        по точкам излома, для подмножеств заданного вида - аналитически.
+        Синтаксис:
+            >>> A=Subset(0.0, 1.0)
+            >>> A[0.75]=0.75
+            >>> lo, hi = A.alpha_cuts([0.0, 0.5, 1.0])
+            >>> lo
+            array([ 0. ,  0.5,  nan])
+        '''
+        levels = np.asarray(levels, dtype=float)
+        return _cuts(levels, *self._maxima())
+
+    @memoized
+    def _maxima(self):
+        '''
+        Возвращает точки излома (xs, ys) функции принадлежности (для
+        подмножеств без точек излома - значения на сетке носителя) и
+        накопленные максимумы ys в прямом и обратном порядке. Результат
+        хранится в кэше до изменения подмножества, так что alpha_cuts и
+        level выполняют только двоичный поиск.
+        '''
+        bp = self._breakpoints()
+        if bp is None:
+            xs = self.domain.grid()
+            bp = (xs, self.values_at(xs))
+        xs, ys = bp
+        return (xs, ys, np.maximum.accumulate(ys),
+                np.maximum.accumulate(ys[::-1]))
+
+    @memoized
     def level(self, lvl):
-        begin = self.domain.begin
-        end = self.domain.end
-        for i in self.domain:
-            if self.value(i) >= float(lvl):
-                begin = i
-                break
-        for i in self.domain:
-            if (self.value(i) <= lvl) and (i > begin):
-                end = i
-                break
-        res = Interval(begin, end)
-        return res
+        '''
+        Возвращает альфа-срез нечеткого подмножества на уровне lvl в виде
+        четкого интервала. Для пустого среза возвращает None.
+        Синтаксис:
+            >>> A=Triangle(0.0, 1.0, 2.0)
+            >>> A.level(0.5).card()
+            1.0
+        '''
+        lo, hi = self.alpha_cuts(float(lvl))
+        if np.isnan(lo):
+            return None
+        return Interval(float(lo), float(hi))
 
     def __getitem__(self, key):
         return self.value(key)
+
+    def _stamp(self):
+        '''
+        Возвращает номер версии подмножества, который увеличивается при
+        каждом его изменении. Входит в ключ кэша функционалов (см.
+        common.memoized), так что кэши зависимых объектов (например,
+        выражений lazy) устаревают вместе с подмножеством.
+        '''
+        return getattr(self, '_version', 0)
+
+    def _changed(self):
+        self._cache = {}
+        self._version = self._stamp() + 1
+
     def __setitem__(self, key, value):
         if not key in self.domain:
             raise KeyError
+        self._changed()
+        i = bisect_left(self._xs, key)
+        if key in self.values:
+            self._ys[i] = value
+        else:
+            self._xs.insert(i, key)
+            self._ys.insert(i, value)
         self.values[key] = value
 
-    def centr(self):
+    @memoized
+    def centr(self, tol=None):
         '''
         Вычисляет центроид (центр масс) нечеткого подмножества.
         Зависит от конфигурации ФП. Работает как на непрерывных
         ФП заданного вида, так и на ФП произвольного вида.
+        Если ФП не кусочно-линейная, а задан параметр tol, интегралы
+        вычисляются адаптивно с абсолютной погрешностью порядка tol (см.
+        quad), иначе - по точкам сетки носителя.
         >>> A=Triangle(0.2, 0.3, 0.4)
         >>> print round(A.centr(), 3)
         0.3
@@ -192,29 +328,67 @@ class Subset(object):
         >>> print round(A.centr(), 3)
         3.5
         '''
-        sum_ = 0.0
-        j = 0.0
-        for i in self.domain:
-            sum_ += self[i] * i
-            j += self[i]
-        try:
-            return sum_/j
-        except ZeroDivisionError:
+        bp = self._breakpoints()
+        if bp is not None:
+            j = _integral(*bp)
+            if j == 0.0:
+                return None
+            return float(_moment(*bp) / j)
+        if tol is not None:
+            return self.quad(tol)[2]
+        grid = self.domain.grid()
+        mu = self.values_at(grid)
+        j = mu.sum()
+        if j == 0.0:
             return None
+        return float(np.dot(mu, grid) / j)
 
-    def card(self):
+    @memoized
+    def card(self, tol=None):
         '''
-        Возвращает мощность нечеткого подмножества
+        Возвращает мощность нечеткого подмножества. Параметр tol имеет тот
+        же смысл, что и в centr().
         Синтаксис:
             >>> T=Triangle(-1.4, 0.0, 2.6)
             >>> print round(T.card(), 2) # doctest: +SKIP
             4.0
         '''
-        sum_ = 0.0
-        for i in self.domain:
-            sum_ += self.value(i)
+        bp = self._breakpoints()
+        if bp is not None:
+            return float(_integral(*bp))
+        if tol is not None:
+            return self.quad(tol)[0]
+        sum_ = float(self.values_at(self.domain.grid()).sum())
         return sum_*(self.domain.end-self.domain.begin) / self.domain.acc
 
+    @memoized
+    def quad(self, tol=None):
+        '''
+        Адаптивно вычисляет мощность и центроид нечеткого подмножества с
+        абсолютной погрешностью порядка tol (по умолчанию - допуск текущей
+        политики точности). Возвращает четверку: мощность,
+        оценку ее погрешности, центроид и оценку его погрешности. Точки
+        вычисления ФП сгущаются только там, где она изгибается, поэтому для
+        гладких ФП требуется гораздо меньше вычислений, чем по сетке.
+        Синтаксис:
+            >>> A=Gaussian(0.0, 1.0)
+            >>> card, card_err, centr, centr_err = A.quad(1e-6)
+            >>> print round(card, 4), card_err < 1e-6
+            2.5066 True
+        '''
+        def f(x):
+            mu = self.values_at(x)
+            return np.vstack((mu, x*mu))
+
+        (card, moment), err, evals = quad(f, self.domain.begin,
+                                          self.domain.end, tol)
+        if card == 0.0:
+            return 0.0, err, None, None
+        centr = moment/card
+        return (float(card), float(err), float(centr),
+                float((err + abs(centr)*err)/card))
+
+    @memoized
     def mode(self):
         '''
         Возвращает моду (точку максимума) нечеткого подмножества.
@@ -229,37 +403,60 @@ class Subset(object):
         >>> print round(C.mode(), 2)
         20.0
         '''
-        res = self.domain.begin
-        for i in self.domain:
-            if self.value(i) > self.value(res):
-                res = i
-        return res
+        bp = self._breakpoints()
+        if bp is not None:
+            xs, ys = bp
+            if ys.max() <= 0.0:
+                return self.domain.begin
+            return float(xs[np.argmax(ys)])
+        grid = self.domain.grid()
+        return float(grid[np.argmax(self.values_at(grid))])
 
     def euclid_distance(self, other):
+        '''
+        Возвращает евклидово расстояние между нечеткими подмножествами:
+        корень из среднего квадрата разности функций принадлежности на
+        объединении носителей. Для кусочно-линейных подмножеств и пар
+        гауссиан интеграл вычисляется точно (см. _distance_integral), для
+        остальных - суммированием по сетке.
+        Синтаксис:
+            >>> A=Triangle(0.0, 1.0, 2.0)
+            >>> print round(A.euclid_distance(Interval(0.0, 2.0)), 4)
+            0.5774
+        '''
         begin = min(self.domain.begin, other.domain.begin)
         end = max(self.domain.end, other.domain.end)
+        integral = _distance_integral(self, other, True)
+        if integral is not None:
+            return math.sqrt(integral/(end-begin))
         acc = max(self.domain.acc, other.domain.acc)
 
-        domain = RationalRange(begin, end, acc=acc)
-
-        summ = 0.0
-        for i in domain:
-            summ += (self.value(i)-other.value(i))**2
+        grid = RationalRange(begin, end, acc=acc).grid()
+        summ = ((self.values_at(grid)-other.values_at(grid))**2).sum()
 
         return math.sqrt(summ/acc)
 
     def hamming_distance(self, other):
+        '''
+        Возвращает расстояние Хэмминга между нечеткими подмножествами:
+        среднее абсолютной разности функций принадлежности на объединении
+        носителей. Вычисляется так же, как euclid_distance().
+        Синтаксис:
+            >>> A=Triangle(0.0, 1.0, 2.0)
+            >>> print A.hamming_distance(Interval(0.0, 2.0))
+            0.5
+        '''
         begin = min(self.domain.begin, other.domain.begin)
         end = max(self.domain.end, other.domain.end)
+        integral = _distance_integral(self, other, False)
+        if integral is not None:
+            return integral/(end-begin)
         acc = max(self.domain.acc, other.domain.acc)
 
-        domain = RationalRange(begin, end, acc=acc)
+        grid = RationalRange(begin, end, acc=acc).grid()
+        summ = np.abs(self.values_at(grid)-other.values_at(grid)).sum()
 
-        summ = 0.0
-        for i in domain:
-            summ += abs(self.value(i)-other.value(i))
-
-        return summ/acc
+        return float(summ)/acc
 
     def __add__(self, other):
         return self._algebra.__add__(self, other)
@@ -283,17 +480,45 @@ class Subset(object):
         return self.__neg__()
 
     def __neg__(self):
-        res = Subset(domain=self.domain)
-        i = res.domain.begin
-        for i in res.domain:
-            res[i] = 1 - self.value(i)
-        return res
+        bp = self._breakpoints()
+        if bp is None:
+            xs = self.domain.grid()
+        else:
+            xs = _knots(bp, self.domain.begin, self.domain.end)
+        return PiecewiseLinear(xs, 1 - self.values_at(xs),
+                               domain=self.domain)
 
     def __and__(self, other):
-        return self._fuzzy_algebra(other, lambda x, y: min(x, y))
+        return self._algebra._fuzzy_algebra(self, other, np.minimum,
+                                            exact=True)
 
     def __or__(self, other):
-        return self._fuzzy_algebra(other, lambda x, y: max(x, y))
+        return self._algebra._fuzzy_algebra(self, other, np.maximum,
+                                            exact=True)
+
+    def clip(self, lvl):
+        '''
+        Возвращает нечеткое подмножество, усеченное на уровне lvl, то есть
+        min(mu(x), lvl). Так обрезаются термы заключений правил при
+        нечетком выводе по Мамдани. Для кусочно-линейных подмножеств
+        результат строится точно: к точкам излома добавляются только точки
+        пересечения с уровнем lvl.
+        Синтаксис:
+            >>> A=Triangle(0.0, 1.0, 2.0).clip(0.5)
+            >>> A.xs
+            array([ 0. ,  0.5,  1. ,  1.5,  2. ])
+            >>> A.ys
+            array([ 0. ,  0.5,  0.5,  0.5,  0. ])
+        '''
+        lvl = float(lvl)
+        bp = self._breakpoints()
+        if bp is None:
+            xs = self.domain.grid()
+        else:
+            xs = _knots(bp, self.domain.begin, self.domain.end)
+            xs = np.union1d(xs, _crossings(xs, self.values_at(xs) - lvl))
+        return PiecewiseLinear(xs, np.minimum(self.values_at(xs), lvl),
+                               domain=self.domain)
 
     def __abs__(self):
         return self.card()
@@ -301,35 +526,104 @@ class Subset(object):
     def __str__(self):
         return str(self.centr())
 
-    # TODO протестировать следующие три функции
+    def dominance(self, other):
+        '''
+        Возвращает риск того, что величина, распределенная по функции
+        принадлежности данного подмножества, окажется меньше величины,
+        распределенной по функции принадлежности other. Функции
+        принадлежности дискретизируются на сетках носителей; для каждой точки
+        сетки данного подмножества вес точек other правее нее берется из
+        массива префиксных сумм по упорядоченной сетке other, поэтому
+        вычисление выполняется векторно за O(n log m + m) вместо перебора
+        всех пар точек.
+        Синтаксис:
+            >>> A=Triangle(0.0, 1.0, 2.0)
+            >>> B=Triangle(1.0, 2.0, 3.0)
+            >>> print round(A.dominance(B), 3)
+            0.958
+        '''
+        less, greater = _dominance(self, other)
+        return less
+
     def __cmp__(self, other):
-        sum_ = 0.0
-        sum2 = 0.0
-        card = (self.card()*other.card())
-        for i in self.domain:
-            for j in other.domain:
-                chances = self.value(i)*other.value(j)/card
-                sum_ += chances
-                if i < j:
-                    sum2 += chances
-        risk = sum2/sum_
-        return max(-risk*2+1, 0.0)
+        return max(-self.dominance(other)*2+1, 0.0)
+
+    def _params(self):
+        '''
+        Возвращает кортеж параметров, полностью определяющих функцию
+        принадлежности подмножества заданного вида (первый элемент - класс
+        семейства), или None для подмножеств общего вида.
+        '''
+        return None
 
     def __eq__(self, other):
+        '''
+        Структурное сравнение нечетких подмножеств с допуском tol текущей
+        политики точности (см. common.Precision).
+        Подмножества одного вида сравниваются по параметрам за O(1),
+        кусочно-линейные - по объединенным точкам излома, остальные - по
+        точкам сетки носителя блоками с выходом при первом расхождении.
+        Синтаксис:
+            >>> Triangle(0.0, 1.0, 2.0) == Trapezoidal((0.0, 1.0, 1.0, 2.0))
+            True
+            >>> Triangle(0.0, 1.0, 2.0) == Triangle(0.0, 1.5, 2.0)
+            False
+        '''
+        if self is other:
+            return True
+        if not isinstance(other, Subset):
+            return NotImplemented
+        tol = current_precision().tol
+        params = self._params()
+        other_params = other._params()
+        if params is not None and other_params is not None and \
+                params[0] is other_params[0]:
+            return bool(np.allclose(params[1:], other_params[1:],
+                                    rtol=0, atol=tol))
+
         begin = min(self.domain.begin, other.domain.begin)
         end = max(self.domain.end, other.domain.end)
-        i = begin
-        delta = (end-begin)/ACCURACY
-        res = True
-        while i <= end:
-            if self.value(i) != other.value(i):
-                res = False
-            i += delta
-        return res
+        bp = self._breakpoints()
+        other_bp = other._breakpoints()
+        if bp is not None and other_bp is not None:
+            xs = np.union1d(_knots(bp, begin, end),
+                            _knots(other_bp, begin, end))
+            return bool(np.allclose(self.values_at(xs), other.values_at(xs),
+                                    rtol=0, atol=tol))
+
+        acc = max(self.domain.acc, other.domain.acc)
+        grid = RationalRange(begin, end, acc=acc).grid()
+        for i in range(0, len(grid), EQ_BLOCK):
+            xs = grid[i:i+EQ_BLOCK]
+            if not np.allclose(self.values_at(xs), other.values_at(xs),
+                               rtol=0, atol=tol):
+                return False
+        return True
+
+    def __hash__(self):
+        '''
+        Хеш вычисляется по мощности и центроиду, округленным до 6 знаков:
+        у равных подмножеств они совпадают с точностью до допуска __eq__.
+        Ограничение: подмножества, равные в пределах допуска, но с
+        мощностью или центроидом по разные стороны границы округления,
+        получают разные хеши, поэтому в словарях и множествах надежно
+        находятся только подмножества с совпадающими функционалами.
+        Все пустые подмножества (без центроида) имеют одинаковый хеш.
+        '''
+        centr = self.centr()
+        if centr is not None:
+            centr = round(centr, 6)
+        return hash((round(self.card(), 6), centr))
 
     def __ne__(self, other):
         return not self == other
 
+    def __getstate__(self):
+        return get_slots(self, skip=('_cache',))
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+
 
 class Trapezoidal(Subset):
     '''
@@ -357,25 +651,73 @@ class Trapezoidal(Subset):
         Attributes:
             begin_tol
             end_tol
+
+    Хранит только параметры трапеции; словари values и points вычисляются
+    по ним при обращении. Изменять отдельные значения функции
+    принадлежности трапеции нельзя.
     '''
 
+    __slots__ = ('begin_tol', 'end_tol')
+
     def __init__(self, points, domain=None):
 
         (begin, begin_tol, end_tol, end) = points
 
-        super(Trapezoidal, self).__init__(begin, end)
-
-        self.domain.begin = float(begin)
+        self.domain = RationalRange(begin, end)
         self.begin_tol = float(begin_tol)
         self.end_tol = float(end_tol)
-        self.domain.end = float(end)
 
-        self[begin] = 0.0
-        self[begin_tol] = 1.0
-        self[end_tol] = 1.0
-        self[end] = 0.0
+    @property
+    def values(self):
+        res = {}
+        res[self.domain.begin] = 0.0
+        res[self.begin_tol] = 1.0
+        res[self.end_tol] = 1.0
+        res[self.domain.end] = 0.0
+        return res
+
+    @property
+    def points(self):
+        return {self.domain.begin: 0.0, self.domain.end: 0.0}
+
+    def value(self, key):
+        # скалярное значение вычисляется по параметрам трапеции без numpy;
+        # в совпадающих точках излома действует то же правило, что и в
+        # values_at
+        begin = self.domain.begin
+        end = self.domain.end
+        if key == end:
+            return 0.0
+        if key == self.begin_tol or key == self.end_tol:
+            return 1.0
+        if key == begin:
+            return 0.0
+        if self.begin_tol < key < self.end_tol:
+            return 1.0
+        if self.end_tol < key < end:
+            return (end-key) / (end-self.end_tol)
+        if begin < key < self.begin_tol:
+            return (key-begin) / (self.begin_tol-begin)
+        return 0.0
+
+    def _breakpoints(self):
+        (_, begin, begin_tol, end_tol, end) = self._params()
+        xs = []
+        ys = []
+        # совпадающие точки излома сливаются, как ключи словаря values
+        for x, y in ((begin, 0.0), (begin_tol, 1.0), (end_tol, 1.0),
+                     (end, 0.0)):
+            if xs and x == xs[-1]:
+                ys[-1] = y
+            else:
+                xs.append(x)
+                ys.append(y)
+        return np.array(xs), np.array(ys)
 
-    def card(self):
+    def __setitem__(self, key, value):
+        raise TypeError('parametric subsets are immutable')
+
+    def card(self, tol=None):
         return (self.begin_tol-self.domain.begin)/2 + \
                 self.end_tol-self.begin_tol + \
                 (self.domain.end-self.end_tol)/2
@@ -389,17 +731,35 @@ class Trapezoidal(Subset):
     def median(self):
         return (self.domain.begin+self.begin_tol+self.domain.end+self.end_tol)/4
 
-    def __eq__(self, other):
-        if isinstance(other, Trapezoidal):
-            if self.domain.begin == other.begin and \
-                self.begin_tol == other.begin_tol and \
-                self.end_tol == other.end_tol and \
-                self.domain.end == other.end:
-                return True
-            else:
-                return False
-        else:
-            return Subset.__eq__(self, other)
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        begin = self.domain.begin
+        end = self.domain.end
+        res = np.zeros(x.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rise = (x > begin) & (x < self.begin_tol)
+            res[rise] = (x[rise]-begin) / (self.begin_tol-begin)
+            fall = (x > self.end_tol) & (x < end)
+            res[fall] = (end-x[fall]) / (end-self.end_tol)
+        res[(x >= self.begin_tol) & (x <= self.end_tol)] = 1.0
+        # в совпадающих точках излома действует последнее присвоенное
+        # значение, как и в словаре values
+        res[x == begin] = 0.0
+        res[(x == self.begin_tol) | (x == self.end_tol)] = 1.0
+        res[x == end] = 0.0
+        return res
+
+    def alpha_cuts(self, levels):
+        levels = np.asarray(levels, dtype=float)
+        lvl = np.maximum(levels, 0.0)
+        lo = self.domain.begin + lvl*(self.begin_tol-self.domain.begin)
+        hi = self.domain.end - lvl*(self.domain.end-self.end_tol)
+        empty = levels > 1
+        return np.where(empty, np.nan, lo), np.where(empty, np.nan, hi)
+
+    def _params(self):
+        return (Trapezoidal, self.domain.begin, self.begin_tol,
+                self.end_tol, self.domain.end)
 
 
 class Triangle(Trapezoidal):
@@ -423,6 +783,8 @@ class Triangle(Trapezoidal):
 
     '''
 
+    __slots__ = ()
+
     def __init__(self, a, b, c, domain=None):
 
         super(Triangle, self).__init__((a, b, b, c))
@@ -430,9 +792,6 @@ class Triangle(Trapezoidal):
     def mode(self):
         return self.begin_tol
 
-    def card(self):
-        return (self.domain.end-self.domain.begin)/2
-
 class Interval(Trapezoidal):
     '''
     Определяет четкий интервал как частный вид нечеткого множества. Конструктор
@@ -442,10 +801,12 @@ class Interval(Trapezoidal):
 
     '''
 
+    __slots__ = ()
+
     def __init__(self, a, b):
         super(Interval, self).__init__((a, a, b, b))
 
-    def card(self):
+    def card(self, tol=None):
         return self.end_tol-self.begin_tol
 
     def value(self, value):
@@ -454,6 +815,14 @@ class Interval(Trapezoidal):
         else:
             return 0.0
 
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        return ((x >= self.domain.begin) & (x <= self.domain.end)).astype(float)
+
+    def _breakpoints(self):
+        return (np.array([self.domain.begin, self.domain.end]),
+                np.ones(2))
+
 
 class Point(Trapezoidal):
     '''
@@ -463,6 +832,8 @@ class Point(Trapezoidal):
 
     '''
 
+    __slots__ = ()
+
     def __init__(self, a):
         super(Point, self).__init__((a, a, a, a))
 
@@ -474,13 +845,27 @@ class Point(Trapezoidal):
         else:
             return -1
 
+    def values_at(self, xs):
+        return (np.asarray(xs, dtype=float) == self.domain.begin).astype(float)
+
+    def _breakpoints(self):
+        return None
+
     def plot(self, verbose=True):
         p.scatter([self.domain.begin], [1.0], 20)
         p.plot(self.domain.begin, 1.0)
 
-    def card(self):
+    def card(self, tol=None):
         return 0.0
 
+    def centr(self, tol=None):
+        return self.domain.begin
+
+    def _params(self):
+        # точка отличается от вырожденной трапеции (a, a, a, a), значение
+        # которой в точке a равно 0
+        return (Point, self.domain.begin)
+
 
 class Gaussian(Subset):
     '''
@@ -494,35 +879,577 @@ class Gaussian(Subset):
         omega
     '''
 
-    def __init__(self, mu, omega):
+    __slots__ = ('median', 'omega')
 
-        super(Gaussian, self).__init__(mu-5*omega, mu+5*omega)
+    def __init__(self, mu, omega):
 
+        self.domain = RationalRange(mu-5*omega, mu+5*omega)
         self.median = float(mu)
         self.omega = float(omega)
 
+    @property
+    def values(self):
+        return {self.domain.begin: 0.0, self.domain.end: 0.0}
+
+    @property
+    def points(self):
+        return {self.domain.begin: 0.0, self.domain.end: 0.0}
+
+    def __setitem__(self, key, value):
+        raise TypeError('parametric subsets are immutable')
+
     def value(self, x):
         return round(math.exp(-((x-self.median)**2)/(2*self.omega**2)), 5)
 
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        return np.round(np.exp(-((x-self.median)**2)/(2*self.omega**2)), 5)
+
+    def _breakpoints(self):
+        return None
+
     def plot(self, verbose=True):
-        xxx = []
-        yyy = []
-        for i in self.domain:
-            xxx.append(i)
-            yyy.append(self.value(i))
-        p.plot(xxx, yyy)
+        xxx = self.domain.grid()
+        p.plot(xxx, self.values_at(xxx))
         p.plot(self.domain.end+(self.domain.end-self.domain.begin)/3, -0.1)
         p.text(self.median, 1.00, str(self.median))
 
-    def centr(self):
+    def centr(self, tol=None):
         return self.median
 
     def mode(self):
         return self.median
 
-    def card(self):
+    def card(self, tol=None):
         return round(math.sqrt(2*math.pi)*self.omega, 5)
 
+    def _params(self):
+        return (Gaussian, self.median, self.omega)
+
+    def alpha_cuts(self, levels):
+        levels = np.asarray(levels, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            width = self.omega*np.sqrt(-2*np.log(levels))
+        width = np.where(levels > 0, width, np.inf)
+        empty = levels > 1
+        lo = np.maximum(self.median-width, self.domain.begin)
+        hi = np.minimum(self.median+width, self.domain.end)
+        return np.where(empty, np.nan, lo), np.where(empty, np.nan, hi)
+
+
+class PiecewiseLinear(Subset):
+    '''
+    Нечеткое подмножество с кусочно-линейной функцией принадлежности, точки
+    излома которой хранятся в непрерывных массивах NumPy xs и ys. В отличие
+    от Subset, функция принадлежности вычисляется сразу для массива точек
+    (аналогично np.interp), что позволяет обрабатывать миллионы точек за
+    один вызов. Результаты операций алгебры нечетких подмножеств также
+    имеют этот тип.
+    Синтаксис:
+        >>> A=PiecewiseLinear([0.0, 1.0, 3.0], [0.0, 1.0, 0.0])
+        >>> A.value(np.array([0.5, 1.0, 2.0]))
+        array([ 0.5,  1. ,  0.5])
+        >>> A[2.5]
+        0.25
+
+    Параметры:
+        xs
+            абсциссы точек излома
+        ys
+            значения функции принадлежности в точках излома
+        domain
+            носитель подмножества. По умолчанию - отрезок от первой до
+            последней точки излома.
+
+    Attributes:
+        xs
+        ys
+        domain
+    '''
+
+    __slots__ = ('xs', 'ys')
+
+    def __init__(self, xs, ys, domain=None):
+        # Словари values и points базового класса здесь не создаются:
+        # функция принадлежности целиком задается массивами xs и ys.
+        xs = np.array(xs, dtype=float)
+        ys = np.array(ys, dtype=float)
+        order = np.argsort(xs, kind='mergesort')
+
+        self.xs = xs[order]
+        self.ys = ys[order]
+        self.domain = domain or RationalRange(self.xs[0], self.xs[-1])
+        self.points = {}
+
+    @property
+    def values(self):
+        return dict(zip(self.xs.tolist(), self.ys.tolist()))
+
+    def value(self, key):
+        res = self.values_at(key)
+        if res.ndim == 0:
+            return float(res)
+        return res
+
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        res = np.interp(x, self.xs, self.ys, left=0.0, right=0.0)
+        return np.where((x >= self.domain.begin) & (x <= self.domain.end),
+                        res, 0.0)
+
+    def _breakpoints(self):
+        begin = self.domain.begin
+        end = self.domain.end
+        if self.xs[0] >= begin and self.xs[-1] <= end:
+            return self.xs, self.ys
+        # точки излома за пределами носителя отсекаются по его границам
+        inner = (self.xs > begin) & (self.xs < end)
+        xs = np.concatenate(([begin], self.xs[inner], [end]))
+        return xs, self.values_at(xs)
+
+    def __setitem__(self, key, value):
+        if not key in self.domain:
+            raise KeyError
+        self._changed()
+        i = np.searchsorted(self.xs, key)
+        if i < len(self.xs) and self.xs[i] == key:
+            self.ys[i] = value
+        else:
+            self.xs = np.insert(self.xs, i, key)
+            self.ys = np.insert(self.ys, i, value)
+
+
+class Discrete(Subset):
+    '''
+    Нечеткое подмножество конечного носителя из меток (см. FiniteDomain).
+    Значения функции принадлежности хранятся в массиве, индексированном
+    номерами меток: плотном (по значению на каждую метку) или разреженном
+    (номера и значения только ненулевых меток). Объединение, пересечение,
+    мощность и мода вычисляются операциями над массивами.
+    Синтаксис:
+        >>> D=FiniteDomain(['low', 'mid', 'high'])
+        >>> A=Discrete(D, {'low': 0.2, 'mid': 1.0})
+        >>> B=Discrete(D, {'mid': 0.5, 'high': 0.7}, sparse=True)
+        >>> print (A | B).card()
+        1.9
+        >>> (A & B).mode()
+        'mid'
+
+    Параметры:
+        domain
+            конечный носитель
+        values
+            словарь {метка: уровень принадлежности} или массив уровней
+            принадлежности всех меток носителя по порядку
+        sparse
+            хранить только ненулевые значения
+
+    Attributes:
+        domain
+        index
+            отсортированный массив номеров ненулевых меток (для разреженного
+            подмножества) или None
+        mu
+            массив значений функции принадлежности
+    '''
+
+    __slots__ = ('index', 'mu')
+
+    def __init__(self, domain, values=None, sparse=False):
+        self.domain = domain
+        dtype = current_precision().dtype
+        if isinstance(values, dict):
+            index = domain.indices(list(values))
+            if (index < 0).any():
+                raise KeyError('labels outside of the domain')
+            mu = np.array(list(values.values()), dtype=dtype)
+        elif values is None:
+            index = np.zeros(0, dtype=np.intp)
+            mu = np.zeros(0, dtype=dtype)
+        else:
+            mu = np.array(values, dtype=dtype)
+            if len(mu) != len(domain):
+                raise ValueError('one membership value per label expected')
+            index = np.arange(len(domain))
+        if sparse:
+            order = np.argsort(index)
+            index = index[order]
+            mu = mu[order]
+            nonzero = mu != 0
+            self.index = index[nonzero]
+            self.mu = mu[nonzero]
+        else:
+            self.index = None
+            self.mu = np.zeros(len(domain), dtype=dtype)
+            self.mu[index] = mu
+
+    @property
+    def sparse(self):
+        return self.index is not None
+
+    @property
+    def values(self):
+        labels = self.domain.labels
+        if self.sparse:
+            return dict((labels[i], float(m))
+                        for i, m in zip(self.index, self.mu))
+        return dict((labels[i], float(self.mu[i]))
+                    for i in np.flatnonzero(self.mu))
+
+    @property
+    def points(self):
+        return {}
+
+    def dense(self):
+        '''
+        Возвращает плотный массив значений функции принадлежности всех
+        меток носителя.
+        '''
+        if not self.sparse:
+            return self.mu
+        res = np.zeros(len(self.domain), dtype=self.mu.dtype)
+        res[self.index] = self.mu
+        return res
+
+    def _lookup(self, index):
+        '''
+        Значения функции принадлежности для массива номеров меток index
+        (номерам -1 соответствует 0).
+        '''
+        if not self.sparse:
+            return np.where(index >= 0, self.mu[index], 0.0)
+        if not len(self.index):
+            return np.zeros(len(index))
+        j = np.minimum(np.searchsorted(self.index, index), len(self.index)-1)
+        return np.where(self.index[j] == index, self.mu[j], 0.0)
+
+    def value(self, label):
+        if label not in self.domain:
+            return 0.0
+        return float(self._lookup(np.array([self.domain.index(label)]))[0])
+
+    def values_at(self, labels):
+        return self._lookup(self.domain.indices(labels))
+
+    def _breakpoints(self):
+        return None
+
+    def __setitem__(self, label, value):
+        i = self.domain.index(label)
+        self._changed()
+        if not self.sparse:
+            self.mu[i] = value
+            return
+        j = np.searchsorted(self.index, i)
+        if j < len(self.index) and self.index[j] == i:
+            self.mu[j] = value
+        else:
+            self.index = np.insert(self.index, j, i)
+            self.mu = np.insert(self.mu, j, value)
+
+    def _check_domain(self, other):
+        if not isinstance(other, Discrete) or self.domain != other.domain:
+            raise ValueError('discrete subsets of the same domain expected')
+
+    def _combine(self, other, operation):
+        self._check_domain(other)
+        res = operation(self.dense(), other.dense())
+        return Discrete(self.domain, np.clip(res, 0, 1))
+
+    def __and__(self, other):
+        self._check_domain(other)
+        if not (self.sparse and other.sparse):
+            return self._combine(other, np.minimum)
+        index = np.intersect1d(self.index, other.index)
+        return self._sparse(index, np.minimum(self._lookup(index),
+                                              other._lookup(index)))
+
+    def __or__(self, other):
+        self._check_domain(other)
+        if not (self.sparse and other.sparse):
+            return self._combine(other, np.maximum)
+        index = np.union1d(self.index, other.index)
+        return self._sparse(index, np.maximum(self._lookup(index),
+                                              other._lookup(index)))
+
+    def _sparse(self, index, mu):
+        res = Discrete(self.domain, sparse=True)
+        nonzero = mu != 0
+        res.index = index[nonzero]
+        res.mu = mu[nonzero].astype(self.mu.dtype)
+        return res
+
+    def __add__(self, other):
+        return self._combine(other, np.add)
+
+    def __sub__(self, other):
+        return self._combine(other, np.subtract)
+
+    def __mul__(self, other):
+        return self._combine(other, np.multiply)
+
+    def __neg__(self):
+        return Discrete(self.domain, 1 - self.dense())
+
+    def clip(self, lvl):
+        if self.sparse:
+            return self._sparse(self.index, np.minimum(self.mu, float(lvl)))
+        return Discrete(self.domain, np.minimum(self.mu, float(lvl)))
+
+    def card(self, tol=None):
+        return float(self.mu.sum())
+
+    def sup(self):
+        if not len(self.mu):
+            return 0.0
+        return max(float(self.mu.max()), 0.0)
+
+    def mode(self):
+        if not len(self.mu) or self.mu.max() <= 0:
+            return None
+        i = int(np.argmax(self.mu))
+        if self.sparse:
+            i = self.index[i]
+        return self.domain.labels[i]
+
+    def centr(self, tol=None):
+        '''
+        Центроид определен только для носителей с числовыми метками.
+        '''
+        try:
+            labels = np.array(self.domain.labels, dtype=float)
+        except ValueError:
+            raise TypeError('centroid of a subset of non-numeric labels')
+        mu = self.dense()
+        if mu.sum() == 0:
+            return None
+        return float(np.dot(mu, labels) / mu.sum())
+
+    def support(self):
+        '''
+        Возвращает список меток с ненулевой принадлежностью.
+        '''
+        return self.level(0.0, strict=True)
+
+    def level(self, lvl, strict=False):
+        '''
+        Возвращает список меток, уровень принадлежности которых не меньше
+        lvl (при strict=True - больше lvl). Метки с нулевой принадлежностью
+        в срез не входят (как и в support) независимо от способа хранения,
+        поэтому срез уровня 0 совпадает с носителем.
+        '''
+        above = self.mu > lvl if strict else self.mu >= lvl
+        above &= self.mu > 0
+        index = np.flatnonzero(above)
+        if self.sparse:
+            index = self.index[index]
+        labels = self.domain.labels
+        return [labels[i] for i in np.sort(index)]
+
+    def euclid_distance(self, other):
+        self._check_domain(other)
+        d = self.dense() - other.dense()
+        return math.sqrt(float(np.dot(d, d)) / len(self.domain))
+
+    def hamming_distance(self, other):
+        self._check_domain(other)
+        return float(np.abs(self.dense() - other.dense()).sum()) / \
+               len(self.domain)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Discrete):
+            return NotImplemented
+        if self.domain != other.domain:
+            return False
+        return bool(np.allclose(self.dense(), other.dense(),
+                                rtol=0, atol=current_precision().tol))
+
+    def __hash__(self):
+        return hash((round(self.card(), 6), self.mode()))
+
+    def plot(self, verbose=True):
+        mu = self.dense()
+        p.bar(range(len(mu)), mu)
+        if verbose:
+            p.xticks(range(len(mu)), [str(l) for l in self.domain.labels])
+
+
+def _dominance(one, other):
+    '''
+    Возвращает пару вероятностей P(X < Y) и P(X > Y) для величин X и Y,
+    распределенных по функциям принадлежности one и other на сетках их
+    носителей.
+    '''
+    xs = one.domain.grid()
+    ys = other.domain.grid()
+    a = one.values_at(xs)
+    b = other.values_at(ys)
+    total = a.sum()*b.sum()
+    if total == 0:
+        raise ZeroDivisionError('dominance of an empty subset')
+    # обе сетки упорядочены: префиксные суммы весов other дают вес точек
+    # строго левее и не правее каждой точки xs, а их номера в ys находятся
+    # двоичным поиском по упорядоченной сетке
+    cum = np.concatenate(([0.0], np.cumsum(b)))
+    right = cum[-1] - cum[np.searchsorted(ys, xs, 'right')]
+    left = cum[np.searchsorted(ys, xs, 'left')]
+    return float(np.dot(a, right)/total), float(np.dot(a, left)/total)
+
+
+def fuzzy_cmp(one, other):
+    '''
+    Сравнивает нечеткие подмножества по риску доминирования (см.
+    Subset.dominance). Возвращает -1, если one скорее меньше other, 1, если
+    скорее больше, и 0, если риски равны с допуском tol текущей политики
+    точности.
+    '''
+    less, greater = _dominance(one, other)
+    tol = current_precision().tol
+    if greater - less > tol:
+        return 1
+    if less - greater > tol:
+        return -1
+    return 0
+
+
+# Функция-ключ для сортировки нечетких подмножеств:
+#     >>> sorted(estimates, key=fuzzy_key)
+fuzzy_key = cmp_to_key(fuzzy_cmp)
+
+
+def _distance_integral(one, other, square):
+    '''
+    Точно вычисляет интеграл квадрата (square=True) или модуля разности
+    функций принадлежности one и other. Для кусочно-линейных подмножеств
+    интеграл берется по отрезкам между объединенными точками излома (и
+    точками смены знака разности), для пары гауссиан - по аналитическим
+    формулам. В остальных случаях возвращает None.
+    '''
+    if type(one) is Gaussian and type(other) is Gaussian:
+        return _gauss_integral(one, other, square)
+    bp_one = one._breakpoints()
+    bp_other = other._breakpoints()
+    if bp_one is None or bp_other is None:
+        return None
+    begin = min(one.domain.begin, other.domain.begin)
+    end = max(one.domain.end, other.domain.end)
+    xs = np.union1d(_knots(bp_one, begin, end), _knots(bp_other, begin, end))
+    d = one.values_at(xs) - other.values_at(xs)
+    if square:
+        # интеграл квадрата линейной функции на отрезке
+        return float(np.dot(np.diff(xs),
+                            d[:-1]**2 + d[:-1]*d[1:] + d[1:]**2) / 3)
+    xs = np.union1d(xs, _crossings(xs, d))
+    return float(_integral(xs, np.abs(one.values_at(xs) -
+                                      other.values_at(xs))))
+
+
+def _gauss_integral(one, other, square):
+    '''
+    Интеграл квадрата или модуля разности двух гауссиан по всей оси.
+    '''
+    m1, w1 = one.median, one.omega
+    m2, w2 = other.median, other.omega
+    if square:
+        cross = math.sqrt(2*math.pi)*w1*w2/math.sqrt(w1**2+w2**2) * \
+                math.exp(-(m1-m2)**2/(2*(w1**2+w2**2)))
+        return math.sqrt(math.pi)*(w1+w2) - 2*cross
+    # гауссианы пересекаются в точках, где (x-m1)*w2 = +-(x-m2)*w1
+    roots = [(m1*w2+m2*w1)/(w1+w2)]
+    if w1 != w2:
+        roots.append((m1*w2-m2*w1)/(w2-w1))
+    bounds = [-np.inf] + sorted(roots) + [np.inf]
+
+    def area(m, w, a, b):
+        return w*math.sqrt(math.pi/2) * \
+               (math.erf((b-m)/(w*math.sqrt(2))) -
+                math.erf((a-m)/(w*math.sqrt(2))))
+
+    return sum(abs(area(m1, w1, a, b) - area(m2, w2, a, b))
+               for a, b in zip(bounds[:-1], bounds[1:]))
+
+
+def _knots(bp, begin, end):
+    '''
+    Возвращает точки излома bp = (xs, ys), дополненные границами отрезка
+    [begin, end]. Если функция принадлежности терпит разрыв на краю точек
+    излома, вплотную к нему добавляется точка, чтобы скачок сохранился при
+    линейной интерполяции.
+    '''
+    xs, ys = bp
+    knots = [xs, [begin, end]]
+    if ys[0] != 0 and xs[0] > begin:
+        knots.append([np.nextafter(xs[0], -np.inf)])
+    if ys[-1] != 0 and xs[-1] < end:
+        knots.append([np.nextafter(xs[-1], np.inf)])
+    return np.unique(np.concatenate(knots))
+
+
+def _cuts(levels, xs, ys, rising, falling):
+    '''
+    Возвращает границы альфа-срезов уровней levels кусочно-линейной функции,
+    заданной точками излома (xs, ys). Первая точка излома, в которой
+    функция достигает уровня, находится двоичным поиском по накопленному
+    максимуму ys (rising), последняя - по накопленному максимуму ys в
+    обратном порядке (falling); граница среза затем уточняется
+    интерполяцией на соседнем отрезке. Срез уровня 0 понимается как
+    замыкание носителя.
+    '''
+    lvl = np.ravel(levels)
+    n = len(xs)
+    support = lvl <= 0
+    lvl = np.where(support, 0.0, lvl)
+
+    i = np.where(support, np.searchsorted(rising, lvl, 'right'),
+                          np.searchsorted(rising, lvl, 'left'))
+    j = np.where(support, np.searchsorted(falling, lvl, 'right'),
+                          np.searchsorted(falling, lvl, 'left'))
+    empty = i == n
+    i = np.minimum(i, n-1)
+    j = np.maximum(n-1-j, 0)
+
+    lo = xs[i].astype(float)
+    edge = (i > 0) & ~empty
+    k = i[edge]
+    lo[edge] = xs[k-1] + (lvl[edge]-ys[k-1]) * \
+                         (xs[k]-xs[k-1]) / (ys[k]-ys[k-1])
+    hi = xs[j].astype(float)
+    edge = (j < n-1) & ~empty
+    k = j[edge]
+    hi[edge] = xs[k+1] - (lvl[edge]-ys[k+1]) * \
+                         (xs[k+1]-xs[k]) / (ys[k]-ys[k+1])
+
+    lo[empty] = np.nan
+    hi[empty] = np.nan
+    shape = np.shape(levels)
+    return lo.reshape(shape), hi.reshape(shape)
+
+
+def _crossings(xs, s):
+    '''
+    Возвращает точки, в которых функция s, линейная между точками xs,
+    меняет знак.
+    '''
+    i = np.flatnonzero(s[:-1]*s[1:] < 0)
+    return xs[i] - s[i]*(xs[i+1]-xs[i]) / (s[i+1]-s[i])
+
+
+def _integral(xs, ys):
+    '''
+    Точный интеграл кусочно-линейной функции, заданной точками излома.
+    '''
+    return np.dot(np.diff(xs), ys[:-1] + ys[1:]) / 2
+
+
+def _moment(xs, ys):
+    '''
+    Точный первый момент (интеграл x*f(x)) кусочно-линейной функции.
+    '''
+    return np.dot(np.diff(xs), xs[:-1]*(2*ys[:-1] + ys[1:]) +
+                               xs[1:]*(ys[:-1] + 2*ys[1:])) / 6
+
 
 class Algebra():
     pass
@@ -532,34 +1459,52 @@ class SubsetAlgebra(Algebra):
     def __init__(self):
         pass
 
-    def _fuzzy_algebra(self, one, other, operation):
+    def _fuzzy_algebra(self, one, other, operation, exact=False):
+        '''
+        Применяет операцию operation к функциям принадлежности операндов и
+        ограничивает результат отрезком [0, 1]. Если операция линейна или
+        является минимумом/максимумом (exact=True), а оба операнда
+        кусочно-линейны, результат строится точно: по объединению их точек
+        излома, дополненному точками пересечения графиков и точками выхода
+        результата на уровни 0 и 1. Иначе операнды дискретизируются на
+        сетке объединенного носителя.
+        '''
 ##        if isinstance(self, Point) or isinstance(other, Point):
 ##            raise NotImplementedError
         if isinstance(other, float) or isinstance(other, int):
             raise NotImplementedError
 
-        begin = min(one.domain.begin, other.domain.begin)
-        end = max(one.domain.end, other.domain.end)
-        acc = max(one.domain.acc, other.domain.acc)
-
-        domain = RationalRange(begin, end, acc=acc)
-        res = Subset(domain=domain)
-        for i in res.domain:
-            res[i] = max(
-                        min(
-                            operation(one[i], other[i]),
-                        1),
-                     0)
-        return res
+        domain = union(one.domain, other.domain)
+        bp_one = one._breakpoints()
+        bp_other = other._breakpoints()
+        if not exact or bp_one is None or bp_other is None:
+            xs = domain.grid()
+        else:
+            xs = np.union1d(_knots(bp_one, domain.begin, domain.end),
+                            _knots(bp_other, domain.begin, domain.end))
+            a = one.values_at(xs)
+            b = other.values_at(xs)
+            res = operation(a, b)
+            zeros = _crossings(xs, res)
+            ones = _crossings(xs, res - 1)
+            xs = np.union1d(xs, np.concatenate((_crossings(xs, a - b),
+                                                zeros, ones)))
+            res = operation(one.values_at(xs), other.values_at(xs))
+            # в точках выхода на уровни 0 и 1 убираем ошибку округления
+            res[np.searchsorted(xs, zeros)] = 0.0
+            res[np.searchsorted(xs, ones)] = 1.0
+            return PiecewiseLinear(xs, np.clip(res, 0, 1), domain=domain)
+        res = operation(one.values_at(xs), other.values_at(xs))
+        return PiecewiseLinear(xs, np.clip(res, 0, 1), domain=domain)
 
     def __add__(self, one, other):
-        return self._fuzzy_algebra(one, other, lambda x, y: x + y)
+        return self._fuzzy_algebra(one, other, np.add, exact=True)
 
     def __sub__(self, one, other):
-        return self._fuzzy_algebra(one, other, lambda x, y: x - y)
+        return self._fuzzy_algebra(one, other, np.subtract, exact=True)
 
     def __mul__(self, one, other):
-        return self._fuzzy_algebra(one, other, lambda x, y: x * y)
+        return self._fuzzy_algebra(one, other, np.multiply)
 
     def __div__(self, one, other):
         raise NotImplementedError
@@ -567,15 +1512,15 @@ class SubsetAlgebra(Algebra):
     def __pow__(self, one, other):
         if not(isinstance(other, float) or isinstance(other, int)):
             raise NotImplementedError
-        begin = one.domain.begin
-        end = one.domain.end
-        res = Subset(begin, end)
-        for i in res.domain:
-            res[i] = min(one.value(i)**other, 1)
-        return res
+        domain = RationalRange(one.domain.begin, one.domain.end)
+        grid = domain.grid()
+        res = np.minimum(one.values_at(grid)**other, 1)
+        return PiecewiseLinear(grid, res, domain=domain)
 
-class NumbersAlgebra(Algebra):
-    pass
+
+# Алгебра не хранит состояния, поэтому один ее экземпляр разделяется всеми
+# подмножествами.
+Subset._algebra = SubsetAlgebra()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,520 @@
+# -*- coding: UTF-8 -*-
+
+'''
+Модуль реализует таблицы принадлежности - значения функций принадлежности
+всех термов нечеткого множества (классификатора) в точках сетки его
+носителя, вычисленные заранее.
+
+Таблица записывается в файл (см. storage) один раз, после чего рабочие
+процессы открывают ее только для чтения: массив значений отображается в
+память, и операционная система хранит его страницы в единственном
+экземпляре для всех процессов. Процессам не требуется ни пересчитывать
+термы на сетке, ни хранить собственные копии значений.
+
+Таблица поддерживает интерфейс классификатора (термы по имени, find,
+classify), поэтому может заменять нечеткое множество, например, в узлах
+нечеткого контроллера (см. attach). Термы таблицы - кусочно-линейные
+подмножества с точками излома в точках сетки.
+
+Скомпилированный классификатор (CompiledSet, см. FuzzySet.compile) строится
+на равномерной сетке, шаг которой подбирается по допустимой погрешности,
+дополненной точками излома термов, и дополнительно хранит точки смены
+терма с наибольшей принадлежностью, так что классификация четкого значения
+не зависит от числа термов.
+Синтаксис:
+    >>> C=TriangleClassifier(names=['low', 'middle', 'high'])
+    >>> precompute(C, 'tables.fzc')
+    >>> T=open_tables('tables.fzc')
+    >>> T.classify(0.8)
+    'high'
+    >>> T.find(0.25, 'low')
+    0.5
+'''
+
+from .common import get_slots, set_slots
+from .domain import RationalRange
+from .set import FuzzySet
+from .storage import save, load
+from .subset import Subset, PiecewiseLinear
+
+import numpy as np
+
+# Наибольшее число элементов таблицы скомпилированного классификатора
+# (термы x точки сетки), до которого измельчается сетка при подборе шага.
+COMPILE_SIZE = 2**24
+# Скачок значения, начиная с которого точка излома терма считается точкой
+# разрыва функции принадлежности.
+JUMP = 1e-9
+
+
+class MembershipTable(object):
+    '''
+    Таблица значений функций принадлежности термов нечеткого множества в
+    точках сетки носителя. Строится для носителей, имеющих сетку
+    дискретизации (RationalRange, IntegerRange).
+
+    Параметры:
+        fuzzy_set
+            нечеткое множество (классификатор)
+        domain
+            носитель, на сетке которого вычисляются значения. По умолчанию -
+            носитель нечеткого множества.
+
+    Attributes:
+        domain
+        names
+            имена термов в порядке строк таблицы
+        grid
+            точки сетки носителя
+        mu
+            массив значений формы (len(names), len(grid)), недоступный для
+            записи
+    '''
+
+    __slots__ = ('domain', 'names', 'grid', 'mu', '_index', '_terms')
+
+    def __init__(self, fuzzy_set, domain=None):
+        self.domain = domain or fuzzy_set.domain
+        self.names = tuple(sorted(fuzzy_set.sets))
+        self.grid = np.array(self.domain.grid(), dtype=float)
+        self.mu = np.empty((len(self.names), len(self.grid)))
+        for i, name in enumerate(self.names):
+            self.mu[i] = fuzzy_set[name].values_at(self.grid)
+        self.grid.flags.writeable = False
+        self.mu.flags.writeable = False
+        self._reset()
+
+    def _reset(self):
+        self._index = dict((name, i) for i, name in enumerate(self.names))
+        self._terms = {}
+
+    def __getstate__(self):
+        return get_slots(self, skip=('_index', '_terms'))
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+        self._reset()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        for name in self.names:
+            yield self[name]
+
+    def __getitem__(self, name):
+        '''
+        Возвращает терм name в виде кусочно-линейного подмножества, точки
+        излома которого - представления сетки и строки таблицы (без
+        копирования).
+        '''
+        try:
+            return self._terms[name]
+        except KeyError:
+            pass
+        row = self.mu[self._index[name]]
+        term = PiecewiseLinear.__new__(PiecewiseLinear)
+        term.__setstate__({'xs': self.grid, 'ys': row,
+                           'domain': self.domain, 'points': {}})
+        self._terms[name] = term
+        return term
+
+    def values_at(self, xs):
+        '''
+        Возвращает массив уровней принадлежности точек xs всем термам формы
+        (len(names),) + np.shape(xs). Значения между точками сетки
+        интерполируются линейно, вне носителя равны 0.
+        Синтаксис:
+            >>> T=MembershipTable(TriangleClassifier(names=['a', 'b']))
+            >>> T.values_at([0.25, 0.5])
+            array([[ 0.75,  0.5 ],
+                   [ 0.25,  0.5 ]])
+        '''
+        x = np.asarray(xs, dtype=float)
+        grid = self.grid
+        inside = (x >= self.domain.begin) & (x <= self.domain.end)
+        j = np.clip(np.searchsorted(grid, x), 1, len(grid)-1)
+        left = grid[j-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = np.clip((x-left) / (grid[j]-left), 0.0, 1.0)
+        w = np.where(np.isfinite(w), w, 1.0)
+        res = self.mu[:, j-1]*(1.0-w) + self.mu[:, j]*w
+        return np.where(inside, res, 0.0)
+
+    def find(self, val, term):
+        '''
+        Возвращает значение принадлежности точки val терму term (см.
+        FuzzySet.find).
+        '''
+        return float(self.values_at(val)[self._index[term]])
+
+    def classify(self, val):
+        '''
+        Возвращает имя терма, наиболее соответствующего переданному
+        элементу, или None, если элемент не принадлежит ни одному терму (см.
+        FuzzySet.classify).
+        '''
+        if isinstance(val, Subset):
+            res = np.array([(val & term).card() for term in self])
+        else:
+            res = self.values_at(float(val))
+        if not len(res) or res.max() <= 0:
+            return None
+        return self.names[int(res.argmax())]
+
+
+class CompiledSet(MembershipTable):
+    '''
+    Скомпилированный классификатор на отрезке действительной оси.
+    Строится методом FuzzySet.compile.
+
+    Узлы таблицы - точки равномерной сетки носителя, дополненные точками
+    излома термов (для термов без точек излома - границами их носителей и
+    ядер). Кусочно-линейные термы поэтому представлены точно, а в точках
+    разрыва функций принадлежности узел повторяется дважды: с пределами
+    слева и справа (в самой точке разрыва действует предел справа).
+    Номер узла для четкого значения находится за O(1): по номеру ячейки
+    равномерной сетки (offsets) и короткому просмотру дополнительных узлов
+    в ней.
+
+    Для классификации заранее вычисляются точки смены терма с наибольшей
+    принадлежностью (bounds) - для тех самых значений принадлежности,
+    которые возвращают find и values_at: при интерполяции точки смены -
+    точные пересечения интерполированных строк таблицы, иначе - середины
+    между узлами. Поэтому ответ classify отличается от FuzzySet.classify
+    только там, где принадлежности терминов различаются не более чем на
+    2*error.
+
+    Параметры:
+        fuzzy_set
+            нечеткое множество на отрезке действительной оси
+        error
+            допустимая погрешность значений принадлежности. Равномерная
+            сетка измельчается вдвое, пока оценка погрешности (в серединах
+            ячеек между узлами, где она наибольшая) превышает error. По
+            умолчанию используется сетка носителя нечеткого множества.
+        interpolate
+            интерполировать значения принадлежности между узлами линейно;
+            иначе используется значение в ближайшем узле (при равенстве
+            расстояний - в правом)
+
+    Attributes:
+        step
+            шаг равномерной сетки
+        offsets
+            номера последних узлов, не превосходящих точки равномерной
+            сетки
+        bounds
+            точки смены терма с наибольшей принадлежностью
+        segments
+            номера (в names) термов с наибольшей принадлежностью на
+            участках между точками bounds; -1 - участок не принадлежит ни
+            одному терму
+        starts
+            номера первых точек bounds, не меньших узлов таблицы
+        interpolate
+        error
+            оценка погрешности значений принадлежности
+    '''
+
+    __slots__ = ('step', 'offsets', 'bounds', 'segments', 'starts',
+                 'interpolate', 'error')
+
+    def __init__(self, fuzzy_set, error=None, interpolate=True):
+        domain = fuzzy_set.domain
+        if not isinstance(domain, RationalRange):
+            raise TypeError('classifier over a RationalRange expected')
+        self.interpolate = interpolate
+        self.names = tuple(sorted(fuzzy_set.sets))
+        terms = [fuzzy_set[name] for name in self.names]
+        points = _term_points(terms, domain)
+        acc = domain.acc
+        while True:
+            if len(terms) * (acc+1 + 2*len(points)) > COMPILE_SIZE:
+                raise ValueError('error bound %s is not reachable' % error)
+            self._build(terms, RationalRange(domain.begin, domain.end, acc),
+                        points)
+            self.error = _error(terms, self)
+            if error is None or self.error <= error:
+                break
+            acc *= 2
+        self._classes()
+        for array in (self.grid, self.mu, self.offsets, self.bounds,
+                      self.segments, self.starts):
+            array.flags.writeable = False
+        self._reset()
+
+    def _build(self, terms, domain, points):
+        '''
+        Строит узлы таблицы: точки равномерной сетки носителя domain и
+        точки излома points; в точках разрыва - по два узла.
+        '''
+        self.domain = domain
+        self.step = (domain.end-domain.begin) / domain.acc
+        nodes = domain.begin + self.step*np.arange(domain.acc+1)
+        nodes[-1] = domain.end
+        lefts = np.nextafter(points, -np.inf)
+        rights = np.nextafter(points, np.inf)
+        values = [np.concatenate((term.values_at(nodes),
+                                  term.values_at(lefts),
+                                  term.values_at(rights)))
+                  for term in terms]
+        values = np.array(values).reshape(len(terms), -1)
+        n, m = len(nodes), len(points)
+        jumps = np.abs(values[:, n:n+m] - values[:, n+m:]).max(axis=0) \
+            if len(terms) else np.zeros(m)
+        # узлы сетки, совпадающие с точками излома, заменяются ими; предел
+        # слева сохраняется только в точках разрыва
+        keep = np.concatenate((~np.in1d(nodes, points), jumps > JUMP,
+                               np.ones(m, dtype=bool)))
+        xs = np.concatenate((nodes, points, points))[keep]
+        side = np.concatenate((np.zeros(n), np.zeros(m), np.ones(m)))[keep]
+        order = np.lexsort((side, xs))
+        self.grid = xs[order]
+        self.mu = values[:, keep][:, order]
+        self.offsets = np.maximum(np.searchsorted(
+            self.grid, domain.begin + self.step*np.arange(domain.acc+1),
+            'right') - 1, 0)
+
+    def _classes(self):
+        '''
+        Вычисляет точки смены терма с наибольшей принадлежностью.
+        '''
+        mu = self.mu
+        grid = self.grid
+        if len(self.names):
+            labels = mu.argmax(axis=0)
+            labels[mu.max(axis=0) <= 0] = -1
+        else:
+            labels = np.zeros(len(grid), dtype=np.intp) - 1
+        if not self.interpolate:
+            change = np.flatnonzero(labels[:-1] != labels[1:])
+            bounds = (grid[change] + grid[change+1]) / 2
+            segments = np.concatenate((labels[:1], labels[change+1]))
+        else:
+            pieces = []
+            for k in np.flatnonzero(grid[:-1] < grid[1:]):
+                if labels[k] == labels[k+1]:
+                    pieces.append((grid[k], labels[k]))
+                    continue
+                width = grid[k+1] - grid[k]
+                for u, label in _envelope(mu[:, k], mu[:, k+1]):
+                    pieces.append((grid[k] + u*width, label))
+            if not pieces:
+                pieces = [(grid[0], labels[0])]
+            xs = np.array([x for x, _ in pieces])
+            marks = np.array([label for _, label in pieces], dtype=np.intp)
+            change = np.flatnonzero(marks[:-1] != marks[1:]) + 1
+            bounds = xs[change]
+            segments = np.concatenate((marks[:1], marks[change]))
+        self.bounds = bounds
+        self.segments = segments.astype(np.intp)
+        self.starts = np.searchsorted(bounds, grid, 'left')
+
+    def _knot(self, x):
+        '''
+        Возвращает номер последнего узла, не превосходящего x (x лежит на
+        носителе).
+        '''
+        grid = self.grid
+        i = min(int((x-self.domain.begin) / self.step), len(self.offsets)-1)
+        k = self.offsets[i]
+        while k+1 < len(grid) and grid[k+1] <= x:
+            k += 1
+        while k > 0 and grid[k] > x:
+            k -= 1
+        return k
+
+    def _weights(self, x, k):
+        '''
+        Возвращает номера узлов и веса, по которым вычисляются значения в
+        точках x, лежащих между узлами k и k+1.
+        '''
+        grid = self.grid
+        after = np.minimum(k+1, len(grid)-1)
+        left = grid[k]
+        width = grid[after] - left
+        if not self.interpolate:
+            nearest = np.where(grid[after]-x <= x-left, after, k)
+            return nearest, nearest, 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = np.where(width > 0, (x-left) / width, 0.0)
+        return k, after, np.clip(w, 0.0, 1.0)
+
+    def values_at(self, xs):
+        x = np.asarray(xs, dtype=float)
+        inside = (x >= self.domain.begin) & (x <= self.domain.end)
+        k = np.clip(np.searchsorted(self.grid, x, 'right') - 1,
+                    0, len(self.grid)-1)
+        k, after, w = self._weights(x, k)
+        res = self.mu[:, k]*(1.0-w) + self.mu[:, after]*w
+        return np.where(inside, res, 0.0)
+
+    def find(self, val, term):
+        if not self.domain.begin <= val <= self.domain.end:
+            return 0.0
+        row = self.mu[self._index[term]]
+        k, after, w = self._weights(val, self._knot(val))
+        return float(row[k]*(1.0-w) + row[after]*w)
+
+    def classify(self, val):
+        '''
+        Возвращает имя терма с наибольшей принадлежностью в точке val (см.
+        FuzzySet.classify); для нечеткого подмножества см.
+        MembershipTable.classify.
+        Синтаксис:
+            >>> C=TriangleClassifier(names=['low', 'middle', 'high'])
+            >>> C.compile(error=1e-3).classify(0.8)
+            'high'
+        '''
+        if isinstance(val, Subset):
+            return super(CompiledSet, self).classify(val)
+        if not self.domain.begin <= val <= self.domain.end:
+            return None
+        bounds = self.bounds
+        j = self.starts[self._knot(val)]
+        while j < len(bounds) and bounds[j] <= val:
+            j += 1
+        label = self.segments[j]
+        if label < 0:
+            return None
+        return self.names[label]
+
+    def indices(self, xs):
+        '''
+        Векторный аналог classify(): возвращает массив номеров (в names)
+        термов для четких значений xs; -1 - значение не принадлежит ни
+        одному терму или лежит вне носителя.
+        '''
+        x = np.asarray(xs, dtype=float)
+        inside = (x >= self.domain.begin) & (x <= self.domain.end)
+        res = self.segments[np.searchsorted(self.bounds, x, 'right')]
+        return np.where(inside, res, -1)
+
+
+def _term_points(terms, domain):
+    '''
+    Возвращает точки излома термов внутри носителя domain; для термов без
+    точек излома - границы носителей и ядер (альфа-срезы уровней 0 и 1),
+    где функции принадлежности могут иметь разрывы.
+    '''
+    points = []
+    for term in terms:
+        bp = term._breakpoints()
+        if bp is not None:
+            points.append(np.asarray(bp[0], dtype=float))
+        else:
+            lo, hi = term.alpha_cuts([0.0, 1.0])
+            points.append(np.concatenate((lo, hi)))
+    if not points:
+        return np.zeros(0)
+    points = np.unique(np.concatenate(points))
+    return points[(points > domain.begin) & (points < domain.end)]
+
+
+def _envelope(a, b):
+    '''
+    Возвращает участки верхней огибающей отрезков, соединяющих значения a
+    и b (по строкам) на отрезке [0, 1], в виде списка пар (начало участка,
+    номер строки); -1 - все значения равны 0. Из равных значений
+    выбирается отрезок с наибольшим наклоном, затем - с меньшим номером.
+    '''
+    s = b - a
+    top = a.max()
+    rows = np.flatnonzero(a == top)
+    c = rows[np.argmax(s[rows])]
+    if top <= 0 and s[c] <= 0:
+        return [(0.0, -1)]
+    res = [(0.0, c)]
+    u = 0.0
+    while True:
+        faster = np.flatnonzero(s > s[c])
+        cross = np.maximum((a[c]-a[faster]) / (s[faster]-s[c]), u)
+        ahead = cross < 1.0
+        if not ahead.any():
+            return res
+        faster = faster[ahead]
+        cross = cross[ahead]
+        u = cross.min()
+        rows = faster[cross == u]
+        c = rows[np.argmax(s[rows])]
+        res.append((u, c))
+
+
+def _error(terms, table):
+    '''
+    Оценивает наибольшее отклонение значений принадлежности
+    скомпилированного классификатора table от значений термов terms в
+    серединах ячеек между узлами, где погрешность интерполяции (и выбора
+    ближайшего узла) наибольшая.
+    '''
+    grid = table.grid
+    k = np.flatnonzero(grid[:-1] < grid[1:])
+    mids = (grid[k] + grid[k+1]) / 2
+    res = 0.0
+    for row, term in zip(table.mu, terms):
+        exact = term.values_at(mids)
+        if table.interpolate:
+            dev = np.abs((row[k]+row[k+1])/2 - exact)
+        else:
+            dev = np.maximum(np.abs(row[k]-exact), np.abs(row[k+1]-exact))
+        if len(dev):
+            res = max(res, float(dev.max()))
+    return res
+
+
+def tables(obj, domain=None):
+    '''
+    Строит таблицы принадлежности для obj: нечеткого множества,
+    словаря {имя: нечеткое множество} или нечеткого контроллера (объекта с
+    полями inputs и trees, см. infer.Controller). Для словаря и контроллера
+    возвращает словарь {имя переменной: MembershipTable}.
+    '''
+    if isinstance(obj, FuzzySet):
+        return MembershipTable(obj, domain)
+    if isinstance(obj, dict):
+        return dict((name, tables(value, domain))
+                    for name, value in obj.items())
+    res = {}
+    for nodes in (obj.inputs, obj.trees):
+        for name, tree in nodes.items():
+            if tree.classifier is not None:
+                res[name] = MembershipTable(tree.classifier, domain)
+    return res
+
+
+def precompute(obj, path, domain=None):
+    '''
+    Вычисляет таблицы принадлежности для obj (см. tables) и записывает их
+    в файл path.
+    '''
+    save(tables(obj, domain), path)
+
+
+def open_tables(path):
+    '''
+    Открывает таблицы, записанные функцией precompute. Значения
+    отображаются в память только для чтения и разделяются всеми процессами,
+    открывшими файл.
+    '''
+    return load(path, mmap='r')
+
+
+def attach(controller, membership):
+    '''
+    Заменяет классификаторы входов и выходов нечеткого контроллера
+    таблицами принадлежности membership (словарем, возвращаемым
+    open_tables).
+    '''
+    for nodes in (controller.inputs, controller.trees):
+        for name, tree in nodes.items():
+            if name in membership:
+                tree.classifier = membership[name]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod(verbose=False)
@@ -2,10 +2,16 @@
 
 '''
 Модуль реализует набор простых и параметрических треугольный норм и конорм.
+
+Помимо поэлементных методов norm() и conorm(), каждая норма имеет их
+векторные аналоги norm_array() и conorm_array(), применяемые к массивам
+NumPy (с поддержкой правил broadcasting).
 '''
 
 import math
 
+import numpy as np
+
 
 class Tnorm(object):
     def norm(self, i, j):
@@ -14,6 +20,12 @@ class Tnorm(object):
     def conorm(self, i, j):
         pass
 
+    def norm_array(self, i, j):
+        return np.vectorize(self.norm, otypes=[float])(i, j)
+
+    def conorm_array(self, i, j):
+        return np.vectorize(self.conorm, otypes=[float])(i, j)
+
 
 class MinMax(Tnorm):
     def norm(self, i, j):
@@ -22,6 +34,12 @@ class MinMax(Tnorm):
     def conorm(self, i, j):
         return max(i, j)
 
+    def norm_array(self, i, j):
+        return np.minimum(i, j)
+
+    def conorm_array(self, i, j):
+        return np.maximum(i, j)
+
 
 class SumProd(Tnorm):
     def norm(self, i, j):
@@ -30,6 +48,12 @@ class SumProd(Tnorm):
     def conorm(self, i, j):
         return i+j-i*j
 
+    def norm_array(self, i, j):
+        return np.multiply(i, j)
+
+    def conorm_array(self, i, j):
+        return np.add(i, j) - np.multiply(i, j)
+
 
 
 class Margin(Tnorm):
@@ -39,6 +63,12 @@ class Margin(Tnorm):
     def conorm(self, i, j):
         return min(i+j, 1)
 
+    def norm_array(self, i, j):
+        return np.maximum(np.add(i, j) - 1, 0)
+
+    def conorm_array(self, i, j):
+        return np.minimum(np.add(i, j), 1)
+
 
 class Drastic(Tnorm):
     def norm(self, i, j):
@@ -57,6 +87,16 @@ class Drastic(Tnorm):
         else:
             return 1
 
+    def norm_array(self, i, j):
+        i, j = np.broadcast_arrays(np.asarray(i, dtype=float),
+                                   np.asarray(j, dtype=float))
+        return np.where(i == 1, j, np.where(j == 1, i, 0.0))
+
+    def conorm_array(self, i, j):
+        i, j = np.broadcast_arrays(np.asarray(i, dtype=float),
+                                   np.asarray(j, dtype=float))
+        return np.where(i == 0, j, np.where(j == 0, i, 1.0))
+
 
 class ParametricNorm(Tnorm):
     def __init__(self, param):
@@ -44,6 +44,8 @@
     9.55
 '''
 
+from .common import get_slots, set_slots
+from .storage import register
 from .subset import Interval
 from .domain import Domain
 from .tnorm import MinMax
@@ -169,9 +171,7 @@ class Mamdani(Rules):
             rule.alpha = alpha
             # обрезаем терм собственного классификатора уровнем альфа
             # и прибавляем его к существующим, используя конорму
-            res = res.t_conorm(Interval(host.classifier.begin,
-                                         host.classifier.end) * rule.alpha & \
-                                         host.classifier[rule.concl])
+            res = res.t_conorm(host.classifier[rule.concl].clip(rule.alpha))
         return res
 
 class RulesAccurate(Rules):
@@ -211,6 +211,8 @@ class Rule(object):
         concl
         name
     '''
+    __slots__ = ('ant', 'concl', 'name', 'alpha')
+
     def __init__(self, ant=None, concl='', name=''):
         if not ant:
             ant = {}
@@ -218,6 +220,12 @@ class Rule(object):
         self.name = name
         self.ant = ant
 
+    def __getstate__(self):
+        return get_slots(self)
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+
     def __str__(self):
         res = str(self.name)+': '
         for (name, value) in self.ant.iteritems():
@@ -283,6 +291,8 @@ class Tree(Domain):
     # TODO реализовать в интерфейсе Subset иерархический носитель.
     # Без изъебов типа весов и классификаторов. Но с A.value()
 
+    __slots__ = ('name', 'estimation', 'childs', 'agg', 'classifier', 'tnorm')
+
     def __init__(self, name='', estim=None, agg=Simple(),
                         clas=None, tnorm=MinMax()):
         self.name = name
@@ -292,6 +302,12 @@ class Tree(Domain):
         self.classifier = clas
         self.tnorm = tnorm
 
+    def __getstate__(self):
+        return get_slots(self)
+
+    def __setstate__(self, state):
+        set_slots(self, state)
+
     def __str__(self):
         '''
         Для быстрого вывода основной информации о дереве, поддереве или листе,
@@ -582,6 +598,9 @@ class Controller(object):
         #TODO вывод классификаторов выходов
         #TODO вывод двумерных графиков
 
+
+register(Simple, Rules, Mamdani, RulesAccurate, Rule, Tree, Controller)
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod(verbose=False)
@@ -11,5 +11,5 @@ setup(
     license='LICENSE.txt',
     description='',
     long_description=open('README.txt').read(),
-    install_requires=["matplotlib"],
+    install_requires=["matplotlib", "numpy"],
 )
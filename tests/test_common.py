@@ -0,0 +1,167 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import threading
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+
+sys.path.append("..\\")
+from fuzzycalc.common import *
+from fuzzycalc.domain import RationalRange, IntegerRange, union
+from fuzzycalc.subset import Subset, Gaussian, Triangle
+
+
+@ddt
+class TestPrecision(unittest.TestCase):
+
+    def testdefault(self):
+        policy = current_precision()
+        self.assertEqual(ACCURACY, policy.acc)
+        self.assertEqual(np.float64, policy.dtype)
+        self.assertEqual(PRECISION, policy.tol)
+
+    def testnested(self):
+        with Precision(acc=10):
+            with Precision(tol=1e-3) as policy:
+                self.assertEqual(10, policy.acc)
+                self.assertEqual(1e-3, current_precision().tol)
+            self.assertEqual(PRECISION, current_precision().tol)
+        self.assertEqual(ACCURACY, current_precision().acc)
+
+    def testreentrant(self):
+        low = Precision(acc=10)
+        with low:
+            with low:
+                self.assertEqual(10, current_precision().acc)
+            self.assertEqual(10, current_precision().acc)
+        self.assertEqual(ACCURACY, current_precision().acc)
+
+    def testdomain(self):
+        domain = RationalRange(0.0, 1.0)
+        explicit = RationalRange(0.0, 1.0, acc=50)
+        with Precision(acc=10, dtype='float32'):
+            self.assertEqual(11, len(domain.grid()))
+            self.assertEqual(np.float32, domain.grid().dtype)
+            self.assertEqual(51, len(explicit.grid()))
+            self.assertEqual(np.float32, IntegerRange(0, 3).grid().dtype)
+        self.assertEqual(ACCURACY + 1, len(domain.grid()))
+        self.assertEqual(np.float64, domain.grid().dtype)
+
+    @data(
+            (None, None, None),
+            (20, None, 20),
+            (20, 50, 50),
+         )
+    @unpack
+    def testunion(self, acc1, acc2, acc):
+        res = union(RationalRange(0.0, 1.0, acc=acc1),
+                    RationalRange(0.5, 2.0, acc=acc2))
+        self.assertEqual(0.0, res.begin)
+        self.assertEqual(2.0, res.end)
+        self.assertEqual(acc, res._acc)
+
+    def testmemoized(self):
+        A = Gaussian(0.5, 1.0)
+        with Precision(acc=3):
+            self.assertTrue(A.sup() < 1.0)
+        self.assertAlmostEqual(1.0, A.sup())
+
+    def testtolerance(self):
+        A = Subset()
+        A[0.5] = 1.0
+        B = Subset()
+        B[0.5] = 1.001
+        self.assertFalse(A == B)
+        with Precision(tol=1e-2):
+            self.assertTrue(A == B)
+
+    def testthreads(self):
+        res = {}
+
+        def worker(name, acc):
+            with Precision(acc=acc):
+                barrier.wait()
+                res[name] = len(RationalRange(0.0, 1.0).grid())
+
+        barrier = _Barrier(2)
+        threads = [threading.Thread(target=worker, args=('low', 10)),
+                   threading.Thread(target=worker, args=('high', 100))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({'low': 11, 'high': 101}, res)
+
+    def testshared(self):
+        # один менеджер используется в двух потоках; первый поток входит в
+        # блок раньше второго, а выходит из него, пока второй еще внутри
+        shared = Precision(acc=1000)
+        barriers = [_Barrier(2) for _ in range(3)]
+        res = {}
+
+        def first():
+            with Precision(acc=50):
+                with shared:
+                    barriers[0].wait()
+                    barriers[1].wait()
+                res['first'] = current_precision().acc
+                barriers[2].wait()
+
+        def second():
+            barriers[0].wait()
+            with shared:
+                barriers[1].wait()
+                barriers[2].wait()
+            res['second'] = current_precision().acc
+
+        threads = [threading.Thread(target=first),
+                   threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({'first': 50, 'second': 1000}, res)
+
+
+class _Barrier(object):
+
+    def __init__(self, parties):
+        self.parties = parties
+        self.count = 0
+        self.cond = threading.Condition()
+
+    def wait(self):
+        with self.cond:
+            self.count += 1
+            if self.count >= self.parties:
+                self.cond.notify_all()
+            while self.count < self.parties:
+                self.cond.wait()
+
+
+class TestQuad(unittest.TestCase):
+
+    def testsmooth(self):
+        res, err, evals = quad(np.sin, 0.0, np.pi, tol=1e-10)
+        self.assertAlmostEqual(2.0, res, places=9)
+        self.assertTrue(err < 1e-10)
+
+    def testkink(self):
+        res, err, evals = quad(lambda x: np.abs(x-0.3), 0.0, 1.0, tol=1e-8)
+        self.assertAlmostEqual(0.29, res, places=8)
+        self.assertTrue(evals < 1000)
+
+    def testvector(self):
+        res, err, evals = quad(lambda x: np.vstack((x, x*x)), 0.0, 1.0)
+        self.assertAlmostEqual(0.5, res[0])
+        self.assertAlmostEqual(1.0/3, res[1])
+
+    def testempty(self):
+        res, err, evals = quad(np.sin, 2.0, 2.0, tol=1e-6)
+        self.assertEqual((0.0, 0.0, 1), (res, err, evals))
+        res, err, evals = quad(lambda x: np.vstack((x, x*x)), 1.0, 1.0)
+        self.assertEqual([0.0, 0.0], res.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
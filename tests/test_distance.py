@@ -0,0 +1,91 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+
+sys.path.append("..\\")
+import fuzzycalc.distance
+from fuzzycalc.distance import *
+from fuzzycalc.subset import Triangle, Trapezoidal, Gaussian, Interval
+from fuzzycalc.domain import RationalRange
+
+
+class _Numpy(object):
+    # запоминает размеры массивов, передаваемых в np.abs
+
+    def __init__(self):
+        self.sizes = []
+
+    def __getattr__(self, name):
+        return getattr(np, name)
+
+    def abs(self, x):
+        self.sizes.append(np.size(x))
+        return np.abs(x)
+
+
+@ddt
+class TestDistanceMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.subsets = [Triangle(0.0, 1.0, 4.0),
+                        Triangle(0.0, 3.0, 4.0),
+                        Trapezoidal((0.0, 1.0, 2.0, 4.0)),
+                        Interval(0.0, 4.0)]
+
+    @data('euclid', 'hamming')
+    def testpairwise(self, metric):
+        res = distance_matrix(self.subsets, metric=metric)
+        self.assertEqual((4, 4), res.shape)
+        for i, one in enumerate(self.subsets):
+            for j, other in enumerate(self.subsets):
+                expected = getattr(one, metric + '_distance')(other)
+                self.assertAlmostEqual(expected, res[i, j], places=2)
+
+    @data('euclid', 'hamming')
+    def testsymmetric(self, metric):
+        res = distance_matrix(self.subsets, metric=metric)
+        self.assertTrue(np.allclose(res, res.T))
+        self.assertTrue(np.all(np.diag(res) == 0.0))
+
+    @data('euclid', 'hamming')
+    def testblock(self, metric):
+        res = distance_matrix(self.subsets, metric=metric)
+        self.assertTrue(np.allclose(res, distance_matrix(self.subsets,
+                                                         metric=metric,
+                                                         block=1)))
+
+    def testblock_grid(self):
+        subsets = [Triangle(0.0, k/10.0 + 1.0, 4.0) for k in range(20)]
+        expected = distance_matrix(subsets, metric='hamming')
+        block = 500
+        self.assertGreater(len(subsets)*len(fuzzycalc.distance._grid(
+            subsets)), block)
+        fuzzycalc.distance.np = _Numpy()
+        try:
+            res = distance_matrix(subsets, metric='hamming', block=block)
+            self.assertLessEqual(max(fuzzycalc.distance.np.sizes), block)
+        finally:
+            fuzzycalc.distance.np = np
+        self.assertTrue(np.allclose(expected, res))
+
+    def testrectangular(self):
+        others = [Gaussian(2.0, 0.5), Triangle(1.0, 2.0, 3.0)]
+        res = distance_matrix(self.subsets, others, metric='hamming')
+        self.assertEqual((4, 2), res.shape)
+        self.assertTrue(np.all(res > 0))
+
+    def testshared_grid(self):
+        A = Triangle(0.0, 1.0, 2.0)
+        B = Triangle(2.0, 3.0, 4.0)
+        res = distance_matrix([A, B], metric='hamming')
+        self.assertAlmostEqual(2.0/4, res[0, 1], places=3)
+
+    def testmetric(self):
+        self.assertRaises(ValueError, distance_matrix, self.subsets,
+                          metric='chebyshev')
+
+if __name__ == '__main__':
+    unittest.main()
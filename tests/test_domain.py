@@ -3,10 +3,13 @@
 import unittest
 from ddt import data, unpack, ddt
 import sys
+import pickle
 
 sys.path.append("..\\")
-from fuzzycalc.domain import RationalRange, IntegerRange
+from fuzzycalc.domain import RationalRange, IntegerRange, FiniteDomain, \
+    ProductDomain
 
+@ddt
 class TestRationalRange(unittest.TestCase):
 
     def test_boundaries_low_acc(self):
@@ -39,11 +42,35 @@ class TestRationalRange(unittest.TestCase):
 
     def test_card_normal(self):
         domain = RationalRange(-0.92, 152.6, 258)
-        self.assertEqual(153, len(domain))
+        self.assertEqual(259, len(domain))
 
     def test_card_singleton(self):
         domain = RationalRange(-0.92, -0.92, 258)
-        self.assertEqual(0.0, len(domain))
+        self.assertEqual(259, len(domain))
+
+    @data(3, 7, 10, 258, 1000, 10000)
+    def test_grid_exact(self, acc):
+        domain = RationalRange(-0.92, 152.6, acc)
+        arr = [x for x in domain]
+        self.assertEqual(acc + 1, len(arr))
+        self.assertEqual(-0.92, arr[0])
+        self.assertEqual(152.6, arr[-1])
+
+    def test_grid_shared(self):
+        one = RationalRange(0.1, 0.7, 300)
+        other = RationalRange(0.1, 0.7, 300)
+        self.assertTrue(one.grid() is other.grid())
+        self.assertFalse(one.grid() is RationalRange(0.1, 0.7, 301).grid())
+
+    def test_grid_readonly(self):
+        grid = RationalRange(0, 1, 10).grid()
+        with self.assertRaises(ValueError):
+            grid[0] = 5.0
+
+    def test_grid_follows_params(self):
+        domain = RationalRange(0, 1, 10)
+        domain.acc = 20
+        self.assertEqual(21, len(domain.grid()))
 
     def test_contains_normal(self):
         domain = RationalRange(-0.92, 152.6, 258)
@@ -87,11 +114,11 @@ class TestIntegerRange(unittest.TestCase):
 
     def test_card_normal(self):
         domain = IntegerRange(-0.92, 152.6)
-        self.assertEqual(152, len(domain))
+        self.assertEqual(153, len(domain))
 
     def test_card_singleton(self):
         domain = IntegerRange(-0.92, -0.92)
-        self.assertEqual(0.0, len(domain))
+        self.assertEqual(1, len(domain))
 
     def test_contains_normal(self):
         domain = IntegerRange(-0.92, 152.6)
@@ -109,5 +136,85 @@ class TestIntegerRange(unittest.TestCase):
         self.assertIn(0, domain)
         self.assertNotIn(-0.92, domain)
 
+    def test_not_contains_fraction(self):
+        domain = IntegerRange(0, 10)
+        self.assertNotIn(2.5, domain)
+        self.assertIn(3.0, domain)
+
+class TestFiniteDomain(unittest.TestCase):
+
+    def setUp(self):
+        self.domain = FiniteDomain(['red', 'green', 'blue'])
+
+    def test_card(self):
+        self.assertEqual(3, len(self.domain))
+        self.assertEqual(3, self.domain.card())
+
+    def test_iter(self):
+        self.assertEqual(['red', 'green', 'blue'], list(self.domain))
+
+    def test_contains(self):
+        self.assertIn('blue', self.domain)
+        self.assertNotIn('black', self.domain)
+        self.assertNotIn([], self.domain)
+
+    def test_index(self):
+        self.assertEqual(1, self.domain.index('green'))
+        self.assertRaises(KeyError, self.domain.index, 'black')
+        self.assertEqual([2, -1, 0],
+                         list(self.domain.indices(['blue', 'black', 'red'])))
+
+    def test_duplicates(self):
+        self.assertRaises(ValueError, FiniteDomain, ['red', 'red'])
+
+    def test_eq(self):
+        self.assertEqual(FiniteDomain(['red', 'green', 'blue']), self.domain)
+        self.assertNotEqual(FiniteDomain(['red', 'blue']), self.domain)
+
+class TestProductDomain(unittest.TestCase):
+
+    def setUp(self):
+        self.domain = ProductDomain(FiniteDomain(['a', 'b']),
+                                    RationalRange(0.0, 1.0, acc=2))
+
+    def test_shape(self):
+        self.assertEqual((2, 3), self.domain.shape)
+        self.assertEqual(6, len(self.domain))
+        self.assertEqual(('a', 0.0), next(iter(self.domain)))
+
+    def test_contains(self):
+        self.assertIn(('b', 0.5), self.domain)
+        self.assertNotIn(('c', 0.5), self.domain)
+        self.assertNotIn(('a', 2.0), self.domain)
+        self.assertNotIn('a', self.domain)
+
+    def test_index(self):
+        self.assertEqual((1, 1), self.domain.index(('b', 0.5)))
+        self.assertEqual((0, 2), self.domain.index(('a', 0.9)))
+        self.assertRaises(KeyError, self.domain.index, ('c', 0.5))
+
+    def test_single(self):
+        self.assertRaises(ValueError, ProductDomain, FiniteDomain(['a']))
+
+@ddt
+class TestPickle(unittest.TestCase):
+
+    @data(
+        RationalRange(0.0, 2.0),
+        RationalRange(0.0, 2.0, acc=10),
+        IntegerRange(1, 5),
+        FiniteDomain(['a', 'b']),
+        ProductDomain(FiniteDomain(['a', 'b']), RationalRange(0.0, 1.0, acc=2)),
+    )
+    def testroundtrip(self, domain):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            res = pickle.loads(pickle.dumps(domain, protocol))
+            self.assertIs(type(domain), type(res))
+            self.assertEqual(list(domain), list(res))
+
+    def testacc(self):
+        res = pickle.loads(pickle.dumps(RationalRange(0.0, 2.0)))
+        self.assertIsNone(res._acc)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+import pickle
+
+sys.path.append("..\\")
+from fuzzycalc.lazy import *
+from fuzzycalc.common import Precision
+from fuzzycalc.subset import Triangle, Trapezoidal, Subset
+
+
+class CountingTriangle(Triangle):
+
+    def __init__(self, a, b, c):
+        super(CountingTriangle, self).__init__(a, b, c)
+        self.calls = 0
+
+    def values_at(self, xs):
+        self.calls += 1
+        return super(CountingTriangle, self).values_at(xs)
+
+
+@ddt
+class TestExpression(unittest.TestCase):
+
+    def setUp(self):
+        self.A = Triangle(0.0, 1.0, 2.0)
+        self.B = Triangle(0.5, 1.5, 2.5)
+        self.C = Trapezoidal((1.0, 1.5, 2.0, 3.0))
+
+    def testdeferred(self):
+        A = CountingTriangle(0.0, 1.0, 2.0)
+        expr = (lazy(A) & self.B) | ~lazy(self.C)
+        self.assertEqual(0, A.calls)
+        expr.centr()
+        self.assertEqual(1, A.calls)
+
+    @data(0.25, 0.8, 1.2, 1.75, 2.4)
+    def testvalue(self, x):
+        expr = (lazy(self.A) & self.B) | ~lazy(self.C)
+        eager = (self.A & self.B) | ~self.C
+        self.assertAlmostEqual(eager[x], expr[x], places=2)
+
+    def teststatistics(self):
+        expr = (lazy(self.A) + self.B) * lazy(self.C) ** 2
+        eager = (self.A + self.B) * self.C ** 2
+        self.assertAlmostEqual(eager.centr(), expr.centr(), places=2)
+        self.assertAlmostEqual(eager.card(), expr.card(), places=2)
+        self.assertAlmostEqual(eager.sup(), expr.sup(), places=2)
+
+    def testshared_subexpressions(self):
+        A = CountingTriangle(0.0, 1.0, 2.0)
+        expr = (lazy(A) & self.B) - ~(lazy(A) & self.B)
+        expr.values_at(np.linspace(0.0, 3.0, 50))
+        self.assertEqual(1, A.calls)
+
+    def testimmutable(self):
+        with self.assertRaises(TypeError):
+            lazy(self.A)[0.5] = 1.0
+
+    def testprecision(self):
+        expr = (lazy(self.A) + self.B) * lazy(self.C) ** 2
+        with Precision(acc=4):
+            coarse = expr.card()
+        fine = expr.card()
+        self.assertNotAlmostEqual(coarse, fine, places=3)
+        fresh = (lazy(self.A) + self.B) * lazy(self.C) ** 2
+        self.assertAlmostEqual(fresh.card(), fine)
+        with Precision(acc=4):
+            self.assertAlmostEqual(coarse, expr.card())
+
+    def testmutation(self):
+        S = Subset(0.0, 2.0)
+        S[1.0] = 1.0
+        leaf = lazy(S)
+        expr = leaf | self.A
+        self.assertAlmostEqual(1.0, leaf.card())
+        self.assertAlmostEqual(1.0, expr.card(), places=3)
+        S[1.5] = 1.0
+        self.assertAlmostEqual(1.0, leaf[1.5])
+        self.assertAlmostEqual(1.25, leaf.card())
+        self.assertAlmostEqual((S | self.A).card(), expr.card(), places=3)
+
+    def testpickle(self):
+        expr = (lazy(self.A) & self.B) | ~lazy(self.A)
+        res = pickle.loads(pickle.dumps(expr, 2))
+        xs = np.linspace(0.0, 3.0, 50)
+        self.assertTrue(np.allclose(expr.values_at(xs), res.values_at(xs)))
+        # общие листья остаются общими после восстановления
+        self.assertIs(res.args[0].args[0].args[0],
+                      res.args[1].args[0].args[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,306 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+import pickle
+
+sys.path.append("..\\")
+from fuzzycalc.numbers import *
+
+class CountingTrapExt(TrapExt):
+
+    def __init__(self, *args, **kwargs):
+        super(CountingTrapExt, self).__init__(*args, **kwargs)
+        self.calls = 0
+
+    def values_at(self, xs):
+        self.calls += np.size(xs)
+        return super(CountingTrapExt, self).values_at(xs)
+
+
+@ddt
+class TestTrapExt(unittest.TestCase):
+
+    @data(
+            (LINE(1), LINE(1)),
+            (LINE(3.0), QUAD(2.0)),
+            (LAPL(2.0), TANG(1.0)),
+            (GAUS(1.0), CAUC(1.0)),
+            (LOGI(1.0), SECG(1.0)),
+            (LINES(1.5), QUADS(3.5)),
+            (LAPLS(1.5), TANGS(3.5)),
+            (GAUSS(1.5), CAUCS(3.5)),
+            (LOGIS(1.5), SECGS(3.5)),
+            (COSS(1.5), COSS(3.5)),
+         )
+    @unpack
+    def testvalues_at(self, left, right):
+        A = TrapExt((1.0, 2.0, 3.0, 4.0), left=left, right=right)
+        xs = np.linspace(0.0, 5.0, 201)
+        expected = [A.value(x) for x in xs]
+        self.assertTrue(np.allclose(expected, A.values_at(xs)))
+
+    @data(
+            (LINE(1), LINE(1)),
+            (LINE(3.0), QUAD(2.0)),
+            (LAPL(2.0), TANG(1.0)),
+            (GAUS(1.0), CAUC(1.0)),
+            (LINES(1.5), QUADS(3.5)),
+            (COSS(1.5), COSS(3.5)),
+         )
+    @unpack
+    def testalpha_cuts(self, left, right):
+        A = TrapExt((1.0, 2.0, 3.0, 4.0), left=left, right=right)
+        levels = np.linspace(0.1, 1.0, 10)
+        lo, hi = A.alpha_cuts(levels)
+        self.assertTrue(np.all(lo <= hi))
+        self.assertTrue(np.all(A.values_at(lo + 1e-9) >= levels - 1e-6))
+        self.assertTrue(np.all(A.values_at(hi - 1e-9) >= levels - 1e-6))
+        self.assertTrue(np.all(A.values_at(lo - 1e-6) < levels))
+        self.assertTrue(np.all(A.values_at(hi + 1e-6) < levels))
+
+    def testalpha_cuts_bounds(self):
+        A = TrapExt((1.0, 2.0, 3.0, 4.0))
+        lo, hi = A.alpha_cuts([0.0, 0.5, 1.0, 2.0])
+        self.assertTrue(np.allclose([1.0, 1.5, 2.0], lo[:3]))
+        self.assertTrue(np.allclose([4.0, 3.5, 3.0], hi[:3]))
+        self.assertTrue(np.isnan(lo[3]))
+
+    def testlevel(self):
+        A = TrapExt((1.0, 2.0, 3.0, 4.0), left=LINE(2.0))
+        res = A.level(0.25)
+        self.assertAlmostEqual(1.5, res.begin_tol)
+        self.assertAlmostEqual(3.75, res.end_tol)
+
+    @data(
+            (GAUS(1.0), LOGI(1.0)),
+            (COSS(1.5), COSS(3.5)),
+            (LINE(3.0), QUAD(2.0)),
+         )
+    @unpack
+    def testquad(self, left, right):
+        A = CountingTrapExt((1.0, 2.0, 3.0, 4.0), left=left, right=right)
+        xs = np.linspace(1.0, 4.0, 2000001)
+        mu = A.values_at(xs)
+        card = np.trapz(mu, xs)
+        centr = np.trapz(mu*xs, xs)/card
+        A.calls = 0
+        res = A.quad(1e-6)
+        self.assertTrue(A.calls < A.domain.acc/2)
+        self.assertTrue(abs(res[0] - card) < max(res[1], 1e-9)*10)
+        self.assertTrue(abs(res[2] - centr) < max(res[3], 1e-9)*10)
+        self.assertAlmostEqual(card, A.card(tol=1e-6), places=6)
+        self.assertAlmostEqual(centr, A.centr(tol=1e-6), places=6)
+
+    def testvalues_at_crisp(self):
+        A = TrFN(1.0, 1.0, 3.0, 3.0)
+        self.assertTrue(np.allclose([0.0, 0.0, 1.0, 1.0, 0.0],
+                                    A.values_at([0.5, 1.0, 2.0, 3.0, 3.5])))
+
+@ddt
+class TestShape(unittest.TestCase):
+
+    @data(LINE(3.0), LINES(1.3), QUAD(2.0), QUADS(1.6), LAPL(2.0),
+          LAPLS(1.5), TANG(1.0), TANGS(1.5), GAUS(1.0), GAUSS(1.5),
+          CAUC(1.0), CAUCS(1.5), LOGI(1.0), LOGIS(1.5), SECG(1.0),
+          SECGS(1.5), COSS(1.5))
+    def testinverse(self, shape):
+        slope = shape(2.0, 1.0)
+        levels = np.linspace(0.05, 1.0, 20)
+        xs = slope.inverse(levels)
+        reached = levels >= slope(1.0)
+        self.assertTrue(np.allclose(levels[reached], slope(xs[reached])))
+        self.assertTrue(np.all(xs[~reached] == 1.0))
+
+    @data(LINE(3.0), LINES(1.3), QUAD(2.0), QUADS(1.6), LAPL(2.0),
+          LAPLS(1.5), GAUS(1.0), GAUSS(1.5), CAUC(1.0), CAUCS(1.5),
+          SECG(1.0), COSS(1.5))
+    def testintegral(self, shape):
+        slope = shape(3.0, 4.0)
+        xs = np.linspace(3.0, 4.0, 100001)
+        self.assertAlmostEqual(np.trapz(slope(xs), xs), slope.integral(),
+                               places=8)
+
+    def testno_integral(self):
+        self.assertIsNone(LOGI(1.0)(3.0, 4.0).integral())
+        self.assertIsNone(TANGS(3.5)(3.0, 4.0).integral())
+
+    def testvalues(self):
+        self.assertAlmostEqual(0.125, LINE(3.0)(2.0, 1.0)(1.5))
+        self.assertAlmostEqual(0.5, LINES(1.3)(2.0, 1.0)(1.3))
+        self.assertAlmostEqual(np.exp(-1.0), GAUS(1.0)(3.0, 4.0)(4.0))
+        self.assertTrue(np.allclose([1.0, 0.0],
+                                    QUAD(2.0)(3.0, 4.0)(np.array([3.0, 4.0]))))
+
+    def testeq(self):
+        self.assertEqual(LINE(2.0), Line(2.0))
+        self.assertNotEqual(LINE(2.0), QUAD(2.0))
+        self.assertEqual('Quad(2.0)', repr(QUAD(2)))
+
+    def testcard(self):
+        A = TrapExt((1.0, 2.0, 3.0, 4.0), left=LINE(3.0), right=CAUC(1.0))
+        self.assertAlmostEqual(1.0/4 + 1.0 + np.pi/4, A.card())
+        self.assertAlmostEqual(A.quad(1e-9)[0], A.card(), places=8)
+
+    def testcustom(self):
+        # функция ската, заданная пользователем, обращается численно
+        A = TrapExt((1.0, 2.0, 3.0, 4.0),
+                    left=lambda a, b: lambda x: ((x-b)/(a-b))**2)
+        lo, hi = A.alpha_cuts([0.25, 1.0])
+        self.assertTrue(np.allclose([1.5, 2.0], lo))
+        self.assertAlmostEqual(1.0/3 + 1.0 + 0.5, A.card(), places=3)
+
+@ddt
+class TestExtend(unittest.TestCase):
+
+    def setUp(self):
+        self.A = TrFN(1.0, 2.0, 2.0, 3.0)
+        self.B = TrFN(0.0, 1.0, 2.0, 3.0)
+
+    @data(True, False)
+    def testsum(self, monotone):
+        res = extend(lambda x, y: x + y, self.A, self.B, monotone=monotone)
+        for lvl in (0.0, 0.25, 0.5, 1.0):
+            cut = res.level(lvl)
+            self.assertAlmostEqual(1.0 + 2*lvl, cut.domain.begin)
+            self.assertAlmostEqual(6.0 - 2*lvl, cut.domain.end)
+
+    def testcrisp(self):
+        res = extend(lambda x, y: x*y, self.A, 2.0, monotone=True)
+        self.assertAlmostEqual(2.0, res.level(0.0).domain.begin)
+        self.assertAlmostEqual(6.0, res.level(0.0).domain.end)
+        self.assertAlmostEqual(1.0, res[4.0])
+
+    def testnonmonotone(self):
+        # (x-2)^2 достигает минимума внутри среза: метод вершин неприменим
+        res = extend(lambda x: (x-2.0)**2, self.A, levels=[0.0, 0.5, 1.0])
+        self.assertAlmostEqual(0.0, res.level(0.0).domain.begin)
+        self.assertAlmostEqual(1.0, res.level(0.0).domain.end)
+        self.assertAlmostEqual(0.25, res.level(0.5).domain.end)
+        vertex = extend(lambda x: (x-1.8)**2, self.A, levels=[0.0, 0.5, 1.0],
+                        monotone=True)
+        self.assertAlmostEqual(0.04, vertex.level(0.0).domain.begin)
+
+    def testnested(self):
+        res = extend(np.sin, TrFN(0.0, 2.0, 2.0, 6.0), levels=17)
+        lo, hi = res.alpha_cuts(np.linspace(0.0, 1.0, 17))
+        self.assertTrue(np.all(np.diff(lo) >= -1e-12))
+        self.assertTrue(np.all(np.diff(hi) <= 1e-12))
+        self.assertAlmostEqual(-1.0, lo[0], places=2)
+        self.assertAlmostEqual(1.0, hi[0], places=2)
+
+    def testblock(self):
+        # сетка 9^5 точек перебирается частями не более чем по block значений
+        calls = []
+        def f(*args):
+            calls.append(np.size(args[0]))
+            return sum((x-1.9)**2 for x in args)
+        numbers = [self.A, self.B, self.A, 2.0, self.B]
+        res = extend(f, *numbers, levels=[0.0, 0.5, 1.0], samples=9,
+                     block=3000)
+        self.assertLessEqual(max(calls), 3000)
+        full = extend(f, *numbers, levels=[0.0, 0.5, 1.0], samples=9)
+        self.assertTrue(np.allclose(full.alpha_cuts([0.0, 0.5, 1.0]),
+                                    res.alpha_cuts([0.0, 0.5, 1.0])))
+        # минимум ищется по точкам сетки: точный минимум 0.01 недостижим
+        self.assertAlmostEqual(0.03125, res.level(0.0).domain.begin)
+
+    def testkwargs(self):
+        self.assertRaises(TypeError, extend, abs, self.A, level=3)
+
+@ddt
+class TestArithmetic(unittest.TestCase):
+
+    def setUp(self):
+        self.A = TrFN(1.0, 2.0, 3.0, 4.0)
+        self.B = TrFN(-1.0, 0.0, 1.0, 2.0)
+
+    def cuts(self, number, lvl):
+        cut = number.level(lvl)
+        return cut.domain.begin, cut.domain.end
+
+    @data(
+        ('__add__', 0.0, (0.0, 6.0)),
+        ('__add__', 1.0, (2.0, 4.0)),
+        ('__sub__', 0.0, (-1.0, 5.0)),
+        ('__sub__', 0.5, (0.0, 4.0)),
+        ('__mul__', 0.0, (-4.0, 8.0)),
+        ('__mul__', 1.0, (0.0, 3.0)),
+    )
+    @unpack
+    def testoperations(self, operation, lvl, expected):
+        res = getattr(self.A, operation)(self.B)
+        self.assertIsInstance(res, AlphaCutNumber)
+        for value, cut in zip(expected, self.cuts(res, lvl)):
+            self.assertAlmostEqual(value, cut, places=6)
+
+    def testcrisp(self):
+        self.assertEqual(self.cuts(self.A + 1, 0.5), self.cuts(1 + self.A, 0.5))
+        self.assertAlmostEqual(0.5, (2*self.A)[3.0])
+        for value, cut in zip((-3.0, 0.0), self.cuts(1 - self.A, 0.0)):
+            self.assertAlmostEqual(value, cut, places=6)
+        for value, cut in zip((0.25, 1.0), self.cuts(1 / self.A, 0.0)):
+            self.assertAlmostEqual(value, cut, places=6)
+        for value, cut in zip((1.0, 1.5), self.cuts(self.A / 2, 1.0)):
+            self.assertAlmostEqual(value, cut, places=6)
+
+    def testdivision_by_zero(self):
+        self.assertRaises(ZeroDivisionError, lambda: self.A / self.B)
+
+    def testchain(self):
+        # сумма 50 треугольных чисел: функция принадлежности вычисляется
+        # по границам срезов, а не через вложенные функции скатов
+        res = TrFN(0.0, 1.0, 1.0, 2.0)
+        for _ in range(49):
+            res = res + TrFN(0.0, 1.0, 1.0, 2.0)
+        self.assertIsInstance(res, AlphaCutNumber)
+        self.assertEqual(len(res.levels), len(res.lo))
+        self.assertAlmostEqual(1.0, res[50.0])
+        self.assertAlmostEqual(0.5, res[25.0])
+        self.assertAlmostEqual(0.0, res[100.0])
+        self.assertAlmostEqual(50.0, res.centr(), places=6)
+
+    def testlevels(self):
+        one = AlphaCutNumber.from_subset(self.A, levels=3)
+        other = AlphaCutNumber.from_subset(self.B, levels=5)
+        res = one + other
+        self.assertTrue(np.allclose([0.0, 0.25, 0.5, 0.75, 1.0], res.levels))
+
+    def testimmutable(self):
+        res = self.A + self.B
+        self.assertRaises(TypeError, res.__setitem__, 1.0, 0.5)
+
+    def testlogic(self):
+        one = TrFN(1.0, 2.0, 3.0, 4.0)
+        other = TrFN(2.0, 3.0, 4.0, 5.0)
+        self.assertAlmostEqual(3.0, (one | other).card())
+        self.assertAlmostEqual(1.0, (one & other).card())
+        self.assertAlmostEqual(0.5, (one & other)[2.5])
+
+@ddt
+class TestPickle(unittest.TestCase):
+
+    @data(
+        lambda: TrFN(1.0, 2.0, 3.0, 4.0),
+        lambda: TrapExt((1.0, 2.0, 3.0, 4.0), left=GAUSS(1.5), right=COSS(3.5)),
+        lambda: TrapExt((1.0, 1.0, 3.0, 4.0), right=LAPL(2.0)),
+        lambda: TrFN(1.0, 2.0, 3.0, 4.0) * TrFN(0.0, 1.0, 1.0, 2.0),
+    )
+    def testroundtrip(self, build):
+        A = build()
+        xs = np.linspace(0.0, 10.0, 101)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            B = pickle.loads(pickle.dumps(A, protocol))
+            self.assertIs(type(A), type(B))
+            self.assertTrue(np.allclose(A.values_at(xs), B.values_at(xs)))
+
+    def testshape(self):
+        slope = QUADS(1.6)(2.0, 1.0)
+        res = pickle.loads(pickle.dumps(slope))
+        self.assertEqual(slope.shape, res.shape)
+        self.assertEqual(slope(1.5), res(1.5))
+
+if __name__ == '__main__':
+    unittest.main()
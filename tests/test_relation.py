@@ -0,0 +1,112 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+import pickle
+
+sys.path.append("..\\")
+from fuzzycalc.relation import *
+from fuzzycalc.domain import FiniteDomain, ProductDomain, RationalRange
+from fuzzycalc.subset import Discrete, Triangle
+from fuzzycalc.tnorm import MinMax, SumProd, Margin
+
+
+def naive(one, other, tnorm):
+    n, k = one.shape
+    m = other.shape[1]
+    res = np.zeros((n, m))
+    for i in range(n):
+        for j in range(m):
+            res[i, j] = max(tnorm.norm(one[i, l], other[l, j])
+                            for l in range(k))
+    return res
+
+
+@ddt
+class TestRelation(unittest.TestCase):
+
+    def setUp(self):
+        rand = np.random.RandomState(0)
+        self.x = FiniteDomain(['x%d' % i for i in range(7)])
+        self.y = FiniteDomain(['y%d' % i for i in range(5)])
+        self.z = FiniteDomain(['z%d' % i for i in range(6)])
+        one = rand.rand(7, 5)
+        one[one < 0.5] = 0.0
+        other = rand.rand(5, 6)
+        other[other < 0.5] = 0.0
+        self.one = one
+        self.other = other
+
+    def test_value(self):
+        R = Relation(ProductDomain(self.x, self.y), self.one)
+        self.assertEqual(self.one[2, 3], R['x2', 'y3'])
+        R['x2', 'y3'] = 0.25
+        self.assertEqual(0.25, R['x2', 'y3'])
+        self.assertEqual(0.0, R['x2', 'black'])
+
+    def test_sparse(self):
+        R = Relation(ProductDomain(self.x, self.y), self.one, sparse=True)
+        self.assertTrue(R.sparse)
+        self.assertEqual(np.count_nonzero(self.one), len(R.mu))
+        self.assertTrue(np.array_equal(self.one, R.dense()))
+        self.assertEqual(self.one[4, 1], R['x4', 'y1'])
+        R['x0', 'y0'] = 0.75
+        R['x6', 'y4'] = 0.5
+        self.assertEqual(0.75, R['x0', 'y0'])
+        self.assertEqual(0.5, R['x6', 'y4'])
+        self.assertTrue(np.all(np.diff(R.rows) >= 0))
+
+    @data(
+        (MinMax(), False, 2**22),
+        (MinMax(), True, 2**22),
+        (MinMax(), True, 1),
+        (SumProd(), False, 2**22),
+        (SumProd(), True, 8),
+        (Margin(), False, 3),
+    )
+    @unpack
+    def test_compose(self, tnorm, sparse, block):
+        R = Relation(ProductDomain(self.x, self.y), self.one, sparse=sparse)
+        S = Relation(ProductDomain(self.y, self.z), self.other, sparse=sparse)
+        res = R.compose(S, tnorm, block=block)
+        self.assertEqual((7, 6), res.domain.shape)
+        self.assertTrue(np.allclose(naive(self.one, self.other, tnorm),
+                                    res.dense()))
+
+    def test_not_composable(self):
+        R = Relation(ProductDomain(self.x, self.y), self.one)
+        self.assertRaises(ValueError, R.compose, R)
+
+    def test_transpose(self):
+        R = Relation(ProductDomain(self.x, self.y), self.one, sparse=True)
+        T = R.transpose()
+        self.assertEqual((5, 7), T.domain.shape)
+        self.assertEqual(R['x3', 'y1'], T['y1', 'x3'])
+
+    def test_image(self):
+        R = Relation(ProductDomain(self.x, self.y), self.one)
+        A = Discrete(self.x, self.one[:, 0])
+        B = R.image(A)
+        expected = naive(self.one[:, 0][None, :], self.one, MinMax())[0]
+        self.assertTrue(np.allclose(expected, B.dense()))
+
+    @data(False, True)
+    def test_pickle(self, sparse):
+        R = Relation(ProductDomain(self.x, self.y), self.one, sparse=sparse)
+        res = pickle.loads(pickle.dumps(R, 2))
+        self.assertEqual(sparse, res.sparse)
+        self.assertTrue(np.array_equal(R.dense(), res.dense()))
+
+    def test_image_continuous(self):
+        X = RationalRange(0.0, 4.0, acc=40)
+        R = Relation.from_function(ProductDomain(X, X),
+                                   lambda x, y: np.maximum(1-abs(x-y), 0))
+        B = R.image(Triangle(1.0, 2.0, 3.0))
+        self.assertAlmostEqual(1.0, B[2.0])
+        self.assertAlmostEqual(0.5, B[3.0])
+        self.assertAlmostEqual(0.0, B[0.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 import unittest
 from ddt import data, unpack, ddt
 import sys
+import pickle
 
 sys.path.append("..\\")
 from fuzzycalc.set import *
@@ -154,5 +155,15 @@ class TestPartition(unittest.TestCase):
         self.assertEqual('2', self.A.classify(17))
 
 
+class TestPickle(unittest.TestCase):
+
+    def testroundtrip(self):
+        A = TriangleClassifier(begin=0, end=100,
+                               names=['low', 'middle', 'high'])
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            B = pickle.loads(pickle.dumps(A, protocol))
+            self.assertEqual(sorted(A.sets), sorted(B.sets))
+            self.assertEqual(A['middle'], B['middle'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,217 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.append("..\\")
+from fuzzycalc.storage import *
+from fuzzycalc.storage import MAGIC, _HEAD
+from fuzzycalc.domain import FiniteDomain, ProductDomain, RationalRange
+from fuzzycalc.lazy import lazy
+from fuzzycalc.numbers import TrFN, TrapExt, GAUSS, COSS, AlphaCutNumber
+from fuzzycalc.relation import Relation
+from fuzzycalc.set import TriangleClassifier, GaussianClassifier, \
+    Partition, FuzzySet
+from fuzzycalc.subset import Trapezoidal, Triangle, Interval, Point, \
+    Gaussian, PiecewiseLinear, Discrete, Subset
+
+
+class Narrow(Triangle):
+
+    __slots__ = ()
+
+
+class Weights(object):
+
+    def __init__(self, values):
+        self.values = values
+
+
+@ddt
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'model.fzc')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def roundtrip(self, obj, mmap=True):
+        save(obj, self.path)
+        return load(self.path, mmap=mmap)
+
+    @data(
+        lambda: Trapezoidal((0.0, 1.0, 2.0, 3.0)),
+        lambda: Triangle(0.0, 1.0, 2.0),
+        lambda: Interval(1.0, 2.0),
+        lambda: Point(1.5),
+        lambda: Gaussian(0.5, 0.2),
+        lambda: PiecewiseLinear([0.0, 1.0, 3.0], [0.0, 1.0, 0.5]),
+        lambda: Triangle(0.0, 1.0, 2.0) | Gaussian(1.5, 0.5),
+        lambda: Discrete(FiniteDomain(['a', 'b']), {'b': 0.5}, sparse=True),
+    )
+    def testsubset(self, build):
+        A = build()
+        for mmap in (True, False):
+            B = self.roundtrip(A, mmap)
+            self.assertIs(type(A), type(B))
+            self.assertEqual(A, B)
+
+    def testplain(self):
+        A = Subset(0.0, 2.0)
+        A[1.0] = 1.0
+        B = self.roundtrip(A)
+        self.assertAlmostEqual(0.5, B[0.5])
+        B[1.5] = 1.0
+        self.assertAlmostEqual(0.5, A[1.5])
+        self.assertAlmostEqual(1.0, B[1.5])
+
+    def testmmap(self):
+        A = PiecewiseLinear(np.linspace(0.0, 1.0, 1000),
+                            np.linspace(0.0, 1.0, 1000) ** 2)
+        save(A, self.path)
+        B = load(self.path)
+        C = load(self.path, mmap=False)
+        xs = np.linspace(0.0, 1.0, 77)
+        self.assertTrue(np.allclose(A.values_at(xs), B.values_at(xs)))
+        self.assertTrue(np.allclose(A.values_at(xs), C.values_at(xs)))
+
+    @data(
+        lambda: TrFN(1.0, 2.0, 3.0, 4.0),
+        lambda: TrapExt((1.0, 2.0, 3.0, 4.0), left=GAUSS(1.5), right=COSS(3.5)),
+        lambda: TrFN(1.0, 2.0, 3.0, 4.0) * TrFN(0.0, 1.0, 1.0, 2.0),
+    )
+    def testnumber(self, build):
+        A = build()
+        B = self.roundtrip(A)
+        self.assertIs(type(A), type(B))
+        xs = np.linspace(0.0, 10.0, 101)
+        self.assertTrue(np.allclose(A.values_at(xs), B.values_at(xs)))
+
+    @data(
+        lambda: TriangleClassifier(begin=0, end=100,
+                                   names=['low', 'middle', 'high']),
+        lambda: GaussianClassifier(begin=0, end=10, names=['a', 'b', 'c']),
+        lambda: Partition(begin=10, end=20, peaks=[10, 13, 15, 20],
+                          overlap=0.2),
+    )
+    def testclassifier(self, build):
+        A = build()
+        B = self.roundtrip(A)
+        self.assertIs(type(A), type(B))
+        self.assertIsInstance(B.sets, TermTable)
+        self.assertEqual(sorted(A.sets), sorted(B.sets))
+        for name in A.sets:
+            self.assertIs(type(A[name]), type(B[name]))
+            self.assertEqual(A[name], B[name])
+        # термы создаются однократно
+        name = sorted(A.sets)[0]
+        self.assertIs(B[name], B[name])
+
+    def testterms(self):
+        A = TriangleClassifier(names=['low', 'middle', 'high'])
+        A.sets['odd'] = PiecewiseLinear([0.0, 0.5, 1.0], [0.0, 1.0, 0.0])
+        B = self.roundtrip(A)
+        self.assertEqual(4, len(B.sets))
+        self.assertEqual(A['odd'], B['odd'])
+        del B.sets['low']
+        B.sets['middle'] = Point(0.5)
+        B.sets['top'] = Point(1.0)
+        self.assertEqual(['high', 'middle', 'odd', 'top'], sorted(B.sets))
+        self.assertIs(type(B['middle']), Point)
+        with self.assertRaises(KeyError):
+            del B.sets['low']
+        C = self.roundtrip(B)
+        self.assertEqual(sorted(B.sets), sorted(C.sets))
+        self.assertEqual(B['high'], C['high'])
+
+    def testmany(self):
+        A = TriangleClassifier(names=['t%d' % i for i in range(2000)])
+        B = self.roundtrip(A)
+        self.assertEqual(0, len(B.sets._terms))
+        self.assertEqual(2000, len(B.sets))
+        self.assertEqual(A['t1000'], B['t1000'])
+        self.assertEqual(1, len(B.sets._terms))
+
+    def testnames(self):
+        A = TriangleClassifier(names=[u'низкий', 'high'])
+        B = self.roundtrip(A)
+        self.assertEqual(sorted(A.sets), sorted(B.sets))
+        self.assertEqual(A[u'низкий'], B[u'низкий'])
+
+    def testbytes(self):
+        A = FuzzySet()
+        A.add_term(PiecewiseLinear([0.0, 1.0, 3.0], [0.0, 1.0, 0.0]), 'низ')
+        A.add_term(Triangle(1.0, 2.0, 3.0), 'верх')
+        B = self.roundtrip(A)
+        for name in ('низ', 'верх'):
+            self.assertIs(str, type([key for key in B.sets
+                                     if key == name][0]))
+            self.assertEqual(A[name], B[name])
+        C = {'ключ': ['значение', u'значение']}
+        D = self.roundtrip(C)
+        self.assertEqual(C, D)
+        self.assertIs(str, type(D['ключ'][0]))
+        self.assertIs(unicode, type(D['ключ'][1]))
+
+    def testshared(self):
+        A = Triangle(0.0, 1.0, 2.0)
+        expr = (lazy(A) & Gaussian(1.0, 0.5)) | ~lazy(A)
+        res = self.roundtrip(expr)
+        xs = np.linspace(0.0, 3.0, 50)
+        self.assertTrue(np.allclose(expr.values_at(xs), res.values_at(xs)))
+        self.assertIs(res.args[0].args[0].args[0],
+                      res.args[1].args[0].args[0])
+
+    def testrelation(self):
+        D = ProductDomain(FiniteDomain(['a', 'b', 'c']),
+                          RationalRange(0.0, 1.0, acc=4))
+        R = Relation(D, [[0.0, 0.5, 0.0, 0.0, 1.0],
+                         [0.0, 0.0, 0.0, 0.0, 0.0],
+                         [0.2, 0.0, 0.0, 0.3, 0.0]], sparse=True)
+        S = self.roundtrip(R)
+        self.assertTrue(S.sparse)
+        self.assertTrue(np.array_equal(R.dense(), S.dense()))
+
+    def testcontainers(self):
+        A = {'pair': (1, 2.5), 'list': [u'x', None, True],
+             'dtype': np.dtype('float32'), 'type': Triangle}
+        self.assertEqual(A, self.roundtrip(A))
+
+    def testmagic(self):
+        with open(self.path, 'wb') as stream:
+            stream.write(b'not a model')
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+    def testversion(self):
+        save(Point(1.0), self.path)
+        with open(self.path, 'r+b') as stream:
+            stream.seek(len(MAGIC))
+            version, size = _HEAD.unpack(stream.read(_HEAD.size))
+            stream.seek(len(MAGIC))
+            stream.write(_HEAD.pack(version + 1, size))
+        with self.assertRaises(ValueError):
+            load(self.path)
+
+    def testregister(self):
+        with self.assertRaises(ValueError):
+            save(Weights([1.0]), self.path)
+        A = TriangleClassifier(names=['a', 'b'])
+        A.add_term(Narrow(0.0, 0.5, 1.0), 'narrow')
+        with self.assertRaises(ValueError):
+            save(A, self.path)
+        self.assertFalse(os.path.exists(self.path))
+        register(Weights)
+        res = self.roundtrip(Weights(np.arange(3.0)))
+        self.assertIs(Weights, type(res))
+        self.assertEqual([0.0, 1.0, 2.0], res.values.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,38 @@
 ﻿#This file was originally generated by PyScripter's unitest wizard
 
 import unittest
+import math
+import numpy as np
 from ddt import data, unpack, ddt
 import sys
+import pickle
 
 sys.path.append("..\\")
 from fuzzycalc.subset import *
-from fuzzycalc.common import ACCURACY
+from fuzzycalc.common import ACCURACY, PRECISION
+from fuzzycalc.domain import FiniteDomain
+
+class CountingSubset(Subset):
+
+    def __init__(self):
+        super(CountingSubset, self).__init__()
+        self.calls = 0
+
+    def _breakpoints(self):
+        self.calls += 1
+        return super(CountingSubset, self)._breakpoints()
+
+
+class ValuesAtMixin(object):
+    # сверяет values_at с поэлементным value для подмножества self.subset,
+    # заданного в setUp
+
+    def testvalues_at(self):
+        xs = np.linspace(self.subset.domain.begin - 1.0,
+                         self.subset.domain.end + 1.0, 157)
+        xs = np.append(xs, list(self.subset.values))
+        expected = [self.subset.value(x) for x in xs]
+        self.assertTrue(np.allclose(expected, self.subset.values_at(xs)))
 
 @ddt
 class TestSubset(unittest.TestCase):
@@ -34,6 +60,27 @@ class TestSubset(unittest.TestCase):
     def test_outer_value(self):
         self.assertEqual(0.0, self.subset[1.5])
 
+    @data(
+            (0.4,  0.35),
+            (0.8,  0.6),
+            (0.45, 0.85),
+            (0.03, 0.99),
+         )
+    @unpack
+    def test_unordered_breakpoints(self, member, value):
+        self.subset[0.9] = 0.3
+        self.subset[0.3] = 0.2
+        self.subset[0.6] = 0.8
+        self.subset[0.4] = 0.8
+        self.subset[0.3] = 0.0
+        self.assertAlmostEqual(member, self.subset[value])
+
+    def testvalues_at(self):
+        self.subset[0.3] = 0.2
+        xs = np.append(np.linspace(-0.5, 1.5, 157), [0.3, 0.75])
+        expected = [self.subset.value(x) for x in xs]
+        self.assertTrue(np.allclose(expected, self.subset.values_at(xs)))
+
     def testnormalize(self):
         self.subset = Subset()
         self.subset[0.75] = 0.75
@@ -49,8 +96,35 @@ class TestSubset(unittest.TestCase):
     def testlevel(self):
         res = self.subset.level(0.5)
         self.assertAlmostEqual(0.5, res.begin_tol)
-        self.assertAlmostEqual(0.834, res.end_tol)
+        self.assertAlmostEqual(0.833, res.end_tol, places=3)
         self.assertAlmostEqual(0.667, res.centr(), places=3)
+
+    def testlevel_empty(self):
+        self.assertEqual(None, self.subset.level(0.8))
+
+    @data(
+            (0.0,  0.0,  1.0),
+            (0.25, 0.1666667, 0.9166667),
+            (0.75, 0.75, 0.75),
+         )
+    @unpack
+    def testalpha_cuts(self, lvl, lo, hi):
+        self.subset[0.4] = 0.6
+        self.subset[0.5] = 0.4
+        res = self.subset.alpha_cuts([lvl])
+        self.assertAlmostEqual(lo, res[0][0])
+        self.assertAlmostEqual(hi, res[1][0])
+
+    def testalpha_cuts_batch(self):
+        levels = np.linspace(0.0, 1.0, 41)
+        lo, hi = self.subset.alpha_cuts(levels)
+        self.assertEqual(levels.shape, lo.shape)
+        self.assertTrue(np.all(np.isnan(lo[levels > 0.75])))
+        cut = levels <= 0.75
+        self.assertTrue(np.allclose(self.subset.values_at(lo[cut][1:]),
+                                    levels[cut][1:]))
+        self.assertTrue(np.allclose(self.subset.values_at(hi[cut][1:]),
+                                    levels[cut][1:]))
     @data(
             (0.5,   0.5, 1.0),
             (0.5,   0.5, 0.75),
@@ -84,6 +158,59 @@ class TestSubset(unittest.TestCase):
         self.subset[0.75] = 0.75
         self.assertAlmostEqual(0.75, self.subset.mode())
 
+    @data(3, 7, 1000)
+    def testexact_statistics(self, acc):
+        self.subset = Subset()
+        self.subset.domain.acc = acc
+        self.subset[0.2] = 0.0
+        self.subset[0.3] = 1.0
+        self.subset[0.55] = 1.0
+        self.subset[0.6] = 0.5
+        self.subset[0.7] = 0.0
+        self.assertAlmostEqual(0.3625, self.subset.card())
+        self.assertAlmostEqual(0.43275862, self.subset.centr())
+        self.assertAlmostEqual(0.3, self.subset.mode())
+        self.assertAlmostEqual(1.0, self.subset.sup())
+        self.assertAlmostEqual(0.2, self.subset.support().begin_tol)
+        self.assertAlmostEqual(0.7, self.subset.support().end_tol)
+
+    def testsupport_empty(self):
+        self.assertEqual(None, Subset().support())
+
+    def testmemoized(self):
+        self.subset = CountingSubset()
+        self.subset[0.75] = 0.75
+        for i in range(5):
+            self.assertAlmostEqual(0.375, self.subset.card())
+            self.assertAlmostEqual(0.75, self.subset.mode())
+        self.assertEqual(2, self.subset.calls)
+
+    def testalpha_cuts_cached(self):
+        self.subset = CountingSubset()
+        self.subset[0.75] = 0.75
+        for lvl in (0.25, 0.5, 0.75):
+            lo, hi = self.subset.alpha_cuts(lvl)
+            self.assertAlmostEqual(lvl, lo)
+        self.assertEqual(1, self.subset.calls)
+        self.subset[0.75] = 1.0
+        lo, hi = self.subset.alpha_cuts(1.0)
+        self.assertAlmostEqual(0.75, lo)
+        self.assertEqual(2, self.subset.calls)
+
+    def testmemoized_invalidation(self):
+        self.assertAlmostEqual(0.375, self.subset.card())
+        self.assertAlmostEqual(0.75, self.subset.sup())
+        self.subset[0.75] = 1.0
+        self.assertAlmostEqual(0.5, self.subset.card())
+        self.assertAlmostEqual(1.0, self.subset.sup())
+
+    def testmemoized_domain(self):
+        subset = Gaussian(0.5, 1.0)
+        subset.domain.acc = 3
+        self.assertTrue(subset.sup() < 1.0)
+        subset.domain.acc = 1000
+        self.assertAlmostEqual(1.0, subset.sup())
+
     def testeuclid_distance(self):
         self.assertAlmostEqual(0.385,
                     self.subsetA.euclid_distance(self.subsetB), places=3)
@@ -92,10 +219,23 @@ class TestSubset(unittest.TestCase):
         self.assertAlmostEqual(0.333,
                     self.subsetA.hamming_distance(self.subsetB), places=3)
 
+    def testdistance_exact(self):
+        A = Triangle(0.0, 1.0, 2.0)
+        B = Interval(0.0, 2.0)
+        self.assertAlmostEqual(0.5, A.hamming_distance(B))
+        self.assertAlmostEqual(math.sqrt(1.0/3), A.euclid_distance(B))
+        self.assertAlmostEqual(0.0, A.hamming_distance(A))
+
+    def testdistance_crossing(self):
+        A = Triangle(0.0, 1.0, 2.0)
+        B = Triangle(1.0, 2.0, 3.0)
+        self.assertAlmostEqual(1.5/3, A.hamming_distance(B))
+        self.assertAlmostEqual(math.sqrt(1.0/3), A.euclid_distance(B))
+
     def test__add__(self):
         res = self.subsetA + self.subsetB
         self.assertAlmostEqual(0.5, res.centr(), places=3)
-        self.assertAlmostEqual(0.188, res.mode(), places=3)
+        self.assertAlmostEqual(0.1875, res.mode())
         self.assertAlmostEqual(1.0, res.sup(), places=3)
         self.assertAlmostEqual(1.0, res[0.25], places=3)
         self.assertAlmostEqual(1.0, res[0.75], places=3)
@@ -139,7 +279,7 @@ class TestSubset(unittest.TestCase):
 
     def test__neg__(self):
         res = -self.subsetA
-        self.assertAlmostEqual(0.416, res.centr(), places=3)
+        self.assertAlmostEqual(0.417, res.centr(), places=3)
         self.assertAlmostEqual(0.0, res.mode(), places=3)
         self.assertAlmostEqual(1.0, res.sup(), places=3)
         self.assertAlmostEqual(0.667, res[0.25], places=3)
@@ -164,6 +304,77 @@ class TestSubset(unittest.TestCase):
         self.assertAlmostEqual(1.0, res[0.75], places=3)
         self.assertAlmostEqual(0.133, res[0.1], places=3)
 
+    def testdominance(self):
+        self.subsetA.domain.acc = 50
+        self.subsetB.domain.acc = 40
+        sum_ = 0.0
+        sum2 = 0.0
+        for i in self.subsetA.domain:
+            for j in self.subsetB.domain:
+                chances = self.subsetA.value(i)*self.subsetB.value(j)
+                sum_ += chances
+                if i < j:
+                    sum2 += chances
+        self.assertAlmostEqual(sum2/sum_, self.subsetA.dominance(self.subsetB))
+        self.assertAlmostEqual(max(1-2*sum2/sum_, 0.0),
+                               self.subsetA.__cmp__(self.subsetB))
+
+    def testdominance_ties(self):
+        # точки общей сетки не входят ни в P(X < Y), ни в P(X > Y)
+        A = Triangle(0.0, 1.0, 2.0)
+        xs = A.domain.grid()
+        mu = A.values_at(xs)
+        less = np.outer(mu, mu)[np.less.outer(xs, xs)].sum()
+        self.assertAlmostEqual(less/mu.sum()**2, A.dominance(A))
+        self.assertAlmostEqual(A.dominance(A), 1 - A.dominance(A) -
+                               np.dot(mu, mu)/mu.sum()**2)
+
+    def testfuzzy_cmp(self):
+        self.assertEqual(1, fuzzy_cmp(self.subsetA, self.subsetB))
+        self.assertEqual(-1, fuzzy_cmp(self.subsetB, self.subsetA))
+        self.assertEqual(0, fuzzy_cmp(self.subsetA, self.subsetA))
+
+    def testfuzzy_key(self):
+        estimates = [Triangle(2, 3, 4), Gaussian(0.5, 0.2), Triangle(0, 1, 5),
+                     Trapezoidal((1, 2, 3, 6)), Point(1.5)]
+        res = sorted(estimates, key=fuzzy_key)
+        self.assertEqual([estimates[i] for i in (1, 4, 2, 0, 3)], res)
+
+    def test__eq__(self):
+        other = Subset()
+        other[0.75] = 1.0
+        self.assertTrue(self.subsetA == other)
+        self.assertFalse(self.subsetA != other)
+        self.assertFalse(self.subsetA == self.subsetB)
+        self.assertEqual(hash(self.subsetA), hash(other))
+
+    def test__hash__empty(self):
+        self.assertEqual(hash(Subset()), hash(Subset(0.0, 2.0)))
+        self.assertEqual(1, len(set([Subset(), Subset()])))
+
+    def test__eq__tolerance(self):
+        other = Subset()
+        other[0.75] = 1.0 + PRECISION/10
+        self.assertTrue(self.subsetA == other)
+        other[0.75] = 1.0 + PRECISION*10
+        self.assertFalse(self.subsetA == other)
+
+    def test__eq__piecewise(self):
+        other = PiecewiseLinear([0.0, 0.375, 0.75, 1.0], [0.0, 0.5, 1.0, 0.0])
+        self.assertTrue(self.subsetA == other)
+        self.assertEqual(hash(self.subsetA), hash(other))
+
+    def test__eq__grid(self):
+        self.assertTrue(Gaussian(0.0, 1.0) == Gaussian(0.0, 1.0) | Point(0.0))
+        self.assertFalse(Gaussian(0.0, 1.0) == Gaussian(0.0, 1.1))
+
+    def testinterning(self):
+        interned = {}
+        for sub in [Triangle(0, 1, 2), Trapezoidal((0, 1, 1, 2)),
+                    Triangle(0, 1, 2) | Triangle(0, 1, 2), Triangle(0, 1, 3)]:
+            interned.setdefault(sub, sub)
+        self.assertEqual(2, len(interned))
+
 ##    def test__cmp__(self):
 ##        res = (self.subsetA > self.subsetB)
 ##        self.assertAlmostEqual(0.5, res, places=3)
@@ -179,7 +390,7 @@ class TestSubset(unittest.TestCase):
 ##        self.assertAlmostEqual(0.5, res, places=3)
 
 @ddt
-class TestTrapezoidal(unittest.TestCase):
+class TestTrapezoidal(ValuesAtMixin, unittest.TestCase):
 
     def setUp(self):
         self.subset = Trapezoidal((0, 1, 2, 4))
@@ -201,6 +412,27 @@ class TestTrapezoidal(unittest.TestCase):
     def testcard(self):
         self.assertAlmostEqual(2.5, self.subset.card(), places=3)
 
+    def testslots(self):
+        self.assertFalse(hasattr(self.subset, '__dict__'))
+        self.assertTrue(self.subset._algebra is Triangle(0, 1, 2)._algebra)
+        self.assertRaises(AttributeError, setattr, self.subset, 'begin', 0.0)
+
+    def testimmutable(self):
+        with self.assertRaises(TypeError):
+            self.subset[1.5] = 0.5
+
+    def testalpha_cuts(self):
+        lo, hi = self.subset.alpha_cuts([0.0, 0.5, 1.0, 1.5])
+        self.assertTrue(np.allclose([0.0, 0.5, 1.0], lo[:3]))
+        self.assertTrue(np.allclose([4.0, 3.0, 2.0], hi[:3]))
+        self.assertTrue(np.isnan(lo[3]) and np.isnan(hi[3]))
+
+    def test__eq__(self):
+        self.assertTrue(self.subset == Trapezoidal((0, 1, 2, 4)))
+        self.assertFalse(self.subset == Trapezoidal((0, 1, 2, 3)))
+        self.assertTrue(Triangle(0, 1, 4) == Trapezoidal((0, 1, 1, 4)))
+        self.assertFalse(self.subset == Gaussian(1.5, 1.0))
+
     def testmom(self):
         self.assertAlmostEqual(1.5, self.subset.mom())
 
@@ -211,7 +443,7 @@ class TestTrapezoidal(unittest.TestCase):
         self.assertAlmostEqual(1.75, self.subset.median(), places=3)
 
 @ddt
-class TestTriangle(unittest.TestCase):
+class TestTriangle(ValuesAtMixin, unittest.TestCase):
 
     def setUp(self):
         self.subset = Triangle(0, 1, 4)
@@ -234,8 +466,20 @@ class TestTriangle(unittest.TestCase):
     def testcard(self):
         self.assertAlmostEqual(2.0, self.subset.card(), places=3)
 
+    def testcard_shifted(self):
+        self.subset = Triangle(3, 5, 6)
+        self.assertAlmostEqual(1.5, self.subset.card())
+
+    def testcentr(self):
+        self.assertAlmostEqual(5.0/3, self.subset.centr())
+
+    def testsupport(self):
+        res = self.subset.support()
+        self.assertAlmostEqual(0.0, res.begin_tol)
+        self.assertAlmostEqual(4.0, res.end_tol)
+
 @ddt
-class TestInterval(unittest.TestCase):
+class TestInterval(ValuesAtMixin, unittest.TestCase):
 
     def setUp(self):
         self.subset = Interval(1.5, 3.3)
@@ -255,7 +499,7 @@ class TestInterval(unittest.TestCase):
         self.assertAlmostEqual(1.8, self.subset.card())
 
 @ddt
-class TestPoint(unittest.TestCase):
+class TestPoint(ValuesAtMixin, unittest.TestCase):
 
     def setUp(self):
         self.subset = Point(8.3)
@@ -272,8 +516,25 @@ class TestPoint(unittest.TestCase):
     def testcard(self):
         self.assertAlmostEqual(0.0, self.subset.card())
 
+    def testquad(self):
+        self.assertEqual((0.0, 0.0, None, None), self.subset.quad(1e-6))
+        self.assertAlmostEqual(8.3, self.subset.centr(tol=1e-6))
+        self.assertAlmostEqual(8.3, self.subset.centr())
+
+    def test__eq__(self):
+        other = Trapezoidal((8.3, 8.3, 8.3, 8.3))
+        self.assertFalse(self.subset == other)
+        self.assertTrue(self.subset == Point(8.3))
+        self.assertEqual(hash(self.subset), hash(Point(8.3)))
+        self.assertEqual(2, len(set([self.subset, other, Point(8.3)])))
+
+    def testlevel(self):
+        res = self.subset.level(0.5)
+        self.assertAlmostEqual(8.3, res.begin_tol)
+        self.assertAlmostEqual(8.3, res.end_tol)
+
 @ddt
-class TestGaussian(unittest.TestCase):
+class TestGaussian(ValuesAtMixin, unittest.TestCase):
 
     def setUp(self):
         self.subset = Gaussian(2.3, 1.2)
@@ -296,5 +557,269 @@ class TestGaussian(unittest.TestCase):
     def testcard(self):
         self.assertAlmostEqual(3.008, self.subset.card(), places=3)
 
+    def testalpha_cuts(self):
+        levels = np.array([0.1, 0.5, 0.9, 1.0])
+        lo, hi = self.subset.alpha_cuts(levels)
+        self.assertTrue(np.allclose(levels, self.subset.values_at(lo),
+                                    atol=1e-5))
+        self.assertTrue(np.allclose(levels, self.subset.values_at(hi),
+                                    atol=1e-5))
+        self.assertTrue(np.allclose(2.3, (lo+hi)/2))
+
+    @data(
+            (0.0, 1.0, 0.0, 1.0),
+            (0.0, 1.0, 1.0, 1.0),
+            (0.0, 1.0, 1.0, 2.0),
+            (2.0, 0.5, -1.0, 1.5),
+         )
+    @unpack
+    def testdistance(self, m1, w1, m2, w2):
+        A = Gaussian(m1, w1)
+        B = Gaussian(m2, w2)
+        begin = min(A.domain.begin, B.domain.begin)
+        end = max(A.domain.end, B.domain.end)
+        xs = np.linspace(begin, end, 100001)
+        d = A.values_at(xs) - B.values_at(xs)
+        self.assertAlmostEqual(np.trapz(np.abs(d), xs)/(end-begin),
+                               A.hamming_distance(B), places=4)
+        self.assertAlmostEqual(math.sqrt(np.trapz(d*d, xs)/(end-begin)),
+                               A.euclid_distance(B), places=4)
+
+    def testquad(self):
+        card, card_err, centr, centr_err = self.subset.quad(1e-8)
+        self.assertAlmostEqual(math.sqrt(2*math.pi)*1.2, card, places=4)
+        self.assertTrue(card_err < 1e-8)
+        self.assertAlmostEqual(2.3, centr, places=6)
+
+    def testalpha_cuts_support(self):
+        lo, hi = self.subset.alpha_cuts(0.0)
+        self.assertAlmostEqual(self.subset.domain.begin, lo)
+        self.assertAlmostEqual(self.subset.domain.end, hi)
+
+@ddt
+class TestPiecewiseLinear(ValuesAtMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.subset = PiecewiseLinear([0.0, 1.0, 3.0], [0.0, 1.0, 0.0])
+
+    @data(
+            (0, 0),
+            (0.5, 0.5),
+            (1, 1),
+            (0.25, 2.5),
+            (0, 4.6),
+         )
+    @unpack
+    def testvalue(self, member, value):
+        self.assertAlmostEqual(member, self.subset[value])
+
+    def testvalue_array(self):
+        res = self.subset.value(np.array([-1.0, 0.5, 2.0, 3.0]))
+        self.assertEqual((4,), res.shape)
+        self.assertTrue(np.allclose([0.0, 0.5, 0.5, 0.0], res))
+
+    def testsetitem(self):
+        self.subset[2.0] = 1.0
+        self.assertAlmostEqual(1.0, self.subset[1.5])
+        self.assertAlmostEqual(0.5, self.subset[2.5])
+
+    def testcentr(self):
+        self.assertAlmostEqual(4.0/3, self.subset.centr(), places=3)
+
+    def testcard(self):
+        self.assertAlmostEqual(1.5, self.subset.card(), places=3)
+
+    def testquad(self):
+        self.assertEqual(self.subset.card(), self.subset.card(tol=1e-3))
+        card, card_err, centr, centr_err = self.subset.quad(1e-10)
+        self.assertAlmostEqual(1.5, card)
+        self.assertAlmostEqual(4.0/3, centr)
+
+    def testlevel(self):
+        res = self.subset.level(0.5)
+        self.assertAlmostEqual(0.5, res.begin_tol, places=2)
+        self.assertAlmostEqual(2.0, res.end_tol, places=2)
+
+    def test__and__(self):
+        res = self.subset & Triangle(1.0, 2.0, 3.0)
+        self.assertTrue(isinstance(res, PiecewiseLinear))
+        self.assertAlmostEqual(0.0, res[1.0])
+        self.assertAlmostEqual(2.0/3, res[5.0/3])
+        self.assertTrue(len(res.xs) < 10)
+
+    def test__or__(self):
+        res = self.subset | Triangle(1.0, 2.0, 3.0)
+        self.assertAlmostEqual(1.0, res[1.0])
+        self.assertAlmostEqual(0.75, res[1.5])
+        self.assertAlmostEqual(1.0, res[2.0])
+        self.assertAlmostEqual(11.0/6, res.card())
+
+    def test__neg__(self):
+        res = ~self.subset
+        self.assertAlmostEqual(1.0, res[0.0])
+        self.assertAlmostEqual(0.25, res[0.75])
+        self.assertAlmostEqual(1.5, res.card())
+
+    def test__sub__(self):
+        res = self.subset - Triangle(1.0, 2.0, 3.0)
+        self.assertAlmostEqual(0.0, res[2.0])
+        self.assertAlmostEqual(1.0, res[1.0])
+        self.assertAlmostEqual(5.0/3, res.support().end_tol)
+
+    @data(0.0, 0.25, 0.5, 1.0)
+    def testclip(self, lvl):
+        res = self.subset.clip(lvl)
+        grid = np.linspace(-1.0, 4.0, 101)
+        self.assertTrue(np.allclose(np.minimum(self.subset.values_at(grid), lvl),
+                                    res.values_at(grid)))
+
+    def testclip_aggregation(self):
+        res = self.subset.clip(0.3)
+        for i in range(50):
+            term = Triangle(0.1*i, 0.1*i+0.5, 0.1*i+1.0)
+            res = res | term.clip(i/50.0)
+        self.assertTrue(len(res.xs) < 500)
+        self.assertAlmostEqual(res[0.6], max(0.3, 0.02*2*0.2, 0.04*0.8, 0.0))
+
+    def test__add__(self):
+        res = self.subset + Triangle(1.0, 2.0, 3.0)
+        self.assertAlmostEqual(1.0, res[1.5], places=3)
+        self.assertAlmostEqual(0.5, res[0.5], places=3)
+
+@ddt
+class TestDiscrete(unittest.TestCase):
+
+    def setUp(self):
+        self.domain = FiniteDomain(['low', 'mid', 'high', 'top'])
+        self.A = Discrete(self.domain, {'low': 0.2, 'mid': 1.0})
+        self.B = Discrete(self.domain, {'mid': 0.5, 'high': 0.7}, sparse=True)
+
+    @data(
+            ('low', 0.2, 0.0),
+            ('mid', 1.0, 0.5),
+            ('high', 0.0, 0.7),
+            ('top', 0.0, 0.0),
+            ('none', 0.0, 0.0),
+         )
+    @unpack
+    def testvalue(self, label, a, b):
+        self.assertAlmostEqual(a, self.A[label])
+        self.assertAlmostEqual(b, self.B[label])
+
+    def testvalues_at(self):
+        labels = ['top', 'mid', 'none', 'high']
+        self.assertTrue(np.allclose([0.0, 1.0, 0.0, 0.0],
+                                    self.A.values_at(labels)))
+        self.assertTrue(np.allclose([0.0, 0.5, 0.0, 0.7],
+                                    self.B.values_at(labels)))
+
+    def testdense(self):
+        self.assertTrue(np.allclose([0.0, 0.5, 0.7, 0.0], self.B.dense()))
+        self.assertEqual([1, 2], list(self.B.index))
+
+    @data(
+            (False, False),
+            (False, True),
+            (True, True),
+         )
+    @unpack
+    def testalgebra(self, sparse_a, sparse_b):
+        A = Discrete(self.domain, self.A.values, sparse=sparse_a)
+        B = Discrete(self.domain, self.B.values, sparse=sparse_b)
+        self.assertTrue(np.allclose([0.2, 1.0, 0.7, 0.0], (A | B).dense()))
+        self.assertTrue(np.allclose([0.0, 0.5, 0.0, 0.0], (A & B).dense()))
+        self.assertTrue(np.allclose([0.8, 0.0, 1.0, 1.0], (~A).dense()))
+        self.assertEqual(sparse_a and sparse_b, (A | B).sparse)
+
+    def testfunctionals(self):
+        self.assertAlmostEqual(1.2, self.A.card())
+        self.assertAlmostEqual(1.2, self.B.card())
+        self.assertEqual('mid', self.A.mode())
+        self.assertEqual('high', self.B.mode())
+        self.assertAlmostEqual(0.7, self.B.sup())
+        self.assertEqual(['mid', 'high'], self.B.support())
+        self.assertEqual(['low', 'mid'], self.A.support())
+        self.assertEqual(['high'], self.B.level(0.6))
+
+    @data(False, True)
+    def testlevel_zero(self, sparse):
+        A = Discrete(self.domain, [0.2, 1.0, 0.0, 0.0], sparse=sparse)
+        self.assertEqual(['low', 'mid'], A.level(0.0))
+        self.assertEqual(A.support(), A.level(0.0))
+        self.assertEqual(['low', 'mid'], A.level(-1.0))
+        self.assertEqual(['mid'], A.level(1.0))
+        self.assertEqual([], A.level(1.0, strict=True))
+
+    def testsetitem(self):
+        self.B['top'] = 0.3
+        self.B['mid'] = 0.1
+        self.assertTrue(np.allclose([0.0, 0.1, 0.7, 0.3], self.B.dense()))
+        self.assertAlmostEqual(1.1, self.B.card())
+        self.assertRaises(KeyError, self.B.__setitem__, 'none', 0.3)
+
+    def testcentr(self):
+        domain = FiniteDomain([1, 2, 3])
+        A = Discrete(domain, [0.0, 1.0, 1.0])
+        self.assertAlmostEqual(2.5, A.centr())
+        self.assertRaises(TypeError, self.A.centr)
+
+    def test__eq__(self):
+        self.assertTrue(self.B == Discrete(self.domain, self.B.dense()))
+        self.assertFalse(self.A == self.B)
+        self.assertEqual(hash(self.B), hash(Discrete(self.domain,
+                                                     self.B.dense())))
+
+    def testdomain(self):
+        other = Discrete(FiniteDomain(['a', 'b', 'c', 'd']), [1, 1, 1, 1])
+        self.assertRaises(ValueError, self.A.__or__, other)
+
+    def testdistance(self):
+        self.assertAlmostEqual(1.4/4, self.A.hamming_distance(self.B))
+        self.assertAlmostEqual(math.sqrt(0.78/4),
+                               self.A.euclid_distance(self.B))
+
+    def testlarge(self):
+        domain = FiniteDomain(range(50000))
+        A = Discrete(domain, {10: 0.5, 49999: 0.9}, sparse=True)
+        B = Discrete(domain, {10: 0.7, 20: 0.1}, sparse=True)
+        res = A | B
+        self.assertEqual([10, 20, 49999], list(res.index))
+        self.assertEqual(49999, res.mode())
+        self.assertAlmostEqual(1.7, res.card())
+
+@ddt
+class TestPickle(unittest.TestCase):
+
+    @data(
+        lambda: Trapezoidal((0.0, 1.0, 2.0, 3.0)),
+        lambda: Triangle(0.0, 1.0, 2.0),
+        lambda: Interval(1.0, 2.0),
+        lambda: Point(1.5),
+        lambda: Gaussian(0.5, 0.2),
+        lambda: PiecewiseLinear([0.0, 1.0, 3.0], [0.0, 1.0, 0.5]),
+        lambda: Triangle(0.0, 1.0, 2.0) | Gaussian(1.5, 0.5),
+        lambda: Discrete(FiniteDomain(['a', 'b']), {'b': 0.5}, sparse=True),
+    )
+    def testroundtrip(self, build):
+        A = build()
+        A.card()
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            B = pickle.loads(pickle.dumps(A, protocol))
+            self.assertIs(type(A), type(B))
+            self.assertEqual(A, B)
+
+    def testsubset(self):
+        A = Subset(0.0, 2.0)
+        A[1.0] = 1.0
+        B = pickle.loads(pickle.dumps(A))
+        self.assertAlmostEqual(0.5, B[0.5])
+        B[1.5] = 1.0
+        self.assertAlmostEqual(0.5, A[1.5])
+
+    def testcache(self):
+        A = Gaussian(0.5, 0.2)
+        A.centr()
+        self.assertNotIn('_cache', pickle.loads(pickle.dumps(A, 2)).__getstate__())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,224 @@
+﻿# -*- coding: UTF-8 -*-
+
+import unittest
+import numpy as np
+from ddt import data, unpack, ddt
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.append("..\\")
+import fuzzycalc.table
+from fuzzycalc.table import *
+from fuzzycalc.domain import RationalRange
+from fuzzycalc.set import TriangleClassifier, GaussianClassifier, FuzzySet
+from fuzzycalc.storage import save
+from fuzzycalc.subset import Triangle, Point, Interval
+from fuzzycalc.numbers import TrapExt, GAUSS
+
+
+class Node(object):
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+
+class Controller(object):
+
+    def __init__(self, inputs, trees):
+        self.inputs = dict((name, Node(value))
+                           for name, value in inputs.items())
+        self.trees = dict((name, Node(value))
+                          for name, value in trees.items())
+
+
+@ddt
+class TestMembershipTable(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'tables.fzc')
+        self.C = TriangleClassifier(begin=0.0, end=10.0,
+                                    names=['low', 'middle', 'high'])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testtable(self):
+        T = MembershipTable(self.C)
+        self.assertEqual(('high', 'low', 'middle'), T.names)
+        self.assertEqual((3, len(self.C.domain)), T.mu.shape)
+        self.assertFalse(T.mu.flags.writeable)
+        self.assertIn('low', T)
+        self.assertEqual(3, len(T))
+
+    @data(0.0, 1.3, 2.5, 5.0, 7.77, 10.0)
+    def testfind(self, x):
+        T = MembershipTable(self.C)
+        for name in self.C.sets:
+            self.assertAlmostEqual(self.C.find(x, name), T.find(x, name))
+        self.assertEqual(self.C.classify(x), T.classify(x))
+
+    def testoutside(self):
+        T = MembershipTable(self.C)
+        self.assertTrue(np.all(T.values_at([-1.0, 11.0]) == 0.0))
+        self.assertIsNone(T.classify(-1.0))
+
+    def testgaussian(self):
+        C = GaussianClassifier(begin=0.0, end=1.0, names=['a', 'b', 'c'])
+        T = MembershipTable(C, RationalRange(0.0, 1.0, acc=1000))
+        xs = np.linspace(0.0, 1.0, 333)
+        for name in C.sets:
+            self.assertLess(np.abs(T.values_at(xs)[T.names.index(name)] -
+                                   C[name].values_at(xs)).max(), 1e-4)
+
+    def testterm(self):
+        T = MembershipTable(self.C)
+        term = T['middle']
+        self.assertTrue(np.may_share_memory(term.ys, T.mu))
+        self.assertIs(term, T['middle'])
+        self.assertAlmostEqual(self.C['middle'].centr(), term.centr(), 3)
+        self.assertEqual(self.C.classify(Triangle(6.0, 7.0, 8.0)),
+                         T.classify(Triangle(6.0, 7.0, 8.0)))
+
+    def testshared(self):
+        precompute(self.C, self.path)
+        T = open_tables(self.path)
+        self.assertIsInstance(T, MembershipTable)
+        self.assertFalse(T.mu.flags.writeable)
+        self.assertIsInstance(T.mu.base, np.memmap)
+        self.assertTrue(np.array_equal(MembershipTable(self.C).mu, T.mu))
+        self.assertEqual('high', T.classify(9.0))
+
+    def testcontroller(self):
+        out = GaussianClassifier(begin=0.0, end=100.0, names=['a', 'b'])
+        controller = Controller({'x': self.C}, {'y': out})
+        precompute(controller, self.path)
+        res = open_tables(self.path)
+        self.assertEqual(['x', 'y'], sorted(res))
+        attach(controller, res)
+        self.assertIs(res['x'], controller.inputs['x'].classifier)
+        self.assertIs(res['y'], controller.trees['y'].classifier)
+        self.assertAlmostEqual(out.find(30.0, 'a'),
+                               controller.trees['y'].classifier.find(30.0, 'a'),
+                               3)
+
+    def testsets(self):
+        res = tables({'x': self.C, 'y': self.C})
+        self.assertEqual(['x', 'y'], sorted(res))
+        self.assertEqual(self.C.classify(4.0), res['y'].classify(4.0))
+
+
+@ddt
+class TestCompiledSet(unittest.TestCase):
+
+    def setUp(self):
+        self.C = GaussianClassifier(begin=0.0, end=10.0,
+                                    names=['low', 'middle', 'high'])
+
+    @data(True, False)
+    def testerror(self, interpolate):
+        T = self.C.compile(error=1e-3, interpolate=interpolate)
+        self.assertLessEqual(T.error, 1e-3)
+        xs = np.linspace(0.0, 10.0, 1001)
+        values = T.values_at(xs)
+        for k, name in enumerate(T.names):
+            self.assertLess(np.abs(values[k] -
+                                   self.C[name].values_at(xs)).max(), 2e-3)
+            for x in (0.0, 3.33, 10.0):
+                self.assertAlmostEqual(values[k][int(round(x*100))],
+                                       T.find(x, name))
+
+    def testrefine(self):
+        self.C.domain = RationalRange(0.0, 10.0, acc=50)
+        coarse = self.C.compile()
+        fine = self.C.compile(error=1e-4)
+        self.assertGreater(len(fine.grid), len(coarse.grid))
+        self.assertGreater(coarse.error, fine.error)
+
+    def _check(self, C, T, size=2000):
+        # метка classify совпадает с термом наибольшей интерполированной
+        # принадлежности и уступает точному ответу не более 2*error
+        xs = np.random.RandomState(0).uniform(C.domain.begin, C.domain.end,
+                                              size)
+        values = T.values_at(xs)
+        labels = T.indices(xs)
+        for x, label, column in zip(xs, labels, values.T):
+            res = T.classify(x)
+            self.assertEqual(label, -1 if res is None else
+                             T.names.index(res))
+            if column.max() > 0:
+                self.assertEqual(column[label], column.max())
+            exact = C.classify(x)
+            if exact is not None and res != exact:
+                self.assertGreaterEqual(C.find(x, res) if res else 0.0,
+                                        C.find(x, exact) - 2*T.error)
+
+    @data(True, False)
+    def testclassify(self, interpolate):
+        T = self.C.compile(error=1e-4, interpolate=interpolate)
+        self._check(self.C, T)
+        self.assertIsNone(T.classify(-1.0))
+        self.assertEqual([-1, -1], T.indices([-1.0, 11.0]).tolist())
+        self.assertEqual('middle', T.classify(Triangle(4.0, 5.0, 6.0)))
+
+    def testbreakpoints(self):
+        C = TriangleClassifier(names=['a', 'b', 'c'])
+        C.add_term(Interval(0.3, 0.45), 'interval')
+        C.add_term(TrapExt((0.6, 0.7, 0.8, 0.9), left=GAUSS(0.65),
+                           right=GAUSS(0.85)), 'gauss')
+        C.add_term(Point(0.2), 'point')
+        for interpolate in (True, False):
+            T = C.compile(error=1e-3, interpolate=interpolate)
+            self.assertLessEqual(T.error, 1e-3)
+            self._check(C, T)
+            self.assertEqual('interval', T.classify(0.3))
+            self.assertEqual('interval', T.classify(0.4499999))
+            # в точке разрыва действует предел справа
+            self.assertNotEqual('interval', T.classify(0.45))
+            self.assertEqual(1.0, T.find(0.3, 'interval'))
+            self.assertEqual(0.0, T.find(0.2999999, 'interval'))
+
+    def testempty(self):
+        C = TriangleClassifier(names=['a', 'b', 'c'], cross=0.5)
+        T = C.compile()
+        self.assertIsNone(T.classify(0.25))
+        self.assertIsNone(C.classify(0.25))
+        self.assertEqual('b', T.classify(0.5))
+
+    def testdomain(self):
+        C = FuzzySet()
+        C.domain = None
+        with self.assertRaises(TypeError):
+            C.compile()
+
+    def testunreachable(self):
+        size = fuzzycalc.table.COMPILE_SIZE
+        fuzzycalc.table.COMPILE_SIZE = 2**12
+        try:
+            with self.assertRaises(ValueError):
+                self.C.compile(error=1e-9)
+            # таблица на исходной сетке не помещается в COMPILE_SIZE
+            fuzzycalc.table.COMPILE_SIZE = 8
+            with self.assertRaises(ValueError):
+                self.C.compile()
+        finally:
+            fuzzycalc.table.COMPILE_SIZE = size
+
+    def teststorage(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'compiled.fzc')
+            T = self.C.compile(error=1e-3)
+            save(T, path)
+            res = open_tables(path)
+            self.assertIs(CompiledSet, type(res))
+            self.assertEqual(T.classify(6.1), res.classify(6.1))
+            self.assertTrue(np.array_equal(T.bounds, res.bounds))
+            self.assertTrue(np.array_equal(T.segments, res.segments))
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 import unittest
 from ddt import data, unpack, ddt
 import sys
+import numpy as np
 
 sys.path.append("..\\")
 
@@ -173,6 +174,24 @@ class TestTnorm1(unittest.TestCase):
         self.norm = Tnorm1(par)
         self.assertEqual(expected, self.norm.norm(val1, val2))
 
+@ddt
+class TestNormArray(unittest.TestCase):
+
+    @data(MinMax(), SumProd(), Margin(), Drastic(), Tnorm1(1.0))
+    def test_norm_array(self, norm):
+        a = np.array([0.0, 0.2, 0.5, 1.0, 1.0])
+        b = np.array([1.0, 0.5, 0.2, 0.5, 1.0])
+        expected = [norm.norm(x, y) for x, y in zip(a, b)]
+        self.assertTrue(np.allclose(expected, norm.norm_array(a, b)))
+        expected = [norm.conorm(x, y) for x, y in zip(a, b)]
+        self.assertTrue(np.allclose(expected, norm.conorm_array(a, b)))
+
+    def test_broadcast(self):
+        res = MinMax().norm_array(np.array([[0.2], [0.8]]),
+                                  np.array([0.5, 1.0]))
+        self.assertEqual((2, 2), res.shape)
+        self.assertTrue(np.allclose([[0.2, 0.2], [0.5, 0.8]], res))
+
 class TestTnorm2(unittest.TestCase):
 
     def setUp(self):